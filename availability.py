@@ -0,0 +1,60 @@
+# availability.py
+from collections import namedtuple
+
+import numpy as np
+
+MINUTES_PER_DAY = 24 * 60
+
+# minutes: 가능한 시작 시간(자정부터 분), free_counts: 시간별 빈 좌석 수,
+# seat_free: (좌석 수 × 시작 시간 수) bool 배열, seats: seat_free의 행 순서
+Availability = namedtuple("Availability", "minutes free_counts seat_free seats")
+
+
+def occupancy_bitmap(seats, intervals):
+    """
+    - 좌석별 하루를 1분 단위 bool 비트맵(좌석 수 × 1440)으로 만듭니다.
+    - intervals: (seat, 시작 분, 끝 분) 목록. 범위를 벗어난 값은 0~1440으로 잘라냅니다.
+    - 구간마다 칸을 채우지 않고 시작/끝에 +1/-1만 찍은 뒤 누적합 한 번으로 채웁니다.
+    """
+    index = {seat: i for i, seat in enumerate(seats)}
+    delta = np.zeros((len(seats), MINUTES_PER_DAY + 1), dtype=np.int16)
+    rows, starts, ends = [], [], []
+    for seat, start, end in intervals:
+        i = index.get(seat)
+        if i is None:
+            continue
+        rows.append(i)
+        starts.append(start)
+        ends.append(end)
+    if rows:
+        rows = np.asarray(rows)
+        starts = np.clip(np.asarray(starts), 0, MINUTES_PER_DAY)
+        ends = np.clip(np.asarray(ends), 0, MINUTES_PER_DAY)
+        np.add.at(delta, (rows, starts), 1)
+        np.add.at(delta, (rows, ends), -1)
+    return np.cumsum(delta[:, :MINUTES_PER_DAY], axis=1, dtype=np.int16) > 0
+
+
+def feasible_starts(bitmap, seats, duration=30, earliest=0, step=1):
+    """
+    - 모든 좌석에 대해 duration분 동안 비어 있는 시작 시간을 한 번에 계산합니다.
+    - 누적합의 차이로 각 시작 시간의 '사용 중인 분' 수를 구하고, 0이면 예약 가능입니다.
+    - earliest 이후, step분 간격의 시작 시간 중 빈 좌석이 하나라도 있는 시간만 반환합니다.
+    """
+    busy = np.zeros((bitmap.shape[0], MINUTES_PER_DAY + 1), dtype=np.int16)
+    np.cumsum(bitmap, axis=1, dtype=np.int16, out=busy[:, 1:])
+    window = busy[:, duration:] - busy[:, :-duration]   # 시작 시간 0 ~ 1440-duration
+
+    first = -(-max(earliest, 0) // step) * step  # step 단위로 올림
+    minutes = np.arange(first, MINUTES_PER_DAY - duration + 1, step)
+    seat_free = window[:, minutes] == 0
+    free_counts = seat_free.sum(axis=0)
+
+    keep = free_counts > 0
+    return Availability(minutes[keep], free_counts[keep], seat_free[:, keep], list(seats))
+
+
+def seat_slots(availability, seat):
+    """한 좌석이 예약 가능한 시작 시간(분) 배열을 반환합니다."""
+    i = availability.seats.index(seat)
+    return availability.minutes[availability.seat_free[i]]
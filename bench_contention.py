@@ -0,0 +1,87 @@
+# bench_contention.py
+# 여러 프로세스가 같은 좌석을 동시에 예약할 때 처리량을 재고, 중복 예약이 하나도 없는지 검사합니다.
+#   python bench_contention.py --workers 8 --attempts 500
+import argparse
+import datetime
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+import reservation_utils
+from reservation_utils import reserve, ReserveStatus
+
+RESTAURANT = "별빛식당"
+
+
+def _init_worker(db_path):
+    reservation_utils.use_database(db_path)
+
+
+def _worker(args):
+    """한 프로세스가 attempts번 예약을 시도하고 결과별 건수를 반환합니다."""
+    seed, attempts, users, seats = args
+    rng = random.Random(seed)
+    base = datetime.datetime.now().replace(second=0, microsecond=0) + datetime.timedelta(hours=1)
+    counts = {status: 0 for status in ReserveStatus}
+    for _ in range(attempts):
+        start = base + datetime.timedelta(minutes=rng.randrange(0, 120, 10))
+        result = reserve(
+            f"student{rng.randrange(users)}", RESTAURANT, f"0-{rng.randrange(seats)}",
+            start, start + datetime.timedelta(minutes=30)
+        )
+        counts[result.status] += 1
+    return counts
+
+
+def check_invariants():
+    """겹치는 좌석 예약 쌍과 두 건 이상 예약한 사용자 수를 반환합니다."""
+    c = reservation_utils.db.execute("""
+        SELECT COUNT(*) FROM reservations a JOIN reservations b
+          ON a.id < b.id AND a.restaurant = b.restaurant AND a.seat = b.seat
+         AND a.end_time > b.start_time AND a.start_time < b.end_time
+    """)
+    overlaps = c.fetchone()[0]
+    c = reservation_utils.db.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT user_id FROM reservations GROUP BY user_id HAVING COUNT(*) > 1
+        )
+    """)
+    return overlaps, c.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동시 예약 경합 테스트")
+    parser.add_argument("--workers", type=int, default=8, help="동시 프로세스 수")
+    parser.add_argument("--attempts", type=int, default=500, help="프로세스당 예약 시도 횟수")
+    parser.add_argument("--users", type=int, default=2000, help="학생 수")
+    parser.add_argument("--seats", type=int, default=8, help="경합할 좌석 수")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "contention.db")
+    reservation_utils.use_database(db_path)
+
+    jobs = [(seed, args.attempts, args.users, args.seats) for seed in range(args.workers)]
+    t0 = time.perf_counter()
+    with multiprocessing.Pool(args.workers, _init_worker, (db_path,)) as pool:
+        results = pool.map(_worker, jobs)
+    elapsed = time.perf_counter() - t0
+
+    totals = {status: sum(r[status] for r in results) for status in ReserveStatus}
+    attempts = sum(totals.values())
+    print(f"workers={args.workers} attempts={attempts} elapsed={elapsed:.2f}s "
+          f"throughput={attempts / elapsed:.0f} reserve/s")
+    for status, count in totals.items():
+        print(f"  {status.value:<22} {count}")
+
+    overlaps, multi = check_invariants()
+    print(f"double-booked seat pairs: {overlaps}, users with >1 reservation: {multi}")
+    reservation_utils.db.close_all()
+    if overlaps or multi:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# bench_login.py
+# 인증서 이미지 크기가 커져도 로그인 조회 시간이 일정한지 측정합니다.
+#   legacy     : 예전 get_user처럼 cert_blob까지 SELECT (이미지가 users 행 안에 있던 때)
+#   credentials: get_user_credentials (user_id, password만 읽음)
+#   python bench_login.py --sizes 0,65536,1048576,4194304 --users 200
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import reservation_utils
+
+LEGACY_QUERY = """
+    SELECT user_id, password, security_question, security_answer, cert_path, cert_blob
+    FROM users WHERE user_id = ?
+"""
+
+
+def fill(users, image_size):
+    """
+    users명을 추가합니다. 최악의 경우(마이그레이션 전 DB)를 재현하려고 이미지를 cert_blob 칼럼에 직접 넣습니다.
+    """
+    image = os.urandom(image_size) if image_size else None
+    with reservation_utils.db.transaction() as c:
+        c.executemany("""
+            INSERT INTO users (user_id, password, security_question, security_answer, cert_path, cert_blob)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(f"user{i}", "pw", "질문", "답", "cert.png", image) for i in range(users)])
+
+
+def measure(users, repeat):
+    """조회 방식별 평균 시간(마이크로초)을 반환합니다."""
+    lookups = {
+        "legacy": lambda user_id: reservation_utils.db.execute(LEGACY_QUERY, (user_id,)).fetchone(),
+        "credentials": reservation_utils.get_user_credentials,
+    }
+    result = {}
+    for name, fn in lookups.items():
+        ids = [f"user{random.randrange(users)}" for _ in range(repeat)]
+        t0 = time.perf_counter()
+        for user_id in ids:
+            fn(user_id)
+        result[name] = (time.perf_counter() - t0) / repeat * 1e6
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로그인 조회 시간 벤치마크")
+    parser.add_argument("--sizes", default="0,65536,1048576,4194304", help="이미지 크기 목록 (바이트, 쉼표로 구분)")
+    parser.add_argument("--users", type=int, default=200, help="사용자 수")
+    parser.add_argument("--repeat", type=int, default=2000, help="조회 반복 횟수")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    print(f"{'image bytes':>12} | {'legacy us':>10} | {'credentials us':>15}")
+    for size in [int(n) for n in args.sizes.split(",")]:
+        reservation_utils.use_database(os.path.join(tmp_dir, f"login_{size}.db"))
+        fill(args.users, size)
+        result = measure(args.users, args.repeat)
+        print(f"{size:>12} | {result['legacy']:>10.1f} | {result['credentials']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# bench_seat_lookup.py
+# 예약 기록이 수백만 건으로 늘어나도 좌석/사용자 조회 시간이 일정한지 측정합니다.
+#   python bench_seat_lookup.py                 # 1천 ~ 1백만 건
+#   python bench_seat_lookup.py --max 3000000   # 3백만 건까지
+# get_user_reservation은 LRU 캐시(user-019)를 거치므로 인덱스 조회(user SELECT)와
+# 캐시 적중(user cached, data_version은 USER_CACHE_CHECK_SECONDS마다 한 번 확인)을 따로 잽니다.
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+
+import reservation_utils
+
+RESTAURANTS = ["한빛식당", "별빛식당", "은하수식당"]
+SEATS = [f"{r}-{c}" for r in range(10) for c in range(10)]
+CACHED_USERS = 256  # LRU 크기(512)보다 작게 잡아 모두 적중하게 함
+
+USER_QUERY = f"""
+    SELECT {reservation_utils.RESERVATION_COLUMNS} FROM reservations WHERE user_id = ? LIMIT 1
+"""
+
+
+def fill(count, start_index):
+    """
+    과거(이미 끝난) 예약 기록을 count건 추가합니다.
+    좌석마다 30분 간격으로 이어 붙여 겹침 트리거에 걸리지 않게 합니다.
+    """
+    pairs = [(r, s) for r in RESTAURANTS for s in SEATS]
+    base = datetime.datetime.now() - datetime.timedelta(days=365)
+    base_epoch = reservation_utils.to_epoch(base)
+    rows = []
+    for i in range(start_index, start_index + count):
+        restaurant, seat = pairs[i % len(pairs)]
+        start = base_epoch + (i // len(pairs)) * 30 * 60
+        rows.append((f"hist{i}", restaurant, seat, start, start + 30 * 60))
+        if len(rows) >= 50000:
+            _insert(rows)
+            rows = []
+    if rows:
+        _insert(rows)
+
+
+def _insert(rows):
+    with reservation_utils.db.transaction() as c:
+        c.executemany("""
+            INSERT INTO reservations (user_id, restaurant, seat, start_time, end_time)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+
+
+def measure(repeat):
+    """조회 함수별 평균 시간(마이크로초)을 반환합니다."""
+    lookups = {
+        "is_seat_reserved": lambda: reservation_utils.is_seat_reserved(
+            random.choice(RESTAURANTS), random.choice(SEATS)),
+        "get_seat_reservation": lambda: reservation_utils.get_seat_reservation(
+            random.choice(RESTAURANTS), random.choice(SEATS)),
+        # 캐시를 거치지 않은 인덱스 조회 (get_user_reservation이 캐시에 없을 때 하는 일)
+        "user SELECT": lambda: reservation_utils.db.execute(
+            USER_QUERY, (f"hist{random.randrange(1000)}",)).fetchone(),
+        "user cached": lambda: reservation_utils.get_user_reservation(
+            f"hist{random.randrange(CACHED_USERS)}"),
+    }
+    for i in range(CACHED_USERS):
+        reservation_utils.get_user_reservation(f"hist{i}")  # 캐시 채우기
+    result = {}
+    for name, fn in lookups.items():
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        result[name] = (time.perf_counter() - t0) / repeat * 1e6
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="예약 조회 시간 벤치마크")
+    parser.add_argument("--max", type=int, default=1000000, help="최대 예약 건수")
+    parser.add_argument("--repeat", type=int, default=2000, help="조회 반복 횟수")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    reservation_utils.use_database(os.path.join(tmp_dir, "bench.db"))
+
+    sizes = []
+    size = 1000
+    while size <= args.max:
+        sizes.append(size)
+        size *= 10
+
+    print(f"{'rows':>10} | " + " | ".join(f"{n:>22}" for n in
+                                          ["is_seat_reserved", "get_seat_reservation",
+                                           "user SELECT", "user cached"]) + "  (us/call)")
+    filled = 0
+    for size in sizes:
+        fill(size - filled, filled)
+        filled = size
+        reservation_utils.db.execute("ANALYZE")
+        timings = measure(args.repeat)
+        print(f"{size:>10} | " + " | ".join(f"{v:>22.1f}" for v in timings.values()))
+
+    reservation_utils.db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# bench_service.py
+# 키오스크 N대가 동시에 좌석 상태를 조회하고 예약/취소할 때의 처리량을 잽니다.
+#   service: 키오스크 → 예약 서비스(TCP, localhost) → DB
+#   direct : 키오스크마다 DB 파일을 직접 열어 사용 (기존 방식)
+#   python bench_service.py --kiosks 1,4,16 --seconds 5
+import argparse
+import datetime
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import reservation_utils
+from reservation_service import create_server, ServiceClient
+from seat_layout import load_layout
+
+RESTAURANTS = ["한빛식당", "별빛식당", "은하수식당"]
+
+
+def _run_server(db_path, port_queue):
+    server = create_server("127.0.0.1", 0, db_path, archive=False)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _kiosk(args):
+    """한 키오스크가 seconds초 동안 조회/예약/취소를 반복하고 (조회 수, 쓰기 수)를 반환합니다."""
+    kiosk_id, mode, target, seconds, write_ratio = args
+    if mode == "service":
+        backend = ServiceClient(target)
+    else:
+        reservation_utils.use_database(target)
+        backend = reservation_utils.LocalBackend()
+    rng = random.Random(kiosk_id)
+    seats = {r: load_layout(r).accessible_seats for r in RESTAURANTS}
+    base = datetime.datetime.now().replace(second=0, microsecond=0) + datetime.timedelta(hours=1)
+    reads = writes = 0
+    deadline = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < deadline:
+        restaurant = rng.choice(RESTAURANTS)
+        backend.get_seat_states(restaurant)
+        reads += 1
+        if rng.random() < write_ratio:
+            user = f"kiosk{kiosk_id}-{i}"
+            start = base + datetime.timedelta(minutes=rng.randrange(0, 600, 30))
+            result = backend.reserve(user, restaurant, rng.choice(seats[restaurant]),
+                                     start, start + datetime.timedelta(minutes=30))
+            writes += 1
+            if result.ok:
+                backend.cancel_reservation(user)
+                writes += 1
+        i += 1
+    return reads, writes
+
+
+def run(mode, target, kiosks, seconds, write_ratio):
+    jobs = [(k, mode, target, seconds, write_ratio) for k in range(kiosks)]
+    t0 = time.perf_counter()
+    with multiprocessing.Pool(kiosks) as pool:
+        results = pool.map(_kiosk, jobs)
+    elapsed = time.perf_counter() - t0
+    reads = sum(r for r, _ in results)
+    writes = sum(w for _, w in results)
+    return reads / elapsed, writes / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="예약 서비스 처리량 벤치마크")
+    parser.add_argument("--kiosks", default="1,2,4,8,16", help="키오스크 수 목록 (쉼표로 구분)")
+    parser.add_argument("--seconds", type=float, default=5, help="키오스크 수별 측정 시간")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="조회 한 번당 예약 시도 확률")
+    parser.add_argument("--no-direct", action="store_true", help="직접 DB 모드 비교 생략")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    service_db = os.path.join(tmp_dir, "service.db")
+    direct_db = os.path.join(tmp_dir, "direct.db")
+    reservation_utils.use_database(direct_db)
+    reservation_utils.db.close_all()
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_run_server, args=(service_db, port_queue), daemon=True)
+    server.start()
+    url = f"tcp://127.0.0.1:{port_queue.get(timeout=30)}"
+
+    print(f"{'kiosks':>6} | {'service read/s':>15} {'write/s':>9} | {'direct read/s':>15} {'write/s':>9}")
+    for kiosks in [int(n) for n in args.kiosks.split(",")]:
+        s_reads, s_writes = run("service", url, kiosks, args.seconds, args.write_ratio)
+        line = f"{kiosks:>6} | {s_reads:>15.0f} {s_writes:>9.0f} | "
+        if args.no_direct:
+            line += f"{'-':>15} {'-':>9}"
+        else:
+            d_reads, d_writes = run("direct", direct_db, kiosks, args.seconds, args.write_ratio)
+            line += f"{d_reads:>15.0f} {d_writes:>9.0f}"
+        print(line)
+
+    stats = ServiceClient(url).call("stats")
+    lookups = stats["cache_hits"] + stats["cache_misses"]
+    print(f"service: {stats['writes']} writes in {stats['batches']} batches "
+          f"(avg {stats['writes'] / max(stats['batches'], 1):.1f}/commit), "
+          f"cache hit rate {stats['cache_hits'] / max(lookups, 1):.1%}")
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
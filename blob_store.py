@@ -0,0 +1,119 @@
+# blob_store.py
+import hashlib
+import os
+import tempfile
+
+CHUNK_SIZE = 64 * 1024  # 파일을 나눠 읽는 단위 (큰 사진도 메모리에 한 번에 올리지 않음)
+
+
+class BlobStore:
+    """
+    - 파일 내용의 SHA-256 해시를 이름으로 디스크에 저장합니다. (내용 주소 저장소)
+    - 같은 내용은 한 번만 저장되므로 여러 사용자가 같은 이미지를 올려도 파일은 하나입니다.
+    - 경로: <root>/<해시 앞 2글자>/<해시> (한 디렉터리에 파일이 너무 많아지지 않게)
+    - DB에는 해시만 저장하고, 이미지가 필요한 화면에서만 get()으로 읽습니다.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest):
+        return bool(digest) and os.path.isfile(self.path(digest))
+
+    def put_file(self, src_path, progress=None):
+        """
+        - 파일을 나눠 읽으며 해시를 계산하고 저장합니다. 해시를 반환합니다.
+        - progress(읽은 바이트, 전체 바이트)를 주면 조각마다 호출합니다.
+        """
+        total = os.path.getsize(src_path)
+        writer = self.open_writer()
+        try:
+            with open(src_path, "rb") as src:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    writer.write(chunk)
+                    if progress is not None:
+                        progress(writer.size, total)
+            return writer.commit()
+        finally:
+            writer.abort()
+
+    def open_writer(self):
+        """조각을 차례로 받아 저장하는 BlobWriter를 반환합니다. (네트워크로 나눠 받는 업로드용)"""
+        os.makedirs(self.root, exist_ok=True)
+        return BlobWriter(self)
+
+    def put_bytes(self, data):
+        """메모리에 있는 내용을 저장하고 해시를 반환합니다. (기존 BLOB 옮기기용)"""
+        digest = hashlib.sha256(data).hexdigest()
+        if self.exists(digest):
+            return digest
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        return self._commit(tmp_path, digest)
+
+    def _commit(self, tmp_path, digest):
+        dest = self.path(digest)
+        if os.path.isfile(dest):
+            os.remove(tmp_path)  # 이미 같은 내용이 있음 (중복 제거)
+            return digest
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(tmp_path, dest)
+        return digest
+
+    def get(self, digest):
+        """저장된 내용을 bytes로 반환합니다. 없으면 None."""
+        if not digest:
+            return None
+        try:
+            with open(self.path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+class BlobWriter:
+    """
+    - 같은 파일 시스템의 임시 파일(path)에 조각을 쓰며 해시를 계산합니다.
+    - commit()하면 해시 이름으로 옮기고 해시를 반환합니다. (중간에 실패해도 깨진 파일이 남지 않음)
+    - abort()는 아직 커밋하지 않았으면 임시 파일을 지웁니다. 커밋 뒤에 불러도 됩니다.
+    - commit() 전에도 path의 내용을 읽어 검사할 수 있습니다. (flush() 후)
+    """
+
+    def __init__(self, store):
+        self.store = store
+        fd, self.path = tempfile.mkstemp(dir=store.root, suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+        self._sha = hashlib.sha256()
+        self.size = 0
+        self.closed = False
+
+    def write(self, chunk):
+        self._sha.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def flush(self):
+        self._file.flush()
+
+    def commit(self):
+        self._file.close()
+        self.closed = True
+        try:
+            return self.store._commit(self.path, self._sha.hexdigest())
+        except BaseException:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            raise
+
+    def abort(self):
+        if self.closed:
+            return
+        self._file.close()
+        self.closed = True
+        if os.path.exists(self.path):
+            os.remove(self.path)
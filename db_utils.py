@@ -0,0 +1,184 @@
+# db_utils.py
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# 연결마다 한 번만 적용하는 PRAGMA 설정
+#  - WAL: 읽기와 쓰기가 서로 막지 않음 (여러 키오스크/스레드 동시 조회)
+#  - synchronous=NORMAL: WAL 모드에서는 커밋마다 fsync 하지 않아도 안전함
+#  - cache_size: 음수는 KiB 단위 (약 16MB 페이지 캐시)
+#  - mmap_size: DB 파일을 메모리 매핑해서 읽기 시스템 콜을 줄임
+DEFAULT_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -16000),
+    ("mmap_size", 64 * 1024 * 1024),
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),
+)
+
+
+class LockWaitStats:
+    """
+    - transaction(immediate=True)가 쓰기 잠금을 얻기까지 기다린 시간(BEGIN IMMEDIATE 실행 시간)을 모읍니다.
+    - 프로세스 안의 모든 스레드가 함께 씁니다. (부하 테스트에서 잠금 경합 측정용)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+    def record(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {"count": self.count, "total": self.total, "max": self.max}
+
+
+class ConnectionManager:
+    """
+    - 스레드마다 하나의 sqlite3 연결을 열어 두고 계속 재사용합니다.
+    - 프로세스가 fork 된 경우(pid 변경) 부모의 연결을 쓰지 않고 새로 엽니다.
+    - close_all() 뒤에는 세대(generation)가 바뀌어, 계속 돌던 다른 스레드도 다음 호출에서 새 연결을 엽니다.
+    - transaction() 컨텍스트로 BEGIN/COMMIT/ROLLBACK을 묶어 줍니다.
+    """
+
+    def __init__(self, path, pragmas=DEFAULT_PRAGMAS):
+        self.path = path
+        self.pragmas = pragmas
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._pid = os.getpid()
+        self._generation = 0
+        self._monitor = None
+        self._monitor_pid = None
+        self._monitor_lock = threading.Lock()
+        self._migrated = False
+        self.lock_waits = LockWaitStats()
+
+    def _open(self):
+        # isolation_level=None: 자동 BEGIN을 끄고 transaction()에서 직접 관리
+        # check_same_thread=False: 연결은 만든 스레드만 쓰지만 close_all()은 다른 스레드에서 호출됨
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        for name, value in self.pragmas:
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def connection(self):
+        """현재 스레드 전용 연결을 반환합니다. 없으면 새로 엽니다."""
+        conn = getattr(self._local, "conn", None)
+        if (conn is None or self._local.pid != os.getpid()
+                or self._local.generation != self._generation):
+            # 새 스레드, fork 직후, 또는 close_all()로 이 스레드의 연결이 닫힌 경우
+            conn = self._open()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            with self._lock:
+                self._local.generation = self._generation
+                if self._pid != os.getpid():
+                    # fork 직후: 부모의 연결은 닫지 않고 목록에서만 버림
+                    self._connections = []
+                    self._pid = os.getpid()
+                self._connections.append(conn)
+        return conn
+
+    def execute(self, sql, params=()):
+        """트랜잭션 없이 단일 조회를 실행하고 커서를 반환합니다."""
+        return self.connection().execute(sql, params)
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """
+        - with db.transaction() as c: 블록 안의 쿼리를 하나의 트랜잭션으로 실행합니다.
+        - immediate=True 이면 BEGIN IMMEDIATE로 시작해 쓰기 잠금을 먼저 잡습니다.
+          잠금을 기다린 시간은 lock_waits에 쌓입니다.
+        - 예외가 나면 ROLLBACK 후 예외를 그대로 올립니다.
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            # 이미 열린 트랜잭션 안에서 호출된 경우 바깥 트랜잭션에 합류
+            yield conn.cursor()
+            return
+        if immediate:
+            # busy_timeout 동안 다른 연결의 쓰기가 끝나기를 기다릴 수 있음 → 대기 시간 기록
+            started = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            self.lock_waits.record(time.perf_counter() - started)
+        else:
+            conn.execute("BEGIN")
+        try:
+            yield conn.cursor()
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def data_version(self):
+        """
+        - 프로세스에 하나뿐인 감시 연결에서 PRAGMA data_version을 읽습니다.
+        - 값은 연결마다 따로 세므로 스레드별 연결에서 읽은 값끼리는 비교할 수 없습니다.
+          프로세스 전체의 변경 여부는 항상 이 값으로 비교합니다.
+        - 감시 연결은 쓰지 않으므로, 다른 프로세스든 이 프로세스의 다른 스레드든 커밋이 있으면 값이 바뀝니다.
+        """
+        with self._monitor_lock:
+            if self._monitor is None or self._monitor_pid != os.getpid():
+                self._monitor = self._open()
+                self._monitor_pid = os.getpid()
+            return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+
+    def migrate(self, migrations):
+        """
+        - PRAGMA user_version을 스키마 버전으로 사용합니다.
+        - migrations는 (버전, 함수) 목록이며, 현재 버전보다 높은 것만 순서대로 실행합니다.
+        - 각 단계는 하나의 트랜잭션 안에서 실행되고 끝나면 user_version을 올립니다.
+        - 같은 매니저에서 두 번째 호출부터는 아무것도 하지 않습니다.
+        """
+        if self._migrated:
+            return
+        with self.transaction(immediate=True) as c:
+            # IMMEDIATE: 여러 프로세스가 동시에 시작해도 한 곳에서만 마이그레이션 실행
+            version = c.execute("PRAGMA user_version").fetchone()[0]
+            for target, step in migrations:
+                if target > version:
+                    step(c)
+                    c.execute(f"PRAGMA user_version={int(target)}")
+                    version = target
+        self._migrated = True
+
+    def close(self):
+        """현재 스레드의 연결을 닫습니다."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            with self._lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            conn.close()
+            self._local.conn = None
+
+    def close_all(self):
+        """이 매니저가 연 모든 연결을 닫습니다. (프로그램 종료 시)"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1  # 다른 스레드가 닫힌 연결을 계속 쓰지 않게 함
+        for conn in connections:
+            conn.close()
+        self._local.conn = None
+        with self._monitor_lock:
+            if self._monitor is not None and self._monitor_pid == os.getpid():
+                self._monitor.close()
+            self._monitor = None
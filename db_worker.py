@@ -0,0 +1,121 @@
+# db_worker.py
+import logging
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# 동시에 DB를 읽는 작업 스레드 수 (SQLite는 쓰기가 하나씩이라 많이 둘 필요 없음)
+MAX_DB_THREADS = 4
+
+log = logging.getLogger(__name__)
+
+
+class _TaskSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    progress = pyqtSignal(object, object)  # (처리한 양, 전체 양)
+
+
+class DbTask(QRunnable):
+    """
+    - fn(*args, **kwargs)을 작업 스레드에서 실행하고 결과를 GUI 스레드로 전달합니다.
+    - cancel() 이후에는 아직 시작 전이면 실행하지 않고, 이미 실행 중이면 결과를 버립니다.
+    """
+
+    def __init__(self, fn, args, kwargs):
+        super().__init__()
+        self.setAutoDelete(False)  # 파이썬 쪽에서 참조를 관리 (_pending)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+        self.done = False  # 결과(또는 오류)가 GUI 스레드에 전달됨
+        # GUI 스레드에서 만들어지므로 작업 스레드에서 emit 하면 큐를 거쳐 GUI 스레드에서 받음
+        self.signals = _TaskSignals()
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(e)
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(result)
+
+    def cancel(self):
+        if self.cancelled or self.done:
+            return
+        self.cancelled = True
+        db_pool().tryTake(self)
+        _pending.discard(self)
+
+
+_pool = None
+_pending = set()
+
+
+def db_pool():
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(MAX_DB_THREADS)
+    return _pool
+
+
+def run_async(fn, *args, on_result=None, on_error=None, on_progress=None, owner=None, **kwargs):
+    """
+    - DB 조회 함수를 GUI 스레드 밖에서 실행합니다. (느린 디스크/잠긴 DB에도 화면이 멈추지 않음)
+    - on_result(result) / on_error(exception)는 GUI 스레드에서 호출됩니다.
+    - on_progress를 주면 fn에 progress(done, total) 키워드 인자를 넘기고,
+      작업 스레드에서 부른 진행 상황을 GUI 스레드의 on_progress(done, total)로 전달합니다.
+    - owner(대화상자/창)가 닫히거나 삭제되면 작업을 취소하고 콜백을 부르지 않습니다.
+    - 반환된 DbTask의 cancel()로 직접 취소할 수도 있습니다.
+    """
+    if on_progress is not None:
+        kwargs["progress"] = lambda done, total: task.signals.progress.emit(done, total)
+    task = DbTask(fn, args, kwargs)
+
+    def release():
+        # 오래 사는 owner(메인 창 등)에 끝난 작업의 연결이 쌓이지 않도록 끊음
+        task.done = True
+        _pending.discard(task)
+        if owner is not None:
+            signals = [owner.destroyed]
+            if hasattr(owner, "finished"):
+                signals.append(owner.finished)
+            for signal in signals:
+                try:
+                    signal.disconnect(task.cancel)
+                except (TypeError, RuntimeError):
+                    pass  # 이미 끊겼거나 owner가 삭제됨
+
+    def deliver(result):
+        release()
+        if not task.cancelled and on_result is not None:
+            on_result(result)
+
+    def fail(error):
+        release()
+        if task.cancelled:
+            return
+        if on_error is not None:
+            on_error(error)
+        else:
+            log.error("DB 작업 실패: %s", error, exc_info=error)
+
+    task.signals.finished.connect(deliver)
+    task.signals.failed.connect(fail)
+    if on_progress is not None:
+        task.signals.progress.connect(
+            lambda done, total: None if task.cancelled else on_progress(done, total)
+        )
+    if owner is not None:
+        owner.destroyed.connect(task.cancel)
+        if hasattr(owner, "finished"):
+            owner.finished.connect(task.cancel)  # QDialog가 닫힐 때
+
+    _pending.add(task)
+    db_pool().start(task)
+    return task
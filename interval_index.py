@@ -0,0 +1,146 @@
+# interval_index.py
+import threading
+from bisect import bisect_left, bisect_right
+
+
+class SeatIntervals:
+    """
+    - 한 좌석의 예약 구간 [start, end)을 시작 시간 순으로 정렬해 보관합니다.
+    - 같은 좌석의 예약은 서로 겹치지 않으므로(DB 트리거가 보장) 끝 시간도 함께 정렬됩니다.
+      덕분에 겹침 검사는 이진 탐색 한 번(O(log n))으로 끝납니다.
+    - start/end는 서로 비교 가능하고 duration을 더할 수 있는 값이면 됩니다. (datetime, 정수 등)
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.keys = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def copy(self):
+        other = SeatIntervals()
+        other.starts = list(self.starts)
+        other.ends = list(self.ends)
+        other.keys = list(self.keys)
+        return other
+
+    def add(self, start, end, key):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.keys.insert(i, key)
+
+    def remove(self, start, key):
+        """start와 key가 일치하는 구간을 지웁니다. 지웠으면 True."""
+        i = bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.keys[i] == key:
+                del self.starts[i], self.ends[i], self.keys[i]
+                return True
+            i += 1
+        return False
+
+    def find_overlap(self, start, end):
+        """[start, end)와 겹치는 구간의 key를 반환합니다. 없으면 None."""
+        # start 이후에 끝나는 첫 구간만 보면 됨
+        i = bisect_right(self.ends, start)
+        if i < len(self.starts) and self.starts[i] < end:
+            return self.keys[i]
+        return None
+
+    def next_free(self, after, duration):
+        """after 이후 duration 동안 비어 있는 가장 빠른 시작 시간을 반환합니다."""
+        t = after
+        i = bisect_right(self.ends, t)
+        # 붙어 있는 예약들을 건너뜀 (O(log n + 연속된 예약 수))
+        while i < len(self.starts) and self.starts[i] < t + duration:
+            t = max(t, self.ends[i])
+            i += 1
+        return t
+
+    def free_windows(self, window_start, window_end, min_length=None):
+        """[window_start, window_end) 안의 빈 구간 목록을 (시작, 끝) 튜플로 반환합니다."""
+        windows = []
+        t = window_start
+        i = bisect_right(self.ends, window_start)
+        while t < window_end:
+            if i >= len(self.starts) or self.starts[i] >= window_end:
+                gap_end = window_end
+            else:
+                gap_end = self.starts[i]
+            if gap_end > t and (min_length is None or gap_end - t >= min_length):
+                windows.append((t, gap_end))
+            if i >= len(self.starts) or self.starts[i] >= window_end:
+                break
+            t = max(t, self.ends[i])
+            i += 1
+        return windows
+
+
+# 예약이 없는 좌석 조회용 (읽기 전용으로만 씀)
+_EMPTY = SeatIntervals()
+
+
+class ReservationIndex:
+    """
+    - (식당, 좌석)별 SeatIntervals를 메모리에 보관합니다.
+    - 식당 단위로 처음 조회할 때 loader(restaurant)로 DB에서 한 번 읽어 옵니다.
+      loader는 (seat, start, end, key) 목록을 반환해야 합니다.
+    - 예약 저장/취소 시 add()/remove()로 갱신하며, 아직 읽지 않은 식당은 건드리지 않습니다.
+    - add()/remove()는 starts/ends/keys를 차례로 고치므로, 조회도 같은 잠금 안에서 합니다.
+      (서비스의 여러 요청 스레드가 쓰는 도중의 목록을 보지 않게 함)
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self._restaurants = {}
+        self._lock = threading.Lock()
+
+    def _seat_locked(self, restaurant, seat):
+        # self._lock을 잡은 상태에서만 호출
+        seats = self._restaurants.get(restaurant)
+        if seats is None:
+            seats = {}
+            for seat_id, start, end, key in self.loader(restaurant):
+                seats.setdefault(seat_id, SeatIntervals()).add(start, end, key)
+            self._restaurants[restaurant] = seats
+        return seats.get(seat) or _EMPTY
+
+    def seat(self, restaurant, seat):
+        """좌석의 SeatIntervals 복사본을 반환합니다. (예약이 없으면 빈 객체)"""
+        with self._lock:
+            return self._seat_locked(restaurant, seat).copy()
+
+    def add(self, restaurant, seat, start, end, key):
+        with self._lock:
+            seats = self._restaurants.get(restaurant)
+            if seats is not None:
+                seats.setdefault(seat, SeatIntervals()).add(start, end, key)
+
+    def remove(self, restaurant, seat, start, key):
+        with self._lock:
+            seats = self._restaurants.get(restaurant)
+            if seats is not None and seat in seats:
+                seats[seat].remove(start, key)
+
+    def invalidate(self, restaurant=None):
+        """식당(없으면 전체)의 캐시를 버리고 다음 조회 때 DB에서 다시 읽게 합니다."""
+        with self._lock:
+            if restaurant is None:
+                self._restaurants.clear()
+            else:
+                self._restaurants.pop(restaurant, None)
+
+    def find_overlap(self, restaurant, seat, start, end):
+        with self._lock:
+            return self._seat_locked(restaurant, seat).find_overlap(start, end)
+
+    def next_free(self, restaurant, seat, after, duration):
+        with self._lock:
+            return self._seat_locked(restaurant, seat).next_free(after, duration)
+
+    def free_windows(self, restaurant, seat, window_start, window_end, min_length=None):
+        with self._lock:
+            return self._seat_locked(restaurant, seat).free_windows(window_start, window_end, min_length)
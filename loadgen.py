@@ -0,0 +1,289 @@
+# loadgen.py
+# 점심 시간(11:50~12:10)에 학생들이 한꺼번에 예약하는 상황을 화면 없이 재현하는 부하 테스트입니다.
+# 실제 예약 함수(get_seat_states, is_seat_reserved, get_seat_reservation, reserve/save_reservation,
+# cancel_reservation)를 여러 프로세스 × 스레드에서 호출하고, 작업별 지연 시간(p50/p95/p99),
+# 처리량, 쓰기 잠금 대기 시간을 JSON으로 저장합니다.
+#   python loadgen.py --students 300 --processes 4 --threads 8 --out results/today.json
+#   python loadgen.py --compare results/before.json          # 이전 결과와 비교
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import reservation_utils
+from bench_contention import check_invariants
+from reservation_utils import ReserveStatus
+from seat_layout import load_layout
+
+RESTAURANTS = ["한빛식당", "별빛식당", "은하수식당"]
+RESTAURANT_WEIGHTS = [0.5, 0.3, 0.2]  # 학생식당 쏠림
+LUNCH_START = datetime.time(11, 50)
+LUNCH_MINUTES = 20                     # 11:50 ~ 12:10 (실제 20분을 --window초로 압축)
+OPS = ["refresh", "seat_check", "seat_lookup", "book", "cancel"]
+
+
+def lunch_day():
+    """아직 지나지 않은 가장 가까운 점심 날짜 (예약 시간이 과거가 되지 않게)"""
+    now = datetime.datetime.now()
+    if now.time() < LUNCH_START:
+        return now.date()
+    return now.date() + datetime.timedelta(days=1)
+
+
+def arrival_offsets(students, window, rng):
+    """도착 시각(시작 후 초): 12:00 무렵에 몰리는 삼각 분포"""
+    return sorted(rng.triangular(0, window, window / 2) for _ in range(students))
+
+
+# ─── 학생 한 명의 예약 과정 ────────────────────────────────────────────────────────
+class Session:
+    """
+    - 학생 한 명: 좌석 새로고침 → 좌석 확인 → 예약 시도(충돌 시 다른 좌석/시간으로 재시도) → 일부는 취소
+    - 모든 호출의 지연 시간을 samples[작업]에, 결과를 outcomes에 모읍니다.
+    """
+
+    def __init__(self, student, seed, args, seats):
+        self.user_id = f"student{student}"
+        self.rng = random.Random(seed)
+        self.args = args
+        self.seats = seats
+        self.samples = {op: [] for op in OPS}
+        self.outcomes = {}
+
+    def timed(self, op, fn, *fn_args):
+        started = time.perf_counter()
+        try:
+            return fn(*fn_args)
+        finally:
+            self.samples[op].append(time.perf_counter() - started)
+
+    def count(self, outcome):
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def think(self):
+        if self.args.think:
+            time.sleep(self.rng.uniform(0, self.args.think))
+
+    def run(self):
+        rng = self.rng
+        restaurant = rng.choices(RESTAURANTS, RESTAURANT_WEIGHTS)[0]
+        seats = self.seats[restaurant]
+        states = {}
+        for _ in range(self.args.refreshes):
+            states = self.timed("refresh", reservation_utils.get_seat_states, restaurant)
+            self.think()
+
+        lunch = datetime.datetime.combine(lunch_day(), LUNCH_START)
+        for _ in range(self.args.attempts):
+            free = [s for s in seats if s not in states] or seats
+            seat = rng.choice(free)
+            self.timed("seat_check", reservation_utils.is_seat_reserved, restaurant, seat)
+            self.timed("seat_lookup", reservation_utils.get_seat_reservation, restaurant, seat)
+            start = lunch + datetime.timedelta(minutes=rng.randrange(0, 120, 10))
+            end = start + datetime.timedelta(minutes=30)
+            status = self.book(restaurant, seat, start, end)
+            self.count(status)
+            if status != ReserveStatus.SEAT_TAKEN.value:
+                break
+            states = self.timed("refresh", reservation_utils.get_seat_states, restaurant)
+
+        if self.outcomes.get("ok") and rng.random() < self.args.cancel_rate:
+            self.think()
+            self.timed("cancel", reservation_utils.cancel_reservation, self.user_id)
+            self.count("cancelled")
+        return self
+
+    def book(self, restaurant, seat, start, end):
+        if self.args.book_with == "reserve":
+            result = self.timed("book", reservation_utils.reserve, self.user_id, restaurant, seat, start, end)
+            return result.status.value
+        # 확인 없이 바로 저장하는 예전 경로: 겹치면 DB 트리거가 IntegrityError로 막음
+        try:
+            self.timed("book", reservation_utils.save_reservation, self.user_id, restaurant, seat, start, end)
+        except sqlite3.IntegrityError as e:
+            if "user_conflict" in str(e):
+                return ReserveStatus.USER_HAS_RESERVATION.value
+            return ReserveStatus.SEAT_TAKEN.value
+        return ReserveStatus.OK.value
+
+
+# ─── 프로세스 단위 실행 ────────────────────────────────────────────────────────────
+def _init_worker(db_path):
+    reservation_utils.use_database(db_path)
+    reservation_utils.db.lock_waits.reset()
+
+
+def _run_shard(job):
+    """한 프로세스가 맡은 학생들을 스레드 풀에서 도착 시각에 맞춰 실행합니다."""
+    students, start_at, args, seats = job
+
+    def run_student(item):
+        student, offset = item
+        delay = start_at + offset - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        return Session(student, args.seed * 100003 + student, args, seats).run()
+
+    samples = {op: [] for op in OPS}
+    outcomes = {}
+    with ThreadPoolExecutor(args.threads) as pool:
+        for session in pool.map(run_student, students):
+            for op, values in session.samples.items():
+                samples[op].extend(values)
+            for outcome, n in session.outcomes.items():
+                outcomes[outcome] = outcomes.get(outcome, 0) + n
+    return samples, outcomes, reservation_utils.db.lock_waits.snapshot()
+
+
+def summarize(values, elapsed):
+    if not values:
+        return {"count": 0}
+    ms = np.asarray(values) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": len(values),
+        "throughput": len(values) / elapsed,
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(ms.max()),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return None
+
+
+def run_load(args):
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "loadgen.db")
+    reservation_utils.use_database(db_path)
+
+    seats = {}
+    for restaurant in RESTAURANTS:
+        hall = load_layout(restaurant)
+        seats[restaurant] = list(hall.seats) if args.all_seats else hall.accessible_seats
+
+    rng = random.Random(args.seed)
+    arrivals = list(enumerate(arrival_offsets(args.students, args.window, rng)))
+    shards = [arrivals[i::args.processes] for i in range(args.processes)]
+    start_at = time.time() + 1.0  # 모든 프로세스가 같은 시각을 기준으로 도착
+    jobs = [(shard, start_at, args, seats) for shard in shards]
+
+    with multiprocessing.Pool(args.processes, _init_worker, (db_path,)) as pool:
+        results = pool.map(_run_shard, jobs)
+    elapsed = time.time() - start_at
+
+    samples = {op: [] for op in OPS}
+    outcomes = {}
+    lock_count = lock_total = lock_max = 0
+    for shard_samples, shard_outcomes, lock_waits in results:
+        for op, values in shard_samples.items():
+            samples[op].extend(values)
+        for outcome, n in shard_outcomes.items():
+            outcomes[outcome] = outcomes.get(outcome, 0) + n
+        lock_count += lock_waits["count"]
+        lock_total += lock_waits["total"]
+        lock_max = max(lock_max, lock_waits["max"])
+
+    all_samples = [v for values in samples.values() for v in values]
+    overlaps, multi = check_invariants()
+    reservation_utils.db.close_all()
+    return {
+        "label": args.label,
+        "revision": git_revision(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "elapsed_s": elapsed,
+        "throughput": len(all_samples) / elapsed,
+        "ops": {op: summarize(values, elapsed) for op, values in samples.items()},
+        "all": summarize(all_samples, elapsed),
+        "lock_wait": {
+            "count": lock_count,
+            "total_ms": lock_total * 1000,
+            "mean_ms": lock_total / lock_count * 1000 if lock_count else 0.0,
+            "max_ms": lock_max * 1000,
+        },
+        "outcomes": outcomes,
+        "invariants": {"double_booked_pairs": overlaps, "users_with_multiple": multi},
+    }
+
+
+# ─── 출력/비교 ─────────────────────────────────────────────────────────────────────
+def print_report(result, baseline=None):
+    print(f"{result['label'] or 'run'} @ {result['revision']}  "
+          f"elapsed={result['elapsed_s']:.1f}s  throughput={result['throughput']:.0f} ops/s")
+    print(f"{'op':<12} {'count':>7} {'ops/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    rows = list(result["ops"].items()) + [("all", result["all"])]
+    for op, s in rows:
+        if not s["count"]:
+            continue
+        line = (f"{op:<12} {s['count']:>7} {s['throughput']:>8.0f} {s['p50_ms']:>8.2f} "
+                f"{s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['max_ms']:>8.2f}")
+        base = (baseline or {}).get("ops", {}).get(op) if op != "all" else (baseline or {}).get("all")
+        if base and base.get("count"):
+            line += f"   p95 {_delta(base['p95_ms'], s['p95_ms'])}  p99 {_delta(base['p99_ms'], s['p99_ms'])}"
+        print(line)
+    lw = result["lock_wait"]
+    print(f"lock wait: {lw['count']} write txns, total {lw['total_ms']:.1f} ms, "
+          f"mean {lw['mean_ms']:.2f} ms, max {lw['max_ms']:.2f} ms")
+    print("outcomes:", ", ".join(f"{k}={v}" for k, v in sorted(result["outcomes"].items())))
+    inv = result["invariants"]
+    print(f"double-booked seat pairs: {inv['double_booked_pairs']}, "
+          f"users with >1 reservation: {inv['users_with_multiple']}")
+
+
+def _delta(before, after):
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before:+.0%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="점심 시간 예약 부하 테스트")
+    parser.add_argument("--students", type=int, default=300, help="예약하러 오는 학생 수")
+    parser.add_argument("--processes", type=int, default=4, help="키오스크 프로세스 수")
+    parser.add_argument("--threads", type=int, default=8, help="프로세스당 스레드 수")
+    parser.add_argument("--window", type=float, default=20.0, help=f"점심 {LUNCH_MINUTES}분(11:50~12:10)을 몇 초로 압축할지")
+    parser.add_argument("--refreshes", type=int, default=3, help="예약 전 좌석 새로고침 횟수")
+    parser.add_argument("--attempts", type=int, default=3, help="좌석 충돌 시 최대 시도 횟수")
+    parser.add_argument("--cancel-rate", type=float, default=0.15, help="예약 후 취소하는 비율")
+    parser.add_argument("--think", type=float, default=0.05, help="동작 사이 최대 대기(초)")
+    parser.add_argument("--book-with", choices=["reserve", "save"], default="reserve",
+                        help="reserve: 확인+저장 트랜잭션, save: save_reservation 직접 호출")
+    parser.add_argument("--all-seats", action="store_true", help="일반 좌석도 예약 대상으로 포함")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", default=None, help="사용할 DB 파일 (기본: 임시 파일)")
+    parser.add_argument("--label", default="", help="결과에 붙일 이름")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    result = run_load(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print("saved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# lru_cache.py
+import threading
+from collections import OrderedDict
+
+MISSING = object()  # 캐시에 없음 (None도 저장할 수 있는 값이므로 따로 구분)
+
+
+class LRUCache:
+    """
+    - 최대 maxsize개까지 보관하고, 넘치면 가장 오래 쓰지 않은 항목부터 버립니다.
+    - get()이 MISSING을 반환하면 호출한 쪽이 DB에서 읽어 put()으로 넣습니다.
+    - 읽는 사이 invalidate()/clear()가 있었으면 put()은 무시됩니다. (무효화 전 값이 남지 않게)
+      get() 전에 받은 generation을 put()에 넘겨 확인합니다.
+    - hits/misses: 조회 적중/실패 횟수
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
@@ -1,19 +1,20 @@
 # main.py
 import os
 import sys
-import shutil
 from restaurant_ui_relayout import RestaurantReservation
-from reservation_utils import init_db, get_user, save_user
+from reservation_utils import init_db, start_archive_job, reservation_backend, ServiceError
+from upload_pipeline import process_upload
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QStackedWidget,
     QLabel, QLineEdit, QDialog, QCheckBox, QFrame, QComboBox, QSizePolicy,
-    QGraphicsOpacityEffect, QFileDialog, QMessageBox
+    QGraphicsOpacityEffect, QFileDialog, QMessageBox, QProgressBar, QInputDialog
 )
 from PyQt5.QtGui import QPixmap, QFont, QIcon
 from PyQt5.QtCore import Qt
 from Magnifier import Magnifier
 from settings import AppSettings
 from tts import speak
+from db_worker import run_async
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 메시지박스를 항상 기본 스타일(흰배경·검정텍스트)로 띄우는 헬퍼 함수
@@ -34,9 +35,74 @@ def show_messagebox(message_type, title, text):
 
     box.setWindowModality(Qt.ApplicationModal)
     box.exec_()
+
+# 예약 서비스 모드에서 서비스가 재시작 중이거나 네트워크가 끊겼을 때 (프로그램은 계속 동작)
+def show_service_error():
+    if AppSettings.tts_enabled:
+        speak("서버에 연결할 수 없습니다")
+    show_messagebox('error', "연결 오류", "서버에 연결할 수 없습니다.\n잠시 후 다시 시도하세요.")
 # ──────────────────────────────────────────────────────────────────────────────
 
 
+class CertUpload:
+    """
+    - 첨부 이미지 하나를 작업 스레드에서 처리(검사/축소/해시 저장/썸네일)하고 진행률을 막대로 보여 줍니다.
+    - 회원가입 화면과 개인정보 화면이 함께 씁니다. 처리 중에도 입력 화면은 멈추지 않습니다.
+    - 저장은 reservation_backend()가 맡습니다. (예약 서비스 모드에서는 서비스의 저장소로 보냄)
+    - result: 끝나면 UploadResult, busy: 처리 중이면 True
+    """
+
+    def __init__(self, owner, label, progress_bar, empty_text):
+        self.owner = owner
+        self.label = label
+        self.progress_bar = progress_bar
+        self.empty_text = empty_text
+        self.task = None
+        self.result = None
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.hide()
+
+    @property
+    def busy(self):
+        return self.task is not None
+
+    def start(self, path):
+        self.cancel()
+        self.label.setText(f"{os.path.basename(path)} 처리 중...")
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.task = run_async(process_upload, path, reservation_backend().store_cert,
+                              on_result=self.finished, on_error=self.failed,
+                              on_progress=self.progressed, owner=self.owner)
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.result = None
+        self.progress_bar.hide()
+        self.label.setText(self.empty_text)
+
+    def progressed(self, done, total):
+        self.progress_bar.setValue(done)
+
+    def finished(self, result):
+        self.task = None
+        self.result = result
+        self.progress_bar.hide()
+        note = " (크기를 줄여 저장)" if result.resized else ""
+        self.label.setText(f"첨부 파일: {result.file_name}{note}")
+
+    def failed(self, error):
+        self.task = None
+        self.result = None
+        self.progress_bar.hide()
+        self.label.setText(self.empty_text)
+        if AppSettings.tts_enabled:
+            speak("첨부 파일을 처리하지 못했습니다.")
+        show_messagebox('warn', "첨부 오류", str(error))
+
+
 class ProfileDialog(QDialog):
     def __init__(self, user_id, parent=None):
         super().__init__(parent)
@@ -44,8 +110,11 @@ class ProfileDialog(QDialog):
         self.setWindowTitle("개인정보 관리")
         self.setFixedSize(400, 550)
         self.setModal(True)
-        user = get_user(user_id)
-        # user = (user_id, password, question, answer, cert_path, cert_blob)
+        # 화면에는 학번과 첨부 정보만 필요 (비밀번호/보안 답변은 읽지 않음)
+        # 서비스에 연결할 수 없으면 ServiceError가 올라감 (여는 쪽에서 안내)
+        self.backend = reservation_backend()
+        user = self.backend.get_user_profile(user_id)
+        # user = (user_id, cert_path, cert_hash)
 
         layout = QVBoxLayout()
         self.id_label = QLabel(f"학번: {user[0]}")
@@ -57,16 +126,17 @@ class ProfileDialog(QDialog):
         self.pw_input.setEchoMode(QLineEdit.Password)
         layout.addWidget(self.pw_input)
 
-        # 현재 이미지(첨부 파일) 미리보기: cert_blob이 있으면 QPixmap으로 변환
+        # 현재 이미지(첨부 파일) 미리보기: cert_hash가 있으면 저장소에서 읽어 QPixmap으로 변환
         self.image_preview = QLabel()
         self.image_preview.setFixedSize(200, 200)
         self.image_preview.setStyleSheet("border: 1px solid #ccc;")
         layout.addWidget(self.image_preview, alignment=Qt.AlignCenter)
 
-        # DB에 저장된 blob이 있으면 미리보기
-        if user and user[5]:  # cert_blob이 존재하면
+        # 저장소에 이미지가 있으면 미리보기 (이 화면을 열 때만 이미지를 읽음)
+        cert_image = self.backend.load_cert_image(user[2]) if user else None
+        if cert_image:
             pixmap = QPixmap()
-            pixmap.loadFromData(user[5])
+            pixmap.loadFromData(cert_image)
             self.image_preview.setPixmap(pixmap.scaled(
                 200, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation
             ))
@@ -78,9 +148,9 @@ class ProfileDialog(QDialog):
         self.status_label = QLabel()
         self.attach_btn = QPushButton("이미지 변경 (첨부)")
         self.attach_btn.clicked.connect(self.attach_file)
-        self.selected_file = None
+        self.upload_bar = QProgressBar()
 
-        cert_path = user[4] if user else None
+        cert_path = user[1] if user else None
         if not cert_path:
             self.status_label.setText("장애인 인증 현황: 인증 안 됨")
         else:
@@ -90,7 +160,10 @@ class ProfileDialog(QDialog):
 
         layout.addWidget(self.status_label)
         layout.addWidget(self.cert_label)
+        layout.addWidget(self.upload_bar)
         layout.addWidget(self.attach_btn)
+        # 새로 고른 이미지는 작업 스레드에서 처리 (취소하면 기존 첨부 표시로 돌아감)
+        self.upload = CertUpload(self, self.cert_label, self.upload_bar, self.cert_label.text())
 
         save_btn = QPushButton("저장")
         save_btn.clicked.connect(self.save_changes)
@@ -104,27 +177,27 @@ class ProfileDialog(QDialog):
             "Images (*.png *.jpg *.jpeg *.bmp *.gif)"
         )
         if file_name:
-            self.selected_file = file_name
-            self.cert_label.setText(os.path.basename(file_name))
+            self.upload.start(file_name)
 
     def save_changes(self):
-        user = get_user(self.user_id)
-        new_pw = self.pw_input.text() if self.pw_input.text() else user[1]
-        question = user[2]
-        answer = user[3]
-        cert_path = user[4] if user else None
-
-        # 선택된 새 파일이 있으면 uploads/ 디렉토리에 복사
-        if self.selected_file:
-            upload_dir = os.path.join(os.path.dirname(__file__), "uploads")
-            os.makedirs(upload_dir, exist_ok=True)
-            basename = f"{self.user_id}_" + os.path.basename(self.selected_file)
-            dest = os.path.join(upload_dir, basename)
-            shutil.copy2(self.selected_file, dest)
-            cert_path = dest
-
-        # save_user가 cert_blob까지 동시에 업데이트
-        save_user(self.user_id, new_pw, question, answer, cert_path)
+        try:
+            self.save_user()
+        except ServiceError:
+            show_service_error()
+
+    def save_user(self):
+        if self.upload.busy:
+            show_messagebox('info', "첨부 처리 중", "첨부 파일을 처리하는 중입니다. 잠시 후 다시 저장하세요.")
+            return
+        # 입력하지 않은 항목(None)은 그대로 둠 — 새 이미지는 이미 저장소에 들어가 있음
+        result = self.upload.result
+        saved = self.backend.update_profile(
+            self.user_id, self.pw_input.text() or None,
+            result.file_name if result else None, result.cert_hash if result else None
+        )
+        if not saved:
+            show_messagebox('warn', "오류", "존재하지 않는 학번입니다.")
+            return
         show_messagebox('info', "저장 완료", "개인정보가 저장되었습니다.")
         self.close()
 
@@ -134,7 +207,8 @@ class LoginPage(QWidget):
         super().__init__()
         self.main_window = main_window
         self.setFixedSize(1200, 800)
-        init_db()
+        if not AppSettings.service_url:
+            init_db()  # 예약 서비스 모드에서는 이 PC에 DB 파일이 없어도 됨
         self.initUI()
 
     def initUI(self):
@@ -333,8 +407,22 @@ class LoginPage(QWidget):
     def login_check(self):
         user_id = self.id_input.text()
         password = self.pw_input.text()
-        user = get_user(user_id)
-        if user and user[1] == password:
+        # DB 조회는 작업 스레드에서 실행 (DB가 잠겨 있어도 화면과 음성 안내가 멈추지 않음)
+        self.login_btn.setEnabled(False)
+        # 비밀번호 비교는 백엔드에서 (예약 서비스 모드에서도 비밀번호를 받아 오지 않음)
+        run_async(reservation_backend().check_login, user_id, password,
+                  on_result=lambda ok: self.finish_login(user_id, ok),
+                  on_error=self.login_failed, owner=self)
+
+    def login_failed(self, error):
+        self.login_btn.setEnabled(True)
+        if AppSettings.tts_enabled:
+            speak("잠시 후 다시 시도해 주세요.")
+        show_messagebox('warn', "로그인 실패", "잠시 후 다시 시도해 주세요.")
+
+    def finish_login(self, user_id, ok):
+        self.login_btn.setEnabled(True)
+        if ok:
             if AppSettings.tts_enabled:
                 speak("로그인 되셨습니다.")
             # 로그인 성공 시 입력 필드 비우기
@@ -361,7 +449,6 @@ class SignupPage(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
-        self.cert_file = None
         self.initUI()
 
     def apply_high_contrast(self):
@@ -460,8 +547,12 @@ class SignupPage(QWidget):
             "background-color: #eee; color: #333; border-radius: 12px; padding: 8px; font-size: 14px;"
         )
         self.attach_btn.clicked.connect(self.attach_file)
+        self.upload_bar = QProgressBar()
         form_layout.addWidget(self.cert_label)
+        form_layout.addWidget(self.upload_bar)
         form_layout.addWidget(self.attach_btn)
+        # 고른 이미지는 바로 작업 스레드에서 처리 → 가입하기를 누를 때는 해시만 저장
+        self.upload = CertUpload(self, self.cert_label, self.upload_bar, "장애인등록증 파일 없음")
 
         self.signup_btn = QPushButton("가입하기")
         self.signup_btn.setObjectName("signupBtn")
@@ -480,11 +571,9 @@ class SignupPage(QWidget):
             self, "장애인등록증 파일 선택", "", "Images (*.png *.jpg *.jpeg *.bmp *.gif)"
         )
         if file_name:
-            self.cert_file = file_name
-            self.cert_label.setText(os.path.basename(file_name))
+            self.upload.start(file_name)
         else:
-            self.cert_file = None
-            self.cert_label.setText("장애인등록증 파일 없음")
+            self.upload.cancel()
 
     def signup_check(self):
         new_id = self.id_input.text().strip()
@@ -499,24 +588,23 @@ class SignupPage(QWidget):
         if new_pw != pw_confirm:
             show_messagebox('warn', "회원가입 오류", "비밀번호 확인이 일치하지 않습니다.")
             return
-        if get_user(new_id):
+        if self.upload.busy:
+            show_messagebox('info', "첨부 처리 중", "첨부 파일을 처리하는 중입니다. 잠시 후 다시 시도하세요.")
+            return
+        backend = reservation_backend()
+        try:
+            # 첨부 이미지는 이미 인증서 저장소에 들어가 있으므로 해시만 저장
+            # 이미 있는 학번이면 덮어쓰지 않고 False (확인과 저장이 한 트랜잭션)
+            result = self.upload.result
+            created = backend.create_user(new_id, new_pw, question, answer,
+                                          result.file_name if result else None,
+                                          result.cert_hash if result else None)
+        except ServiceError:
+            show_service_error()
+            return
+        if not created:
             show_messagebox('warn', "회원가입 오류", "이미 존재하는 학번입니다.")
             return
-
-        cert_path = None
-        if self.cert_file:
-            upload_dir = os.path.join(os.path.dirname(__file__), "uploads")
-            os.makedirs(upload_dir, exist_ok=True)
-            basename = f"{new_id}_" + os.path.basename(self.cert_file)
-            dest = os.path.join(upload_dir, basename)
-            try:
-                shutil.copy2(self.cert_file, dest)
-                cert_path = dest
-            except Exception as e:
-                show_messagebox('warn', "첨부 오류", f"파일 복사 실패: {e}")
-                return
-
-        save_user(new_id, new_pw, question, answer, cert_path)
         show_messagebox('info', "회원가입 성공", f"{new_id}님, 회원가입이 완료되었습니다.")
 
         # 회원가입 성공 후 입력 필드 초기화
@@ -525,8 +613,7 @@ class SignupPage(QWidget):
         self.pw_confirm_input.clear()
         self.answer_input.clear()
         self.question_combo.setCurrentIndex(0)
-        self.cert_label.setText("장애인등록증 파일 없음")
-        self.cert_file = None
+        self.upload.cancel()
 
         self.main_window.navigate_to(0)
 
@@ -623,16 +710,48 @@ class PasswordFindPage(QWidget):
     def display_question(self):
         user_id = self.id_input.text()
         self.current_user_id = user_id
-        user = get_user(user_id)
-        self.question_display.setText(user[2] if user else "존재하지 않는 학번입니다.")
+        try:
+            question = reservation_backend().get_security_question(user_id)
+        except ServiceError:
+            show_service_error()
+            return
+        self.question_display.setText(question or "존재하지 않는 학번입니다.")
 
     def check_answer(self):
-        user = get_user(self.current_user_id)
-        if user and self.answer_input.text() == user[3]:
-            show_messagebox('info', "비밀번호", f"비밀번호는: {user[1]}")
-            self.main_window.navigate_to(0)
-        else:
+        # 비밀번호는 보여 주지 않고, 답변이 맞으면 새 비밀번호를 정하게 함
+        # (답변 비교는 백엔드에서 하므로 예약 서비스 모드에서도 답변/비밀번호를 받아 오지 않음)
+        backend = reservation_backend()
+        user_id = self.current_user_id
+        answer = self.answer_input.text()
+        try:
+            exists = backend.user_exists(user_id)
+            matched = exists and backend.check_security_answer(user_id, answer)
+        except ServiceError:
+            show_service_error()
+            return
+        if not exists:
+            show_messagebox('warn', "오류", "존재하지 않는 학번입니다.")
+            return
+        if not matched:
             show_messagebox('warn', "오류", "답변이 일치하지 않습니다.")
+            return
+        if AppSettings.tts_enabled:
+            speak("새 비밀번호를 입력해 주세요.")
+        new_pw, ok = QInputDialog.getText(self, "비밀번호 재설정", "새 비밀번호:", QLineEdit.Password)
+        if not ok or not new_pw:
+            return
+        try:
+            changed = backend.reset_password(user_id, answer, new_pw)
+        except ServiceError:
+            show_service_error()
+            return
+        if not changed:
+            # 답변을 확인한 뒤 계정이 삭제된 경우
+            show_messagebox('warn', "오류", "존재하지 않는 학번입니다.")
+            return
+        show_messagebox('info', "비밀번호", "비밀번호가 변경되었습니다.")
+        self.answer_input.clear()
+        self.main_window.navigate_to(0)
 
     def apply_high_contrast(self):
         self.central_widget.setStyleSheet(
@@ -735,8 +854,7 @@ class MainWindow(QWidget):
             self.signup_page.pw_confirm_input.clear()
             self.signup_page.answer_input.clear()
             self.signup_page.question_combo.setCurrentIndex(0)
-            self.signup_page.cert_label.setText("장애인등록증 파일 없음")
-            self.signup_page.cert_file = None
+            self.signup_page.upload.cancel()
 
         self.history = self.history[: self.history_index + 1]
         self.history.append(index)
@@ -757,7 +875,11 @@ class MainWindow(QWidget):
 
     def open_profile_dialog(self):
         if self.current_user_id:
-            dialog = ProfileDialog(self.current_user_id, self)
+            try:
+                dialog = ProfileDialog(self.current_user_id, self)
+            except ServiceError:
+                show_service_error()
+                return
             dialog.exec_()
 
     def logout(self):
@@ -809,7 +931,10 @@ class MainWindow(QWidget):
 
 
 if __name__ == "__main__":
-    init_db()
+    if not AppSettings.service_url:
+        # 예약 서비스 모드에서는 서비스가 DB를 준비하고 보관 작업도 실행
+        init_db()
+        start_archive_job()  # 끝난 예약을 주기적으로 월별 보관 테이블로 옮김 (서비스 모드에서는 서비스가 실행)
     AppSettings.contrast_enabled = False
     AppSettings.tts_enabled = True
     app = QApplication(sys.argv)
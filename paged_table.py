@@ -0,0 +1,107 @@
+# paged_table.py
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from db_worker import run_async
+
+PAGE_SIZE = 200  # 한 번에 읽어 오는 행 수
+
+
+class KeysetTableModel(QAbstractTableModel):
+    """
+    - 표에 보이는 만큼만 DB에서 읽어 오는 모델입니다. 스크롤이 끝에 닿으면 QTableView가
+      canFetchMore/fetchMore를 불러 다음 페이지를 작업 스레드에서 읽습니다.
+    - 페이지는 OFFSET 대신 마지막 행의 정렬 키 다음부터 읽습니다. (키셋 페이지 나누기)
+      fetch_page(after, limit)는 after(첫 페이지는 None) 다음 행을 limit개까지 반환해야 합니다.
+    - 행은 DB에서 온 튜플 그대로 보관하고, 화면에 그릴 때 display(row, column)로 글자를 만듭니다.
+      위젯이나 QTableWidgetItem을 행마다 만들지 않으므로 표가 커져도 여는 시간은 첫 페이지만큼입니다.
+    - decoration(row, column)을 주면 그 칸의 아이콘/이미지(DecorationRole)를 보이는 행에 대해서만 구합니다.
+    """
+
+    def __init__(self, headers, key_of, display, decoration=None, on_error=None,
+                 page_size=PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.key_of = key_of
+        self.display = display
+        self.decoration = decoration
+        self.on_error = on_error
+        self.page_size = page_size
+        self.fetch_page = None
+        self.rows = []
+        self.exhausted = True
+        self.task = None
+
+    # ─── 페이지 읽기 ──────────────────────────────────────────────────────────────
+    def reset(self, fetch_page):
+        """조회 조건을 바꿔 처음부터 다시 읽습니다. (검색/새로고침)"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.beginResetModel()
+        self.fetch_page = fetch_page
+        self.rows = []
+        self.exhausted = False
+        self.endResetModel()
+        self._load_next()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted and self.task is None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self._load_next()
+
+    def _load_next(self):
+        after = self.key_of(self.rows[-1]) if self.rows else None
+        fetch_page = self.fetch_page
+        self.task = run_async(fetch_page, after, self.page_size,
+                              on_result=lambda page: self._append(fetch_page, page),
+                              on_error=self._failed, owner=self)
+
+    def _append(self, fetch_page, page):
+        if fetch_page is not self.fetch_page:
+            return  # 그 사이 조건이 바뀜
+        self.task = None
+        if len(page) < self.page_size:
+            self.exhausted = True
+        if page:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+
+    def _failed(self, error):
+        self.task = None
+        self.exhausted = True
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def column_changed(self, column):
+        """칸의 내용(예: 나중에 만든 썸네일)이 바뀌었으니 그 열을 다시 그리게 합니다."""
+        if self.rows:
+            self.dataChanged.emit(self.index(0, column), self.index(len(self.rows) - 1, column))
+
+    # ─── QAbstractTableModel ──────────────────────────────────────────────────────
+    def row_at(self, row):
+        return self.rows[row] if 0 <= row < len(self.rows) else None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return self.display(row, index.column())
+        if role == Qt.DecorationRole and self.decoration is not None:
+            return self.decoration(row, index.column())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
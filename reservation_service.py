@@ -0,0 +1,682 @@
+# reservation_service.py
+# 여러 PC의 키오스크가 예약을 공유할 때 띄우는 예약 서비스입니다.
+#   python reservation_service.py --host 0.0.0.0 --port 8765 --token <공유 비밀> [--db reservations.db]
+# 키오스크는 AppSettings.service_url (또는 RESERVATION_SERVICE_URL 환경 변수)에 주소를 넣으면
+# 예약 대화상자와 로그인/회원가입/개인정보 화면이 DB 파일과 인증서 저장소 대신 이 서비스와 통신합니다.
+# (주소 예: "tcp://192.168.0.10:8765", 리뷰는 지금처럼 키오스크의 review.db에 저장)
+# 보안: 비밀번호와 보안 답변은 서비스 안에서만 비교하고 키오스크에는 결과(True/False)만 보냅니다.
+#   계정 변경(회원가입/개인정보/비밀번호 재설정)과 첨부 업로드는 --token(또는 RESERVATION_SERVICE_TOKEN)과
+#   같은 값을 보낸 요청만 받습니다. 키오스크는 AppSettings.service_token에 같은 값을 넣습니다.
+#   토큰은 평문으로 오가므로 0.0.0.0으로 열 때는 키오스크만 있는 내부망에서 쓰세요.
+# 프로토콜: TCP 연결 하나를 계속 쓰며, 요청/응답마다 JSON 한 줄
+#   요청: {"method": "get_seat_states", "params": {"restaurant": "한빛식당"}, "token": "..."}
+#   응답: {"result": ...} 또는 {"error": "..."}
+# (표준 HTTP 서버/클라이언트는 헤더 처리에만 요청당 수백 µs가 들어 한 줄 JSON을 씀)
+import argparse
+import base64
+import hmac
+import json
+import os
+import queue
+import secrets
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import reservation_utils
+from availability import Availability
+from blob_store import CHUNK_SIZE
+from upload_pipeline import MAX_UPLOAD_BYTES
+from reservation_utils import Promotion, ReserveResult, ReserveStatus, ServiceError, WEEKDAYS, to_epoch
+
+DEFAULT_PORT = 8765
+BATCH_SIZE = 64        # 트랜잭션 하나로 묶는 최대 쓰기 수
+WORKER_THREADS = 64    # 동시에 처리하는 클라이언트 연결 수
+IDLE_TIMEOUT = 30      # 초. 요청이 없는 연결은 닫음 (클라이언트가 다시 연결)
+EXTERNAL_CHECK_SECONDS = 0.1  # 다른 프로세스의 변경을 확인하는 간격 (조회 경로가 아니라 감시 스레드에서)
+UPLOAD_CHUNK_SIZE = 4 * CHUNK_SIZE  # 첨부 파일을 나눠 보내는 단위 (요청 한 줄의 크기를 제한)
+UPLOAD_TIMEOUT = 300   # 초. 이 시간 동안 조각이 오지 않은 업로드는 버림
+MAX_UPLOADS = 16       # 동시에 진행할 수 있는 업로드 수
+
+# 공유 비밀(token)이 맞아야 처리하는 요청 (계정 변경과 인증서 저장소 쓰기)
+PROTECTED_METHODS = frozenset({
+    "create_user", "update_profile", "reset_password",
+    "begin_cert_upload", "upload_cert_chunk", "finish_cert_upload", "abort_cert_upload",
+})
+
+
+# ─── 서비스 본체 ──────────────────────────────────────────────────────────────────
+class _PendingWrite:
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class ReservationService:
+    """
+    - reservation_utils를 감싸 여러 키오스크의 요청을 한 프로세스에서 처리합니다.
+    - 쓰기(예약/취소)는 쓰기 스레드 하나가 큐에서 모아 BEGIN IMMEDIATE 트랜잭션 하나로 커밋합니다.
+      요청마다 잠금/커밋(fsync)을 반복하지 않으므로 키오스크가 많아도 잠금 대기가 쌓이지 않습니다.
+    - 좌석 상태/예약 가능 시간은 캐시해 두고, 변경이 생기거나 다음 예약 시작/종료 시각이 되면 버립니다.
+      다른 프로세스(관리자 프로그램 등)의 변경은 감시 스레드가 EXTERNAL_CHECK_SECONDS마다
+      PRAGMA data_version으로 확인해 알아챕니다. (캐시 적중은 잠금 없이 dict 조회만 함)
+    - version: 캐시를 버릴 때마다 1씩 늘어나는 변경 번호 (키오스크의 변경 감시용)
+    - token: PROTECTED_METHODS에 필요한 공유 비밀. None이면 그 요청은 모두 거절합니다.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, token=None):
+        self.batch_size = batch_size
+        self.token = token
+        self.version = 0
+        self.stats = {"batches": 0, "writes": 0, "cache_hits": 0, "cache_misses": 0}
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._uploads = {}  # 업로드 id → [BlobWriter, 마지막 조각을 받은 시각]
+        self._uploads_lock = threading.Lock()
+        # 다른 연결의 커밋을 알아채기 위한 전용 연결 (읽기만 함, _monitor_lock 안에서만 사용)
+        self._monitor = sqlite3.connect(reservation_utils.DB_FILE, check_same_thread=False)
+        self._monitor_lock = threading.Lock()
+        self._data_version = self._monitor.execute("PRAGMA data_version").fetchone()[0]
+        self._writes = queue.Queue()
+        reservation_utils.subscribe(self._on_change)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        self._watcher = threading.Thread(target=self._watch_loop, daemon=True)
+        self._watcher.start()
+
+    # ─── 캐시 ─────────────────────────────────────────────────────────────────────
+    def _invalidate(self):
+        with self._lock:
+            self._invalidate_locked()
+
+    def _invalidate_locked(self):
+        self._cache.clear()
+        self.version += 1
+        reservation_utils.reservation_index.invalidate()
+        reservation_utils.user_cache.clear()
+
+    def _read_data_version(self):
+        """감시 연결의 data_version이 마지막으로 본 값과 다르면 기록하고 True를 반환합니다."""
+        with self._monitor_lock:
+            version = self._monitor.execute("PRAGMA data_version").fetchone()[0]
+            changed = version != self._data_version
+            self._data_version = version
+            return changed
+
+    def _watch_loop(self):
+        while True:
+            time.sleep(EXTERNAL_CHECK_SECONDS)
+            try:
+                changed = self._read_data_version()
+            except sqlite3.Error:
+                continue  # DB가 잠시 잠긴 경우 다음 확인 때 다시
+            if changed:
+                self._invalidate()
+
+    def _on_change(self, restaurant):
+        # 보관 작업 등 이 프로세스 안의 변경 (예약/취소는 커밋 후 한 번 더 버림)
+        self._invalidate()
+
+    def _cached(self, key, compute):
+        """
+        - compute()는 (값, 만료 epoch 초 또는 None)을 반환합니다.
+        - 계산하는 동안 캐시가 버려졌으면 결과를 저장하지 않습니다. (커밋 전 데이터가 남지 않게)
+        - 적중하면 잠금을 잡지 않습니다. (dict.get은 원자적, 캐시를 버릴 때는 clear()로 통째로 비움)
+        """
+        entry = self._cache.get(key)
+        if entry is not None and (entry[1] is None or time.time() < entry[1]):
+            self.stats["cache_hits"] += 1  # 통계용이라 스레드 사이에 몇 번 빠져도 됨
+            return entry[0]
+        with self._lock:
+            self.stats["cache_misses"] += 1
+            generation = self.version
+        value, expires = compute()
+        with self._lock:
+            if generation == self.version:
+                self._cache[key] = (value, expires)
+        return value
+
+    # ─── 쓰기 묶음 처리 ──────────────────────────────────────────────────────────────
+    def _write(self, fn, *args):
+        write = _PendingWrite(fn, args)
+        self._writes.put(write)
+        return write.wait()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        # 쓰기 함수의 부수 효과는 모두 이 트랜잭션 안의 DB 변경이어야 함
+        # (대기 명단도 waitlist 테이블이라 묶음이 취소되면 함께 되돌아감, 메모리 캐시는 아래에서 버림)
+        try:
+            with reservation_utils.db.transaction(immediate=True) as c:
+                for write in batch:
+                    # 쓰기 하나가 실패해도 같은 묶음의 다른 쓰기는 커밋되도록 SAVEPOINT로 나눔
+                    c.execute("SAVEPOINT batch_write")
+                    try:
+                        write.result = write.fn(*write.args)
+                    except Exception as e:
+                        c.execute("ROLLBACK TO batch_write")
+                        write.error = e
+                    c.execute("RELEASE batch_write")
+        except Exception as e:
+            # 커밋 실패: 묶음 전체가 취소됨
+            for write in batch:
+                write.result = None
+                write.error = e
+        # 이 묶음의 커밋은 감시 스레드가 다른 프로세스의 변경으로 보지 않도록 먼저 기록해 둠
+        # (기록한 값에 섞인 다른 프로세스의 커밋도 바로 아래에서 함께 버려짐)
+        try:
+            self._read_data_version()
+        except sqlite3.Error:
+            pass
+        # 커밋 전에 채워졌을 수 있는 캐시와 메모리 인덱스를 버림
+        self._invalidate()
+        self.stats["batches"] += 1
+        self.stats["writes"] += len(batch)
+        for write in batch:
+            write.done.set()
+
+    # ─── 요청 처리 ──────────────────────────────────────────────────────────────────
+    def call(self, method, params, token=None):
+        handler = getattr(self, "rpc_" + method, None)
+        if handler is None:
+            raise ValueError(f"알 수 없는 요청: {method}")
+        if method in PROTECTED_METHODS:
+            if self.token is None:
+                raise PermissionError("서비스에 토큰이 설정되지 않아 계정 변경과 첨부 업로드를 받지 않습니다.")
+            if not isinstance(token, str) or not hmac.compare_digest(
+                    token.encode("utf-8"), self.token.encode("utf-8")):
+                raise PermissionError("토큰이 맞지 않습니다.")
+        return handler(**params)
+
+    def rpc_version(self):
+        return self.version
+
+    def rpc_stats(self):
+        return dict(self.stats, version=self.version, user_cache=reservation_utils.user_cache.stats())
+
+    def _seat_states(self, restaurant):
+        # 다음 예약 시작/종료 시각이 되면 색이 바뀌므로 그때 만료
+        def compute():
+            next_change = reservation_utils.next_seat_state_change(restaurant)
+            return (reservation_utils.get_seat_board(restaurant), next_change), next_change
+        return self._cached(("states", restaurant), compute)
+
+    def rpc_get_seat_states(self, restaurant):
+        return reservation_utils.apply_holds(*self._seat_states(restaurant)[0])
+
+    def rpc_get_seat_board(self, restaurant):
+        return list(self._seat_states(restaurant)[0])
+
+    def rpc_next_seat_state_change(self, restaurant):
+        return self._seat_states(restaurant)[1]
+
+    def rpc_get_day_availability(self, restaurant, seats, duration=30, step=5):
+        # 오늘은 지금 이후 시간만 포함하므로 분이 바뀌면 만료
+        def compute():
+            av = reservation_utils.get_day_availability(restaurant, seats, duration=duration, step=step)
+            value = {
+                "minutes": av.minutes.tolist(),
+                "free_counts": av.free_counts.tolist(),
+                "seat_free": av.seat_free.astype(np.uint8).tolist(),
+            }
+            return value, (int(time.time()) // 60 + 1) * 60
+        return self._cached(("availability", restaurant, tuple(seats), duration, step), compute)
+
+    def rpc_get_user_reservation(self, user_id):
+        row = reservation_utils.get_user_reservation(user_id)
+        return list(row) if row else None
+
+    def rpc_has_existing_reservation(self, user_id):
+        return reservation_utils.has_existing_reservation(user_id)
+
+    def rpc_find_overlap(self, restaurant, seat, start, end):
+        return reservation_utils.reservation_index.find_overlap(restaurant, seat, start, end)
+
+    def rpc_next_free(self, restaurant, seat, after, duration):
+        return reservation_utils.reservation_index.next_free(restaurant, seat, after, duration)
+
+    @staticmethod
+    def _reserve_result(result):
+        return {
+            "status": result.status.value,
+            "reservation_id": result.reservation_id,
+            "conflict": list(result.conflict) if result.conflict else None,
+        }
+
+    def rpc_reserve(self, user_id, restaurant, seat, start, end):
+        result = self._write(reservation_utils.reserve, user_id, restaurant, seat, start, end)
+        return self._reserve_result(result)
+
+    def rpc_cancel_reservation(self, user_id):
+        promotions = self._write(reservation_utils.cancel_reservation, user_id)
+        return [list(p) for p in promotions]
+
+    def rpc_join_waitlist(self, user_id, restaurant, start, end):
+        return self._write(reservation_utils.join_waitlist, user_id, restaurant, start, end)
+
+    def rpc_leave_waitlist(self, user_id):
+        return self._write(reservation_utils.leave_waitlist, user_id)
+
+    def rpc_add_recurring_rule(self, user_id, restaurant, seat, start_minute, end_minute, weekdays):
+        result = self._write(reservation_utils.add_recurring_rule, user_id, restaurant, seat,
+                             start_minute, end_minute, weekdays)
+        return self._reserve_result(result)
+
+    def rpc_hold_seat(self, user_id, restaurant, seat):
+        return self._write(reservation_utils.hold_seat, user_id, restaurant, seat)
+
+    def rpc_release_hold(self, user_id):
+        return self._write(reservation_utils.release_hold, user_id)
+
+    def rpc_get_user_rule(self, user_id):
+        row = reservation_utils.get_user_rule(user_id)
+        return list(row) if row else None
+
+    def rpc_cancel_recurring_rule(self, user_id):
+        return self._write(reservation_utils.cancel_recurring_rule, user_id)
+
+    # ─── 사용자/인증서 (키오스크에 DB 파일과 저장소가 없어도 되도록) ─────────────────────
+    # 비밀번호와 보안 답변은 여기서 비교만 하고 돌려주지 않음
+    def rpc_check_login(self, user_id, password):
+        return reservation_utils.check_login(user_id, password)
+
+    def rpc_user_exists(self, user_id):
+        return reservation_utils.user_exists(user_id)
+
+    def rpc_get_security_question(self, user_id):
+        return reservation_utils.get_security_question(user_id)
+
+    def rpc_check_security_answer(self, user_id, answer):
+        return reservation_utils.check_security_answer(user_id, answer)
+
+    def rpc_get_user_profile(self, user_id):
+        row = reservation_utils.get_user_profile(user_id)
+        return list(row) if row else None
+
+    def rpc_reset_password(self, user_id, answer, new_password):
+        return self._write(reservation_utils.reset_password, user_id, answer, new_password)
+
+    def rpc_create_user(self, user_id, password, question, answer, cert_path=None, cert_hash=None):
+        # 첨부 파일은 키오스크가 store_cert로 먼저 올리므로 여기서는 행만 저장
+        return self._write(reservation_utils.create_user, user_id, password, question, answer,
+                           cert_path, cert_hash)
+
+    def rpc_update_profile(self, user_id, password=None, cert_path=None, cert_hash=None):
+        return self._write(reservation_utils.update_profile, user_id, password, cert_path, cert_hash)
+
+    # 첨부 파일은 UPLOAD_CHUNK_SIZE씩 나눠 받아 임시 파일에 바로 씀 (메모리에 파일 전체를 두지 않음)
+    def rpc_begin_cert_upload(self):
+        now = time.time()
+        with self._uploads_lock:
+            for upload_id, (writer, touched) in list(self._uploads.items()):
+                if now - touched > UPLOAD_TIMEOUT:
+                    del self._uploads[upload_id]
+                    writer.abort()  # 키오스크가 업로드 도중 끊긴 경우
+            if len(self._uploads) >= MAX_UPLOADS:
+                raise ValueError("진행 중인 업로드가 너무 많습니다.")
+            upload_id = secrets.token_hex(16)
+            self._uploads[upload_id] = [reservation_utils.cert_store.open_writer(), now]
+        return upload_id
+
+    def _upload(self, upload_id):
+        with self._uploads_lock:
+            upload = self._uploads.get(upload_id)
+        if upload is None:
+            raise ValueError("알 수 없거나 만료된 업로드입니다.")
+        upload[1] = time.time()
+        return upload[0]
+
+    def _end_upload(self, upload_id):
+        with self._uploads_lock:
+            upload = self._uploads.pop(upload_id, None)
+        if upload is None:
+            raise ValueError("알 수 없거나 만료된 업로드입니다.")
+        return upload[0]
+
+    def rpc_upload_cert_chunk(self, upload_id, data):
+        writer = self._upload(upload_id)
+        chunk = base64.b64decode(data)
+        if writer.size + len(chunk) > MAX_UPLOAD_BYTES:
+            self._end_upload(upload_id).abort()
+            raise ValueError("첨부 파일이 너무 큽니다.")
+        writer.write(chunk)
+        return writer.size
+
+    def rpc_finish_cert_upload(self, upload_id):
+        return reservation_utils.store_cert_upload(self._end_upload(upload_id))
+
+    def rpc_abort_cert_upload(self, upload_id):
+        with self._uploads_lock:
+            upload = self._uploads.pop(upload_id, None)
+        if upload is not None:
+            upload[0].abort()
+
+    def rpc_load_cert_image(self, cert_hash):
+        data = reservation_utils.load_cert_image(cert_hash)
+        return base64.b64encode(data).decode("ascii") if data else None
+
+
+# ─── 서버 ─────────────────────────────────────────────────────────────────────
+class _RequestHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True  # 작은 응답을 모아 보내려고 기다리지 않음
+    timeout = IDLE_TIMEOUT
+
+    def handle(self):
+        while True:
+            try:
+                line = self.rfile.readline()
+            except (socket.timeout, ConnectionError):
+                return
+            if not line:
+                return  # 클라이언트가 연결을 닫음
+            try:
+                request = json.loads(line)
+                reply = {"result": self.server.service.call(request["method"], request.get("params", {}),
+                                                            request.get("token"))}
+            except Exception as e:
+                reply = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class ServiceServer(socketserver.TCPServer):
+    """
+    - 연결마다 스레드를 만들지 않고 고정된 스레드 풀에서 처리합니다.
+    - 풀의 스레드가 계속 살아 있으므로 스레드별 DB 연결도 계속 재사용됩니다.
+    - 열린 연결은 풀의 스레드를 하나씩 붙잡고 있으므로 shutdown()/server_close()에서 모두 끊습니다.
+      (그러지 않으면 IDLE_TIMEOUT까지 스레드가 남아 인터프리터 종료가 멈춤)
+    """
+    allow_reuse_address = True
+
+    def __init__(self, address, service, workers=WORKER_THREADS):
+        super().__init__(address, _RequestHandler)
+        self.service = service
+        self.pool = ThreadPoolExecutor(workers)
+        self._open_requests = set()
+        self._requests_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._requests_lock:
+            self._open_requests.add(request)
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._requests_lock:
+                self._open_requests.discard(request)
+            self.shutdown_request(request)
+
+    def shutdown(self):
+        super().shutdown()
+        self._close_requests()
+
+    def server_close(self):
+        super().server_close()
+        self._close_requests()
+
+    def _close_requests(self):
+        with self._requests_lock:
+            requests, self._open_requests = list(self._open_requests), set()
+        for request in requests:
+            # 읽기에서 기다리던 처리 스레드가 빈 줄을 받고 바로 끝남
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def create_server(host="127.0.0.1", port=DEFAULT_PORT, db_path=None, archive=True, token=None):
+    """
+    - DB를 준비하고 서비스를 만든 뒤 아직 시작하지 않은 서버를 반환합니다. (serve_forever()로 시작)
+    - port=0이면 빈 포트를 고릅니다. (server.server_address로 확인)
+    - token: 계정 변경/첨부 업로드에 필요한 공유 비밀 (없으면 그 요청은 거절)
+    """
+    if db_path:
+        reservation_utils.use_database(db_path)
+    else:
+        reservation_utils.init_db()
+    if archive:
+        reservation_utils.start_archive_job()
+    return ServiceServer((host, port), ReservationService(token=token))
+
+
+# ─── 키오스크용 클라이언트 ─────────────────────────────────────────────────────────
+class ServiceClient:
+    """
+    - 예약 서비스와 통신하는 백엔드입니다. reservation_utils.LocalBackend와 같은 메서드를 제공합니다.
+    - 스레드마다 TCP 연결 하나를 열어 두고 재사용합니다.
+    - token을 주면 모든 요청에 함께 보냅니다. (서비스의 --token과 같은 값, 계정 변경/첨부 업로드에 필요)
+    """
+
+    def __init__(self, url, timeout=10, token=None):
+        parsed = urllib.parse.urlsplit(url if "//" in url else "tcp://" + url)
+        self.url = url
+        self.host = parsed.hostname
+        self.port = parsed.port or DEFAULT_PORT
+        self.timeout = timeout
+        self.token = token
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+            self._local.conn = None
+
+    def call(self, method, **params):
+        request = {"method": method, "params": params}
+        if self.token is not None:
+            request["token"] = self.token
+        line = json.dumps(request).encode("utf-8") + b"\n"
+        for attempt in range(2):
+            try:
+                sock, reader = self._connection()
+                sock.sendall(line)
+                reply = reader.readline()
+            except socket.timeout as e:
+                self._close()
+                raise ServiceError(f"예약 서비스 응답이 없습니다: {e}") from e
+            except OSError as e:
+                self._close()
+                raise ServiceError(f"예약 서비스에 연결할 수 없습니다: {e}") from e
+            if reply:
+                break
+            # 서비스가 쉬던 연결을 닫은 경우 (요청은 처리되지 않음): 새로 연결해 한 번만 재시도
+            self._close()
+            if attempt:
+                raise ServiceError("예약 서비스 연결이 끊어졌습니다.")
+        data = json.loads(reply)
+        if "error" in data:
+            raise ServiceError(data["error"])
+        return data["result"]
+
+    def get_user_reservation(self, user_id):
+        row = self.call("get_user_reservation", user_id=user_id)
+        return tuple(row) if row else None
+
+    def has_existing_reservation(self, user_id):
+        return self.call("has_existing_reservation", user_id=user_id)
+
+    def get_seat_states(self, restaurant):
+        return self.call("get_seat_states", restaurant=restaurant)
+
+    def get_seat_board(self, restaurant):
+        states, holders = self.call("get_seat_board", restaurant=restaurant)
+        return states, holders
+
+    def next_seat_state_change(self, restaurant):
+        return self.call("next_seat_state_change", restaurant=restaurant)
+
+    def find_overlap(self, restaurant, seat, start, end):
+        return self.call("find_overlap", restaurant=restaurant, seat=seat, start=start, end=end)
+
+    def next_free(self, restaurant, seat, after, duration):
+        return self.call("next_free", restaurant=restaurant, seat=seat, after=after, duration=duration)
+
+    def invalidate(self, restaurant=None):
+        pass  # 서비스가 모든 쓰기를 처리하므로 캐시를 직접 맞춤
+
+    def get_day_availability(self, restaurant, seats, duration=30, step=5):
+        seats = list(seats)
+        data = self.call("get_day_availability", restaurant=restaurant, seats=seats,
+                         duration=duration, step=step)
+        minutes = np.array(data["minutes"], dtype=np.int64)
+        seat_free = np.array(data["seat_free"], dtype=bool).reshape(len(seats), len(minutes))
+        return Availability(minutes, np.array(data["free_counts"], dtype=np.int64), seat_free, seats)
+
+    def reserve(self, user_id, restaurant, seat, start_time, end_time):
+        data = self.call("reserve", user_id=user_id, restaurant=restaurant, seat=seat,
+                         start=to_epoch(start_time), end=to_epoch(end_time))
+        conflict = tuple(data["conflict"]) if data["conflict"] else None
+        return ReserveResult(ReserveStatus(data["status"]), data["reservation_id"], conflict)
+
+    def cancel_reservation(self, user_id):
+        promotions = self.call("cancel_reservation", user_id=user_id)
+        return [Promotion(*p) for p in promotions]
+
+    def join_waitlist(self, user_id, restaurant, start_time, end_time):
+        return self.call("join_waitlist", user_id=user_id, restaurant=restaurant,
+                         start=to_epoch(start_time), end=to_epoch(end_time))
+
+    def leave_waitlist(self, user_id):
+        return self.call("leave_waitlist", user_id=user_id)
+
+    def add_recurring_rule(self, user_id, restaurant, seat, start_minute, end_minute, weekdays=WEEKDAYS):
+        data = self.call("add_recurring_rule", user_id=user_id, restaurant=restaurant, seat=seat,
+                         start_minute=start_minute, end_minute=end_minute, weekdays=weekdays)
+        conflict = tuple(data["conflict"]) if data["conflict"] else None
+        return ReserveResult(ReserveStatus(data["status"]), data["reservation_id"], conflict)
+
+    def hold_seat(self, user_id, restaurant, seat):
+        return self.call("hold_seat", user_id=user_id, restaurant=restaurant, seat=seat)
+
+    def release_hold(self, user_id):
+        return self.call("release_hold", user_id=user_id)
+
+    def get_user_rule(self, user_id):
+        row = self.call("get_user_rule", user_id=user_id)
+        return tuple(row) if row else None
+
+    def cancel_recurring_rule(self, user_id):
+        return self.call("cancel_recurring_rule", user_id=user_id)
+
+    def data_version(self):
+        return self.call("version")
+
+    def check_login(self, user_id, password):
+        return self.call("check_login", user_id=user_id, password=password)
+
+    def user_exists(self, user_id):
+        return self.call("user_exists", user_id=user_id)
+
+    def get_security_question(self, user_id):
+        return self.call("get_security_question", user_id=user_id)
+
+    def check_security_answer(self, user_id, answer):
+        return self.call("check_security_answer", user_id=user_id, answer=answer)
+
+    def reset_password(self, user_id, answer, new_password):
+        return self.call("reset_password", user_id=user_id, answer=answer, new_password=new_password)
+
+    def create_user(self, user_id, password, question, answer, cert_path=None, cert_hash=None):
+        return self.call("create_user", user_id=user_id, password=password, question=question,
+                         answer=answer, cert_path=cert_path, cert_hash=cert_hash)
+
+    def update_profile(self, user_id, password=None, cert_path=None, cert_hash=None):
+        return self.call("update_profile", user_id=user_id, password=password,
+                         cert_path=cert_path, cert_hash=cert_hash)
+
+    def get_user_profile(self, user_id):
+        row = self.call("get_user_profile", user_id=user_id)
+        return tuple(row) if row else None
+
+    def load_cert_image(self, cert_hash):
+        data = self.call("load_cert_image", cert_hash=cert_hash) if cert_hash else None
+        return base64.b64decode(data) if data else None
+
+    def store_cert(self, path, progress=None):
+        """
+        - 첨부 파일을 UPLOAD_CHUNK_SIZE씩 읽어 조각마다 서비스에 보내고 progress(보낸 바이트, 전체 바이트)를 알립니다.
+        - 서비스가 저장소에 넣고 썸네일을 만든 뒤 해시를 돌려줍니다. 이미지가 아니면 None.
+        - 도중에 실패하면 서비스 쪽 임시 파일을 버리도록 알리고 예외를 그대로 올립니다.
+        """
+        total = os.path.getsize(path)
+        upload_id = self.call("begin_cert_upload")
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+                    done = self.call("upload_cert_chunk", upload_id=upload_id,
+                                     data=base64.b64encode(chunk).decode("ascii"))
+                    if progress is not None:
+                        progress(done, total)
+            return self.call("finish_cert_upload", upload_id=upload_id)
+        except BaseException:
+            try:
+                self.call("abort_cert_upload", upload_id=upload_id)
+            except ServiceError:
+                pass  # 연결이 끊긴 경우 서비스가 UPLOAD_TIMEOUT 뒤에 버림
+            raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description="예약 서비스")
+    parser.add_argument("--host", default="127.0.0.1", help="다른 PC에서 접속하려면 0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", default=None, help="DB 파일 (기본: reservations.db)")
+    parser.add_argument("--token", default=os.environ.get("RESERVATION_SERVICE_TOKEN"),
+                        help="계정 변경/첨부 업로드에 필요한 공유 비밀 (기본: RESERVATION_SERVICE_TOKEN)")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.db, token=args.token)
+    host, port = server.server_address[:2]
+    print(f"예약 서비스 시작: tcp://{host}:{port}")
+    if not args.token:
+        print("토큰이 없어 회원가입/개인정보 변경/첨부 업로드 요청은 거절합니다. (--token)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
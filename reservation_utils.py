@@ -1,28 +1,78 @@
 # reservation_utils.py
 
-import sqlite3
+import hmac
+import logging
 import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from enum import Enum
 from PyQt5.QtGui import QPixmap, QIcon
 from PyQt5.QtWidgets import (
-    QDialog, QPushButton, QVBoxLayout, QLabel, QGridLayout, QTimeEdit,
-    QDialogButtonBox, QMessageBox, QWidget, QHBoxLayout, QScrollArea
+    QDialog, QPushButton, QVBoxLayout, QLabel, QGridLayout, QComboBox,
+    QDialogButtonBox, QMessageBox, QWidget, QHBoxLayout, QScrollArea, QCheckBox
 )
-from PyQt5.QtCore import QTimer, QTime, Qt, QSize
+from PyQt5.QtCore import QTimer, Qt, QSize, QObject, pyqtSignal
 import datetime
 from settings import AppSettings
+from db_utils import ConnectionManager
+from interval_index import ReservationIndex
+from lru_cache import LRUCache, MISSING
+from blob_store import BlobStore
+from thumbnails import scaled_image, save_thumbnail, THUMB_SIZE
+from waitlist import slot_of, SLOT_SECONDS, PRIORITY_NORMAL
+from availability import occupancy_bitmap, feasible_starts, seat_slots
+from seat_layout import load_layout, ACCESSIBLE_SEAT, GENERAL_SEAT, AISLE, PILLAR, BLANK, ENTRANCE
+from seat_map_view import SeatMapView
 from tts import speak
 from functools import partial
 
 DB_FILE = "reservations.db"
+# 장애인등록증 이미지 저장소 (users 행에는 해시만 저장)
+CERT_STORE_DIR = "cert_store"
 
-def init_db():
+# 좌석 수가 이보다 많으면 버튼 격자 대신 SeatMapView로 그림
+SEAT_MAP_THRESHOLD = 200
+# 예약 서비스에 연결할 수 없을 때 좌석 색을 다시 읽어 보는 간격 (밀리초)
+SERVICE_RETRY_MS = 5000
+
+db = ConnectionManager(DB_FILE)
+cert_store = BlobStore(CERT_STORE_DIR)
+log = logging.getLogger(__name__)
+
+# 모든 조회는 인덱스에 포함된 컬럼만 읽습니다. (id는 rowid라 인덱스에 항상 포함)
+RESERVATION_COLUMNS = "id, user_id, restaurant, seat, start_time, end_time"
+
+# ─── 시간 값 변환 ─────────────────────────────────────────────────────────────────────
+# 예약 시간은 epoch 초(INTEGER)로 저장합니다. 예전 ISO 문자열 값도 읽을 수 있게 둘 다 받습니다.
+def to_epoch(value):
+    """datetime, ISO 문자열, epoch 초 중 무엇이든 epoch 초(int)로 바꿉니다."""
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+def to_datetime(value):
+    """epoch 초 또는 ISO 문자열을 datetime으로 바꿉니다."""
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    return datetime.datetime.fromtimestamp(value)
+
+def format_time(value, fmt="%Y-%m-%d %H:%M"):
+    """예약 시간 값을 화면 표시용 문자열로 바꿉니다. (관리자 화면 등)"""
+    dt = to_datetime(value)
+    return dt.strftime(fmt) if dt else ""
+
+# ─── 스키마 마이그레이션 (PRAGMA user_version 기준) ──────────────────────────────────
+def _migrate_base_tables(c):
     """
     - reservations 테이블과 users 테이블을 초기화합니다.
     - users 테이블에 cert_path(TEXT) 및 cert_blob(BLOB) 컬럼이 없다면 ALTER TABLE로 추가합니다.
     """
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-
     # ─── reservations 테이블 생성 ─────────────────────────────────────────────────
     c.execute("""
     CREATE TABLE IF NOT EXISTS reservations (
@@ -55,65 +105,1078 @@ def init_db():
     if "cert_blob" not in existing_columns:
         c.execute("ALTER TABLE users ADD COLUMN cert_blob BLOB")
 
-    conn.commit()
-    conn.close()
+def _migrate_reservation_indexes(c):
+    """
+    - 사용자별 조회(has_existing_reservation, get_user_reservation, cancel_reservation)와
+      좌석별 조회(get_seat_reservation, is_seat_reserved)가 테이블을 읽지 않고
+      인덱스만으로 끝나도록 필요한 컬럼을 모두 담은 커버링 인덱스를 만듭니다.
+    """
+    c.execute("""
+    CREATE INDEX IF NOT EXISTS idx_reservations_user
+        ON reservations (user_id, restaurant, seat, start_time, end_time)
+    """)
+    c.execute("""
+    CREATE INDEX IF NOT EXISTS idx_reservations_seat
+        ON reservations (restaurant, seat, end_time, start_time, user_id)
+    """)
+
+def _migrate_restaurant_status_index(c):
+    """
+    - get_seat_states()가 식당의 '아직 끝나지 않은' 예약만 범위 검색하도록
+      (restaurant, end_time) 순서의 커버링 인덱스를 만듭니다.
+    """
+    c.execute("""
+    CREATE INDEX IF NOT EXISTS idx_reservations_restaurant_end
+        ON reservations (restaurant, end_time, seat, start_time)
+    """)
+
+def _migrate_conflict_triggers(c):
+    """
+    - 같은 좌석의 시간이 겹치는 예약과, 한 사용자의 두 번째 예약을 DB 차원에서 거부합니다.
+    - 어떤 경로로 INSERT 하더라도 중복 예약이 생기지 않도록 하는 마지막 방어선입니다.
+    """
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_reservations_seat_overlap
+    BEFORE INSERT ON reservations
+    WHEN EXISTS (
+        SELECT 1 FROM reservations
+        WHERE restaurant = NEW.restaurant AND seat = NEW.seat
+          AND end_time > NEW.start_time AND start_time < NEW.end_time
+    )
+    BEGIN
+        SELECT RAISE(ABORT, 'seat_conflict');
+    END
+    """)
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_reservations_one_per_user
+    BEFORE INSERT ON reservations
+    WHEN EXISTS (SELECT 1 FROM reservations WHERE user_id = NEW.user_id)
+    BEGIN
+        SELECT RAISE(ABORT, 'user_conflict');
+    END
+    """)
+
+def _migrate_epoch_times(c):
+    """
+    - start_time, end_time을 ISO 문자열(TEXT)에서 epoch 초(INTEGER)로 바꿉니다.
+    - TEXT 컬럼에 정수를 넣으면 문자열로 바뀌므로 INTEGER 컬럼으로 테이블을 새로 만들어 옮깁니다.
+    - 새 테이블에 인덱스와 트리거를 다시 만듭니다.
+    """
+    c.execute("""
+    CREATE TABLE reservations_epoch (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT,
+        restaurant TEXT,
+        seat TEXT,
+        start_time INTEGER,
+        end_time INTEGER
+    )
+    """)
+    c.execute(f"SELECT {RESERVATION_COLUMNS} FROM reservations")
+    rows = [
+        (res_id, user_id, restaurant, seat, to_epoch(start), to_epoch(end))
+        for res_id, user_id, restaurant, seat, start, end in c.fetchall()
+    ]
+    c.executemany("INSERT INTO reservations_epoch VALUES (?, ?, ?, ?, ?, ?)", rows)
+    c.execute("DROP TABLE reservations")
+    c.execute("ALTER TABLE reservations_epoch RENAME TO reservations")
+    _migrate_reservation_indexes(c)
+    _migrate_restaurant_status_index(c)
+    _migrate_conflict_triggers(c)
+
+HISTORY_TABLE_PREFIX = "reservations_history_"
+HISTORY_VIEW = "reservations_all"
+
+def _rebuild_history_view(c):
+    """
+    - 현재 예약(reservations)과 월별 보관 테이블을 UNION ALL로 묶은 읽기 전용 뷰를 다시 만듭니다.
+    - archived 컬럼은 보관된 행이면 1입니다.
+    """
+    c.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ORDER BY name",
+        (HISTORY_TABLE_PREFIX + "%",)
+    )
+    parts = [f"SELECT {RESERVATION_COLUMNS}, 0 AS archived FROM reservations"]
+    parts += [f"SELECT {RESERVATION_COLUMNS}, 1 FROM {name}" for (name,) in c.fetchall()]
+    c.execute(f"DROP VIEW IF EXISTS {HISTORY_VIEW}")
+    c.execute(f"CREATE VIEW {HISTORY_VIEW} AS " + " UNION ALL ".join(parts))
+
+def _migrate_archive_support(c):
+    """
+    - 끝난 예약을 빠르게 찾아 옮길 수 있도록 end_time 인덱스를 만들고,
+      관리자 화면용 통합 뷰(reservations_all)를 만듭니다.
+    """
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reservations_end ON reservations (end_time)")
+    _rebuild_history_view(c)
+
+def _migrate_recurring_rules(c):
+    """
+    - 반복 예약 규칙 테이블을 만듭니다. 규칙 한 줄이 "매주 이 요일들, 이 시간, 이 좌석"을 뜻하며
+      날짜별 예약 행을 미리 만들지 않습니다. (조회하는 날짜에 대해서만 계산)
+    - weekdays: 월=1, 화=2, 수=4 … 일=64 비트 합, start/end_minute: 자정부터의 분
+    - valid_from/valid_until: 적용 시작일/종료일(다음 날) 자정의 epoch 초, valid_until이 NULL이면 계속
+    - 어떤 경로로 INSERT 하더라도 규칙과 겹치는 일회성 예약은 트리거가 거부합니다.
+    """
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS recurring_rules (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT,
+        restaurant TEXT,
+        seat TEXT,
+        weekdays INTEGER,
+        start_minute INTEGER,
+        end_minute INTEGER,
+        valid_from INTEGER,
+        valid_until INTEGER
+    )
+    """)
+    c.execute("""
+    CREATE INDEX IF NOT EXISTS idx_recurring_rules_seat
+        ON recurring_rules (restaurant, seat)
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_recurring_rules_user ON recurring_rules (user_id)")
+    # 예약 시작 시각의 요일 비트(월=0)와 자정부터의 분을 SQL로 계산해 규칙과 비교
+    start_minute = """(CAST(strftime('%H', NEW.start_time, 'unixepoch', 'localtime') AS INTEGER) * 60
+                     + CAST(strftime('%M', NEW.start_time, 'unixepoch', 'localtime') AS INTEGER))"""
+    c.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_reservations_rule_overlap
+    BEFORE INSERT ON reservations
+    WHEN EXISTS (
+        SELECT 1 FROM recurring_rules r
+        WHERE r.restaurant = NEW.restaurant AND r.seat = NEW.seat
+          AND r.valid_from <= NEW.start_time
+          AND (r.valid_until IS NULL OR r.valid_until > NEW.start_time)
+          AND (r.weekdays >> ((CAST(strftime('%w', NEW.start_time, 'unixepoch', 'localtime') AS INTEGER) + 6) % 7)) & 1
+          AND r.start_minute < {start_minute} + (NEW.end_time - NEW.start_time) / 60
+          AND r.end_minute > {start_minute}
+    )
+    BEGIN
+        SELECT RAISE(ABORT, 'seat_conflict');
+    END
+    """)
+
+def _migrate_seat_holds(c):
+    """
+    - 시간 선택 중인 좌석을 잠깐 잡아 두는 테이블을 만듭니다. (좌석당 한 명, 사용자당 한 좌석)
+    - expires_at(epoch 초)이 지난 행은 없는 것으로 보고, 다음 잡기 때 한꺼번에 지웁니다. (지연 만료)
+    """
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS seat_holds (
+        restaurant TEXT,
+        seat TEXT,
+        user_id TEXT,
+        expires_at INTEGER,
+        PRIMARY KEY (restaurant, seat)
+    )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_seat_holds_user ON seat_holds (user_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_seat_holds_expires ON seat_holds (expires_at)")
+
+def _migrate_cert_store(c):
+    """
+    - users 행마다 들어 있던 인증서 이미지(cert_blob)를 내용 해시 이름으로 cert_store에 옮기고
+      cert_hash 칼럼에 해시만 남깁니다. 같은 이미지는 저장소에 한 번만 저장됩니다.
+    - cert_blob 칼럼은 지우지 않고 NULL로 비웁니다. (이전 버전 호환, 공간은 VACUUM 때 회수)
+    """
+    c.execute("PRAGMA table_info(users)")
+    if "cert_hash" not in [row[1] for row in c.fetchall()]:
+        c.execute("ALTER TABLE users ADD COLUMN cert_hash TEXT")
+    c.execute("SELECT user_id, cert_blob FROM users WHERE cert_blob IS NOT NULL")
+    moved = [(cert_store.put_bytes(blob), user_id) for user_id, blob in c.fetchall()]
+    c.executemany("UPDATE users SET cert_hash = ?, cert_blob = NULL WHERE user_id = ?", moved)
+
+def _migrate_waitlist(c):
+    """
+    - 빈자리 대기 명단 테이블을 만듭니다. 키오스크 프로세스마다 메모리에 두면 다른 키오스크의 취소로는
+      배정되지 않고 재시작하면 사라지므로 예약과 같은 DB에 둡니다. (사용자당 한 줄)
+    - slot: start_time이 속한 30분 시간대, 같은 시간대 안에서는 priority가 작은 사람 → 먼저 등록한 사람(id) 순
+    - 끝난 시간대의 행은 다음 등록 때 한꺼번에 지웁니다. (지연 만료)
+    """
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS waitlist (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT UNIQUE,
+        restaurant TEXT,
+        slot INTEGER,
+        start_time INTEGER,
+        end_time INTEGER,
+        priority INTEGER
+    )
+    """)
+    c.execute("""
+    CREATE INDEX IF NOT EXISTS idx_waitlist_order
+        ON waitlist (restaurant, slot, priority, id)
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_waitlist_end ON waitlist (end_time)")
+
+MIGRATIONS = [
+    (1, _migrate_base_tables),
+    (2, _migrate_reservation_indexes),
+    (3, _migrate_restaurant_status_index),
+    (4, _migrate_conflict_triggers),
+    (5, _migrate_epoch_times),
+    (6, _migrate_archive_support),
+    (7, _migrate_recurring_rules),
+    (8, _migrate_seat_holds),
+    (9, _migrate_cert_store),
+    (10, _migrate_waitlist),
+]
+
+def init_db():
+    """
+    - 아직 적용되지 않은 마이그레이션만 실행합니다.
+    - 프로그램 시작 시 한 번만 실제로 실행되고, 이후 호출은 바로 반환됩니다.
+    """
+    db.migrate(MIGRATIONS)
+
+def use_database(path):
+    """
+    - 다른 DB 파일을 사용하도록 전환하고 마이그레이션을 적용합니다. (벤치마크용)
+    """
+    global DB_FILE, db
+    db.close_all()
+    DB_FILE = path
+    db = ConnectionManager(path)
+    _reset_user_cache()
+    init_db()
+
+# ─── 사용자별 예약 조회 캐시 ─────────────────────────────────────────────────────────
+# 대화상자를 열 때, 좌석을 누를 때, 확인을 누를 때마다 같은 user_id로 조회하므로 메모리에 둠
+# 이 프로세스의 쓰기는 함수마다 직접 무효화하고, 다른 프로세스의 쓰기는 data_version으로 알아챔
+# data_version은 USER_CACHE_CHECK_SECONDS에 한 번만 확인하므로 적중 경로는 잠금 없이 dict 조회만 함
+# (다른 키오스크의 예약은 최대 그 시간만큼 늦게 보임 — 좌석 색은 ReservationWatcher가 따로 갱신)
+USER_CACHE_CHECK_SECONDS = 0.25
+
+user_cache = LRUCache(maxsize=512)
+_user_cache_version = None
+_user_cache_next_check = 0.0
+_user_cache_lock = threading.Lock()
+
+def _check_user_cache():
+    """
+    - 마지막 확인 뒤 USER_CACHE_CHECK_SECONDS가 지났을 때만 db.data_version()을 읽습니다.
+      그 전에는 시각만 비교하고 바로 돌아가므로 여러 스레드의 조회가 서로 기다리지 않습니다.
+    - 값이 바뀌었으면(다른 프로세스나 이 프로세스의 다른 연결이 커밋함) 캐시를 모두 버립니다.
+    """
+    global _user_cache_version, _user_cache_next_check
+    now = time.monotonic()
+    if now < _user_cache_next_check:
+        return
+    with _user_cache_lock:
+        if now < _user_cache_next_check:
+            return  # 기다리는 동안 다른 스레드가 확인함
+        version = db.data_version()
+        if version != _user_cache_version:
+            user_cache.clear()
+            _user_cache_version = version
+        _user_cache_next_check = time.monotonic() + USER_CACHE_CHECK_SECONDS
+
+def _reset_user_cache():
+    global _user_cache_version, _user_cache_next_check
+    with _user_cache_lock:
+        user_cache.clear()
+        _user_cache_version = None
+        _user_cache_next_check = 0.0
 
-# ──────────────────────────────────────────────────────────────────────────────────
 def has_existing_reservation(user_id):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("SELECT * FROM reservations WHERE user_id = ?", (user_id,))
-    result = c.fetchone()
-    conn.close()
-    return result is not None
+    return get_user_reservation(user_id) is not None
 
 def get_user_reservation(user_id):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("SELECT * FROM reservations WHERE user_id = ?", (user_id,))
-    result = c.fetchone()
-    conn.close()
-    return result
+    _check_user_cache()
+    row = user_cache.get(user_id)
+    if row is not MISSING:
+        return row
+    generation = user_cache.generation
+    c = db.execute(
+        f"SELECT {RESERVATION_COLUMNS} FROM reservations WHERE user_id = ? LIMIT 1",
+        (user_id,)
+    )
+    row = c.fetchone()
+    user_cache.put(user_id, row, generation)
+    return row
 
 def get_seat_reservation(restaurant, seat):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute(
-        "SELECT * FROM reservations WHERE restaurant = ? AND seat = ?",
-        (restaurant, seat)
-    )
-    result = c.fetchone()
-    conn.close()
-    return result
+    # 가장 늦게 끝나는(최근) 예약을 반환 — 인덱스를 역순으로 한 칸만 읽음
+    c = db.execute(f"""
+        SELECT {RESERVATION_COLUMNS} FROM reservations
+        WHERE restaurant = ? AND seat = ?
+        ORDER BY end_time DESC LIMIT 1
+    """, (restaurant, seat))
+    return c.fetchone()
 
 def is_seat_reserved(restaurant, seat):
-    now = datetime.datetime.now().isoformat()
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+    now = to_epoch(datetime.datetime.now())
+    c = db.execute(
+        "SELECT 1 FROM reservations WHERE restaurant = ? AND seat = ? AND end_time > ? LIMIT 1",
+        (restaurant, seat, now)
+    )
+    return c.fetchone() is not None
+
+# ─── 반복 예약 규칙 (조회하는 날짜에만 펼침) ─────────────────────────────────────────
+WEEKDAYS = 0b0011111   # 월~금
+EVERY_DAY = 0b1111111
+
+# 규칙이 특정 날짜에 만드는 예약 한 건. 예약 행과 같은 순서라 [2:6]으로 식당/좌석/시간을 읽을 수 있음
+RuleOccurrence = namedtuple("RuleOccurrence", "rule_id user_id restaurant seat start_time end_time")
+
+def _day_start(day):
+    return to_epoch(datetime.datetime.combine(day, datetime.time()))
+
+def rule_occurrences(day, restaurant=None, seat=None, user_id=None, c=None):
+    """
+    - day(date) 하루 동안 규칙이 만드는 예약을 RuleOccurrence 목록으로 반환합니다.
+    - 규칙 테이블만 읽어 계산하며 예약 행을 만들지 않습니다.
+    - c를 주면 그 커서(트랜잭션 안)에서 조회합니다.
+    """
+    day_start = _day_start(day)
+    where = ["weekdays & ?", "valid_from <= ?", "(valid_until IS NULL OR valid_until > ?)"]
+    params = [1 << day.weekday(), day_start, day_start]
+    for column, value in (("restaurant", restaurant), ("seat", seat), ("user_id", user_id)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    execute = c.execute if c is not None else db.execute
+    rows = execute(f"""
+        SELECT id, user_id, restaurant, seat, start_minute, end_minute FROM recurring_rules
+        WHERE {' AND '.join(where)}
+    """, params).fetchall()
+    return [
+        RuleOccurrence(rule_id, uid, rest, st, day_start + start_min * 60, day_start + end_min * 60)
+        for rule_id, uid, rest, st, start_min, end_min in rows
+    ]
+
+def get_user_rule(user_id):
+    """사용자의 반복 예약 규칙 (id, restaurant, seat, weekdays, start_minute, end_minute) 또는 None"""
+    c = db.execute("""
+        SELECT id, restaurant, seat, weekdays, start_minute, end_minute FROM recurring_rules
+        WHERE user_id = ? LIMIT 1
+    """, (user_id,))
+    return c.fetchone()
+
+def add_recurring_rule(user_id, restaurant, seat, start_minute, end_minute,
+                       weekdays=WEEKDAYS, valid_from=None, valid_until=None):
+    """
+    - "매주 weekdays 요일 start_minute~end_minute에 이 좌석" 규칙을 등록합니다. (사용자당 하나)
+    - 같은 좌석의 다른 규칙이나 앞으로의 일회성 예약과 겹치면 등록하지 않습니다.
+    - ReserveResult를 반환하며, 성공 시 reservation_id는 규칙 id입니다.
+    - valid_from/valid_until은 date (기본: 오늘부터 계속)
+    """
+    valid_from = _day_start(valid_from or datetime.date.today())
+    valid_until = _day_start(valid_until) if valid_until else None
+    now = to_epoch(datetime.datetime.now())
+    with db.transaction(immediate=True) as c:
+        c.execute("SELECT 1 FROM recurring_rules WHERE user_id = ? LIMIT 1", (user_id,))
+        if c.fetchone():
+            return ReserveResult(ReserveStatus.USER_HAS_RESERVATION, None, None)
+        c.execute(
+            f"SELECT {RESERVATION_COLUMNS} FROM reservations WHERE user_id = ? AND end_time > ? LIMIT 1",
+            (user_id, now)
+        )
+        row = c.fetchone()
+        if row:
+            return ReserveResult(ReserveStatus.USER_HAS_RESERVATION, None, row)
+
+        # 같은 좌석의 다른 규칙: 요일 비트와 시간, 적용 기간이 모두 겹치면 충돌
+        c.execute("""
+            SELECT id, user_id, restaurant, seat, start_minute, end_minute FROM recurring_rules
+            WHERE restaurant = ? AND seat = ? AND weekdays & ?
+              AND start_minute < ? AND end_minute > ?
+              AND (valid_until IS NULL OR valid_until > ?)
+              AND (? IS NULL OR valid_from < ?)
+            LIMIT 1
+        """, (restaurant, seat, weekdays, end_minute, start_minute, valid_from, valid_until, valid_until))
+        row = c.fetchone()
+        if row:
+            return ReserveResult(ReserveStatus.SEAT_TAKEN, None, row)
+
+        # 앞으로의 일회성 예약 중 규칙 요일/시간에 걸리는 것 (좌석 하나의 예약이라 적음)
+        c.execute(f"""
+            SELECT {RESERVATION_COLUMNS} FROM reservations
+            WHERE restaurant = ? AND seat = ? AND end_time > ?
+        """, (restaurant, seat, max(now, valid_from)))
+        for row in c.fetchall():
+            start = to_datetime(row[4])
+            minute = start.hour * 60 + start.minute
+            in_period = valid_until is None or row[4] < valid_until
+            if (in_period and weekdays >> start.weekday() & 1
+                    and minute < end_minute and minute + (row[5] - row[4]) // 60 > start_minute):
+                return ReserveResult(ReserveStatus.SEAT_TAKEN, None, row)
+
+        c.execute("""
+        INSERT INTO recurring_rules
+            (user_id, restaurant, seat, weekdays, start_minute, end_minute, valid_from, valid_until)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (user_id, restaurant, seat, weekdays, start_minute, end_minute, valid_from, valid_until))
+        rule_id = c.lastrowid
+    reservation_index.invalidate(restaurant)
+    _publish(restaurant)
+    return ReserveResult(ReserveStatus.OK, rule_id, None)
+
+def cancel_recurring_rule(user_id):
+    """사용자의 반복 예약 규칙을 해지합니다. 해지했으면 True."""
+    with db.transaction(immediate=True) as c:
+        c.execute("SELECT restaurant FROM recurring_rules WHERE user_id = ?", (user_id,))
+        restaurants = {restaurant for (restaurant,) in c.fetchall()}
+        c.execute("DELETE FROM recurring_rules WHERE user_id = ?", (user_id,))
+    for restaurant in restaurants:
+        reservation_index.invalidate(restaurant)
+        _publish(restaurant)
+    return bool(restaurants)
+
+def describe_weekdays(weekdays):
+    if weekdays == WEEKDAYS:
+        return "평일"
+    if weekdays == EVERY_DAY:
+        return "매일"
+    return "".join(name for i, name in enumerate("월화수목금토일") if weekdays >> i & 1)
+
+# ─── 좌석 잡아 두기 (시간 선택 중) ──────────────────────────────────────────────────
+HOLD_SECONDS = 90  # 시간 선택 창을 띄워 둘 수 있는 시간
+
+def hold_seat(user_id, restaurant, seat, ttl=HOLD_SECONDS):
+    """
+    - 좌석을 ttl초 동안 잡아 둡니다. 다른 사용자에게는 SEAT_HELD로 보이고 예약할 수 없습니다.
+    - 사용자가 잡고 있던 다른 좌석은 놓고, 같은 좌석이면 만료 시각만 늘립니다.
+    - 다른 사용자가 잡고 있으면 False를 반환합니다.
+    """
+    now = to_epoch(datetime.datetime.now())
+    with db.transaction(immediate=True) as c:
+        # 지연 만료: 따로 타이머를 돌리지 않고 잡을 때 지난 것들을 정리
+        c.execute("DELETE FROM seat_holds WHERE expires_at <= ?", (now,))
+        c.execute(
+            "SELECT user_id FROM seat_holds WHERE restaurant = ? AND seat = ?", (restaurant, seat)
+        )
+        row = c.fetchone()
+        if row and row[0] != user_id:
+            return False
+        c.execute("DELETE FROM seat_holds WHERE user_id = ?", (user_id,))
+        c.execute("""
+        INSERT INTO seat_holds (restaurant, seat, user_id, expires_at) VALUES (?, ?, ?, ?)
+        """, (restaurant, seat, user_id, now + ttl))
+    _publish(restaurant)
+    return True
+
+def release_hold(user_id):
+    """사용자가 잡고 있던 좌석을 놓습니다. 놓은 좌석이 있었으면 True."""
+    with db.transaction(immediate=True) as c:
+        c.execute("SELECT restaurant FROM seat_holds WHERE user_id = ?", (user_id,))
+        restaurants = {restaurant for (restaurant,) in c.fetchall()}
+        c.execute("DELETE FROM seat_holds WHERE user_id = ?", (user_id,))
+    for restaurant in restaurants:
+        _publish(restaurant)
+    return bool(restaurants)
+
+def _seat_holder(c, restaurant, seat, now):
     c.execute(
-        "SELECT * FROM reservations WHERE restaurant = ? AND seat = ? AND end_time > ?",
+        "SELECT user_id FROM seat_holds WHERE restaurant = ? AND seat = ? AND expires_at > ?",
         (restaurant, seat, now)
     )
-    result = c.fetchone()
-    conn.close()
-    return result is not None
+    row = c.fetchone()
+    return row[0] if row else None
+
+# 좌석 상태: 비어 있음 / 예약됨(시작 전) / 다른 사람이 시간 선택 중 / 사용 중
+SEAT_FREE = "free"
+SEAT_UPCOMING = "upcoming"
+SEAT_HELD = "held"
+SEAT_IN_USE = "in_use"
+
+def get_seat_states(restaurant):
+    """
+    - 식당의 모든 좌석 상태를 쿼리 한 번으로 반환합니다.
+    - {좌석: SEAT_UPCOMING, SEAT_HELD 또는 SEAT_IN_USE} 형태이며, 딕셔너리에 없는 좌석은 SEAT_FREE입니다.
+    """
+    return apply_holds(*get_seat_board(restaurant))
+
+def apply_holds(states, holders, viewer=None):
+    """
+    - get_seat_board()의 결과로 잡아 둔 좌석을 SEAT_HELD로 표시한 상태 딕셔너리를 만듭니다.
+    - viewer가 직접 잡은 좌석은 예약 기준 상태 그대로 둡니다. (자기 좌석은 계속 고를 수 있음)
+    """
+    states = dict(states)
+    for seat, user_id in holders.items():
+        if user_id != viewer and states.get(seat) != SEAT_IN_USE:
+            states[seat] = SEAT_HELD
+    return states
+
+def get_seat_board(restaurant):
+    """
+    - 좌석 상태를 예약 기준 상태와 잡아 두기로 나눠 (states, holders)로 반환합니다.
+    - states: {좌석: SEAT_UPCOMING 또는 SEAT_IN_USE}, holders: {잡아 둔 좌석: 잡은 user_id}
+    - 만료된 잡아 두기는 expires_at 비교로 걸러내므로 지우지 않아도 보이지 않습니다.
+    """
+    now = to_epoch(datetime.datetime.now())
+    c = db.execute("""
+        SELECT seat, start_time FROM reservations
+        WHERE restaurant = ? AND end_time > ?
+    """, (restaurant, now))
+    rows = c.fetchall()
+    # 오늘의 반복 예약도 일회성 예약과 똑같이 취급
+    rows += [
+        (occ.seat, occ.start_time)
+        for occ in rule_occurrences(datetime.date.today(), restaurant) if occ.end_time > now
+    ]
+    states = {}
+    for seat, start_time in rows:
+        if start_time <= now:
+            states[seat] = SEAT_IN_USE
+        else:
+            states.setdefault(seat, SEAT_UPCOMING)
+    c = db.execute(
+        "SELECT seat, user_id FROM seat_holds WHERE restaurant = ? AND expires_at > ?", (restaurant, now)
+    )
+    return states, dict(c.fetchall())
+
+def next_seat_state_change(restaurant):
+    """
+    - 시간이 흘러 좌석 색이 바뀌는 다음 시각(예약 시작 또는 종료)을 epoch 초로 반환합니다.
+    - 반복 예약은 오늘 것의 시작/종료와, 내일 것이 있으면 자정(내일 규칙이 보이기 시작)을 포함합니다.
+    - 잡아 둔 좌석은 만료 시각에 다시 풀려 보이므로 그 시각도 포함합니다.
+    - 아직 끝나지 않은 예약이 없으면 None.
+    """
+    now = to_epoch(datetime.datetime.now())
+    c = db.execute("""
+        SELECT MIN(CASE WHEN start_time > ? THEN start_time ELSE end_time END)
+        FROM reservations WHERE restaurant = ? AND end_time > ?
+    """, (now, restaurant, now))
+    candidates = [c.fetchone()[0]]
+    c = db.execute(
+        "SELECT MIN(expires_at) FROM seat_holds WHERE restaurant = ? AND expires_at > ?", (restaurant, now)
+    )
+    candidates.append(c.fetchone()[0])
+    today = datetime.date.today()
+    for occ in rule_occurrences(today, restaurant):
+        candidates += [t for t in (occ.start_time, occ.end_time) if t > now]
+    tomorrow = today + datetime.timedelta(days=1)
+    if rule_occurrences(tomorrow, restaurant):
+        candidates.append(_day_start(tomorrow))
+    candidates = [t for t in candidates if t is not None]
+    return min(candidates) if candidates else None
+
+# ─── 변경 알림 (프로세스 내부 pub/sub) ──────────────────────────────────────────────
+_subscribers = []
+_subscribers_lock = threading.Lock()
+
+def subscribe(callback):
+    """
+    - 예약이 저장/취소/보관될 때 callback(restaurant)을 호출합니다.
+    - restaurant가 None이면 여러 식당이 바뀌었을 수 있다는 뜻입니다.
+    - 변경을 일으킨 스레드에서 호출되므로 GUI 갱신은 ReservationWatcher를 쓰세요.
+    """
+    with _subscribers_lock:
+        _subscribers.append(callback)
+
+def unsubscribe(callback):
+    with _subscribers_lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+def _publish(restaurant):
+    with _subscribers_lock:
+        callbacks = list(_subscribers)
+    for callback in callbacks:
+        callback(restaurant)
+
+# ─── 좌석별 시간 구간 인덱스 (메모리) ────────────────────────────────────────────────
+# 구간은 epoch 초로 보관합니다.
+def _load_restaurant_intervals(restaurant):
+    now = to_epoch(datetime.datetime.now())
+    c = db.execute("""
+        SELECT seat, start_time, end_time, id FROM reservations
+        WHERE restaurant = ? AND end_time > ?
+    """, (restaurant, now))
+    rows = c.fetchall()
+    # 반복 예약은 오늘과 내일 것만 펼쳐 넣음 (키가 ("rule", id)라 예약 id와 섞이지 않음)
+    today = datetime.date.today()
+    for day in (today, today + datetime.timedelta(days=1)):
+        rows += [
+            (occ.seat, occ.start_time, occ.end_time, ("rule", occ.rule_id))
+            for occ in rule_occurrences(day, restaurant) if occ.end_time > now
+        ]
+    return rows
+
+reservation_index = ReservationIndex(_load_restaurant_intervals)
+
+def get_day_availability(restaurant, seats, day=None, duration=30, step=5):
+    """
+    - 식당의 하루 예약을 쿼리 한 번으로 읽어 모든 좌석의 예약 가능 시작 시간을 계산합니다.
+    - 오늘이면 지금 이후의 시간만 포함합니다.
+    - availability.Availability를 반환합니다. (minutes는 자정부터의 분)
+    """
+    now = datetime.datetime.now()
+    day = day or now.date()
+    day_start = to_epoch(datetime.datetime.combine(day, datetime.time()))
+    day_end = to_epoch(datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time()))
+    c = db.execute("""
+        SELECT seat, start_time, end_time FROM reservations
+        WHERE restaurant = ? AND end_time > ? AND start_time < ?
+    """, (restaurant, day_start, day_end))
+    rows = c.fetchall()
+    rows += [(occ.seat, occ.start_time, occ.end_time) for occ in rule_occurrences(day, restaurant)]
+    # 일부만 걸친 분도 사용 중으로 보도록 끝 시간은 분 단위로 올림
+    intervals = [
+        (seat, (start - day_start) // 60, -(-(end - day_start) // 60))
+        for seat, start, end in rows
+    ]
+    earliest = 0
+    if day == now.date():
+        earliest = now.hour * 60 + now.minute + 1
+    bitmap = occupancy_bitmap(seats, intervals)
+    return feasible_starts(bitmap, seats, duration, earliest, step)
 
 def save_reservation(user_id, restaurant, seat, start_time, end_time):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("""
-    INSERT INTO reservations (user_id, restaurant, seat, start_time, end_time)
-    VALUES (?, ?, ?, ?, ?)
-    """, (user_id, restaurant, seat, start_time.isoformat(), end_time.isoformat()))
-    conn.commit()
-    conn.close()
+    # 쓰기만 하므로 처음부터 쓰기 잠금을 잡음 (잠금 대기 시간도 db.lock_waits에 기록됨)
+    with db.transaction(immediate=True) as c:
+        c.execute("""
+        INSERT INTO reservations (user_id, restaurant, seat, start_time, end_time)
+        VALUES (?, ?, ?, ?, ?)
+        """, (user_id, restaurant, seat, to_epoch(start_time), to_epoch(end_time)))
+        res_id = c.lastrowid
+    user_cache.invalidate(user_id)
+    reservation_index.add(restaurant, seat, to_epoch(start_time), to_epoch(end_time), res_id)
+    _publish(restaurant)
+
+class ReserveStatus(Enum):
+    OK = "ok"
+    USER_HAS_RESERVATION = "user_has_reservation"
+    SEAT_TAKEN = "seat_taken"
+    SEAT_HELD = "seat_held"
+
+class ReserveResult(namedtuple("ReserveResult", "status reservation_id conflict")):
+    """
+    - status: ReserveStatus
+    - reservation_id: 성공 시 새 예약 id, 실패 시 None
+    - conflict: 실패 원인이 된 기존 예약 행 (알 수 없으면 None)
+    """
+    @property
+    def ok(self):
+        return self.status is ReserveStatus.OK
+
+def reserve(user_id, restaurant, seat, start_time, end_time):
+    """
+    - 확인과 저장을 BEGIN IMMEDIATE 트랜잭션 하나로 묶어 예약합니다.
+    - 쓰기 잠금을 먼저 잡으므로 다른 키오스크가 확인과 저장 사이에 끼어들 수 없습니다.
+    - 겹치는 예약이 있으면 저장하지 않고 ReserveResult로 충돌 종류를 알려 줍니다.
+    """
+    start, end = to_epoch(start_time), to_epoch(end_time)
+    try:
+        with db.transaction(immediate=True) as c:
+            c.execute(
+                f"SELECT {RESERVATION_COLUMNS} FROM reservations WHERE user_id = ? LIMIT 1",
+                (user_id,)
+            )
+            row = c.fetchone()
+            if row:
+                return ReserveResult(ReserveStatus.USER_HAS_RESERVATION, None, row)
+            # 그날 반복 예약이 있는 사용자도 이미 예약이 있는 것으로 봄
+            day = to_datetime(start).date()
+            for occ in rule_occurrences(day, user_id=user_id, c=c):
+                return ReserveResult(ReserveStatus.USER_HAS_RESERVATION, None, occ)
+
+            c.execute(f"""
+                SELECT {RESERVATION_COLUMNS} FROM reservations
+                WHERE restaurant = ? AND seat = ? AND end_time > ? AND start_time < ?
+                LIMIT 1
+            """, (restaurant, seat, start, end))
+            row = c.fetchone()
+            if row:
+                return ReserveResult(ReserveStatus.SEAT_TAKEN, None, row)
+            # 규칙은 펼친 행이 없으므로 그날 발생분과 직접 비교
+            for occ in rule_occurrences(day, restaurant, seat, c=c):
+                if occ.end_time > start and occ.start_time < end:
+                    return ReserveResult(ReserveStatus.SEAT_TAKEN, None, occ)
+            # 다른 사용자가 시간을 고르는 중인 좌석
+            holder = _seat_holder(c, restaurant, seat, to_epoch(datetime.datetime.now()))
+            if holder is not None and holder != user_id:
+                return ReserveResult(ReserveStatus.SEAT_HELD, None, None)
+
+            c.execute("""
+            INSERT INTO reservations (user_id, restaurant, seat, start_time, end_time)
+            VALUES (?, ?, ?, ?, ?)
+            """, (user_id, restaurant, seat, start, end))
+            res_id = c.lastrowid
+            # 예약이 되었으니 잡아 둔 좌석은 놓고, 대기 등록도 필요 없음
+            c.execute("DELETE FROM seat_holds WHERE user_id = ?", (user_id,))
+            c.execute("DELETE FROM waitlist WHERE user_id = ?", (user_id,))
+        user_cache.invalidate(user_id)
+        reservation_index.add(restaurant, seat, start, end, res_id)
+        _publish(restaurant)
+        return ReserveResult(ReserveStatus.OK, res_id, None)
+    except sqlite3.IntegrityError as e:
+        # 트리거가 막은 경우 (위 확인을 거치지 않은 다른 경로와 겹친 경우)
+        if "user_conflict" in str(e):
+            return ReserveResult(ReserveStatus.USER_HAS_RESERVATION, None, None)
+        if "seat_conflict" in str(e):
+            return ReserveResult(ReserveStatus.SEAT_TAKEN, None, None)
+        raise
 
 def cancel_reservation(user_id):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("DELETE FROM reservations WHERE user_id = ?", (user_id,))
-    conn.commit()
-    conn.close()
+    """
+    - 사용자의 예약을 취소하고, 비게 된 좌석을 같은 시간대 대기자에게 자동으로 배정합니다.
+    - 배정된 대기자 목록(Promotion)을 반환합니다. (안내 방송용)
+    """
+    # 읽은 뒤 지우므로 쓰기 잠금을 먼저 잡음 (읽기→쓰기 승격은 다른 키오스크와 겹치면 바로 실패함)
+    with db.transaction(immediate=True) as c:
+        c.execute(
+            "SELECT id, restaurant, seat, start_time, end_time FROM reservations WHERE user_id = ?",
+            (user_id,)
+        )
+        removed = c.fetchall()
+        c.execute("DELETE FROM reservations WHERE user_id = ?", (user_id,))
+    user_cache.invalidate(user_id)
+    for res_id, restaurant, seat, start, end in removed:
+        reservation_index.remove(restaurant, seat, start, res_id)
+    for restaurant in {row[1] for row in removed}:
+        _publish(restaurant)
+    promotions = []
+    for res_id, restaurant, seat, start, end in removed:
+        promotions += _promote_waiters(restaurant, seat, start, end)
+    return promotions
+
+# ─── 대기 명단 ────────────────────────────────────────────────────────────────────────
+# waitlist 테이블에 두므로 같은 DB를 쓰는 모든 키오스크가 공유하고, 재시작해도 남습니다.
+Promotion = namedtuple("Promotion", "user_id restaurant seat start_time end_time")
+
+def join_waitlist(user_id, restaurant, start_time, end_time, priority=PRIORITY_NORMAL):
+    """
+    - start_time이 속한 30분 시간대의 대기 명단에 등록하고 대기 인원(본인 포함)을 반환합니다.
+    - 이미 다른 시간대에 등록되어 있었으면 그 등록은 빠집니다.
+    - 그 시간과 겹치는 예약이 취소되면 먼저 등록한 순서대로 자동 배정됩니다.
+    """
+    start, end = to_epoch(start_time), to_epoch(end_time)
+    slot = slot_of(start)
+    now = to_epoch(datetime.datetime.now())
+    with db.transaction(immediate=True) as c:
+        c.execute("DELETE FROM waitlist WHERE end_time <= ?", (now,))
+        c.execute("DELETE FROM waitlist WHERE user_id = ?", (user_id,))
+        c.execute("""
+        INSERT INTO waitlist (user_id, restaurant, slot, start_time, end_time, priority)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, restaurant, slot, start, end, priority))
+        c.execute("SELECT COUNT(*) FROM waitlist WHERE restaurant = ? AND slot = ?", (restaurant, slot))
+        return c.fetchone()[0]
+
+def leave_waitlist(user_id):
+    """대기 등록을 취소합니다. 등록되어 있었으면 True."""
+    with db.transaction() as c:
+        c.execute("DELETE FROM waitlist WHERE user_id = ?", (user_id,))
+        return c.rowcount > 0
+
+def _promote_waiters(restaurant, seat, start, end):
+    """
+    - 취소로 비게 된 [start, end)와 겹치는 시간을 기다리던 대기자를 시간대 → 우선순위 → 등록 순서로 보며,
+      대기자가 요청한 시간에 이 좌석이 비어 있으면 그 시간으로 예약해 줍니다. (이미 시작된 시간대는 다음 분부터)
+    - 예약되면 reserve()가 같은 트랜잭션에서 대기 등록을 지웁니다.
+      좌석이 맞지 않는 대기자는 순서를 그대로 두고, 그 사이 다른 예약을 한 대기자는 명단에서 뺍니다.
+    - 배정된 Promotion 목록을 반환합니다.
+    """
+    now = to_epoch(datetime.datetime.now())
+    if end <= now:
+        return []
+    c = db.execute("""
+        SELECT user_id, start_time, end_time FROM waitlist
+        WHERE restaurant = ? AND start_time < ? AND end_time > ? AND end_time > ?
+        ORDER BY slot, priority, id
+    """, (restaurant, end, start, now))
+    promotions = []
+    for user_id, wait_start, wait_end in c.fetchall():
+        wait_start = max(wait_start, now - now % 60 + 60)
+        if wait_start >= wait_end:
+            continue
+        result = reserve(user_id, restaurant, seat, wait_start, wait_end)
+        if result.ok:
+            promotions.append(Promotion(user_id, restaurant, seat, wait_start, wait_end))
+        elif result.status is ReserveStatus.USER_HAS_RESERVATION:
+            leave_waitlist(user_id)
+    return promotions
+
+# ─── 지난 예약 보관 ───────────────────────────────────────────────────────────────────
+def archive_expired(now=None):
+    """
+    - 이미 끝난 예약을 시작 시간 기준 월별 보관 테이블(reservations_history_YYYYMM)로 옮깁니다.
+    - 키오스크가 조회하는 reservations 테이블에는 아직 끝나지 않은 예약만 남습니다.
+    - 옮긴 예약 수를 반환합니다.
+    """
+    now = to_epoch(now or datetime.datetime.now())
+    with db.transaction(immediate=True) as c:
+        c.execute("""
+            SELECT DISTINCT strftime('%Y%m', start_time, 'unixepoch', 'localtime')
+            FROM reservations WHERE end_time <= ?
+        """, (now,))
+        months = [month for (month,) in c.fetchall() if month]
+        if not months:
+            return 0
+
+        created = False
+        moved = 0
+        for month in months:
+            table = HISTORY_TABLE_PREFIX + month
+            c.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            )
+            if not c.fetchone():
+                c.execute(f"""
+                CREATE TABLE {table} (
+                    id INTEGER PRIMARY KEY,
+                    user_id TEXT,
+                    restaurant TEXT,
+                    seat TEXT,
+                    start_time INTEGER,
+                    end_time INTEGER
+                )
+                """)
+                c.execute(f"CREATE INDEX idx_{table}_user ON {table} (user_id)")
+                created = True
+            first = datetime.datetime(int(month[:4]), int(month[4:]), 1)
+            after = datetime.datetime(first.year + first.month // 12, first.month % 12 + 1, 1)
+            # 보관 테이블에 복사한 행과 똑같은 조건으로만 지움 (월을 계산할 수 없는 행은 그대로 둠)
+            where = "end_time <= ? AND start_time >= ? AND start_time < ?"
+            params = (now, to_epoch(first), to_epoch(after))
+            c.execute(f"""
+                INSERT INTO {table} ({RESERVATION_COLUMNS})
+                SELECT {RESERVATION_COLUMNS} FROM reservations WHERE {where}
+            """, params)
+            c.execute(f"DELETE FROM reservations WHERE {where}", params)
+            moved += c.rowcount
+
+        if created:
+            _rebuild_history_view(c)
+    reservation_index.invalidate()
+    user_cache.clear()
+    _publish(None)
+    return moved
+
+class ArchiveJob(threading.Thread):
+    """
+    - interval초마다 archive_expired()를 실행하는 백그라운드 스레드입니다.
+    - 실패하면 logging으로 스택과 함께 남기고 last_error에 보관한 뒤 다음 주기에 다시 시도합니다.
+    - stop()을 부르면 다음 대기에서 바로 종료합니다.
+    """
+
+    def __init__(self, interval=600):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.last_error = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                archive_expired()
+                self.last_error = None
+            except Exception as e:
+                # 스레드가 죽으면 보관이 조용히 멈추므로 모든 예외를 기록하고 계속 돔
+                log.exception("지난 예약 보관 실패")
+                self.last_error = e
+            self._stop_event.wait(self.interval)
+        db.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+_archive_job = None
+
+def start_archive_job(interval=600):
+    """프로그램 시작 시 한 번 호출해 보관 스레드를 띄웁니다."""
+    global _archive_job
+    if _archive_job is None:
+        _archive_job = ArchiveJob(interval)
+        _archive_job.start()
+    return _archive_job
+
+# ─── 예약 백엔드 (직접 DB 또는 예약 서비스) ───────────────────────────────────────────
+class ServiceError(RuntimeError):
+    """예약 서비스가 오류를 돌려주었거나 연결할 수 없을 때 (reservation_service.ServiceClient)"""
+
+class LocalBackend:
+    """
+    - 대화상자가 쓰는 조회/예약 기능을 이 프로세스의 DB 연결로 처리합니다. (단일 PC 기본 모드)
+    - reservation_service.ServiceClient와 같은 메서드를 제공합니다.
+    """
+
+    def get_user_reservation(self, user_id):
+        return get_user_reservation(user_id)
+
+    def has_existing_reservation(self, user_id):
+        return has_existing_reservation(user_id)
+
+    def get_seat_states(self, restaurant):
+        return get_seat_states(restaurant)
+
+    def get_seat_board(self, restaurant):
+        return get_seat_board(restaurant)
+
+    def next_seat_state_change(self, restaurant):
+        return next_seat_state_change(restaurant)
+
+    def find_overlap(self, restaurant, seat, start, end):
+        return reservation_index.find_overlap(restaurant, seat, start, end)
+
+    def next_free(self, restaurant, seat, after, duration):
+        return reservation_index.next_free(restaurant, seat, after, duration)
+
+    def invalidate(self, restaurant=None):
+        # 다른 키오스크가 같은 DB 파일에 쓴 내용을 반영하도록 메모리 인덱스를 버림
+        reservation_index.invalidate(restaurant)
+
+    def get_day_availability(self, restaurant, seats, duration=30, step=5):
+        return get_day_availability(restaurant, seats, duration=duration, step=step)
+
+    def reserve(self, user_id, restaurant, seat, start_time, end_time):
+        return reserve(user_id, restaurant, seat, start_time, end_time)
+
+    def cancel_reservation(self, user_id):
+        return cancel_reservation(user_id)
+
+    def join_waitlist(self, user_id, restaurant, start_time, end_time):
+        return join_waitlist(user_id, restaurant, start_time, end_time)
+
+    def add_recurring_rule(self, user_id, restaurant, seat, start_minute, end_minute, weekdays=WEEKDAYS):
+        return add_recurring_rule(user_id, restaurant, seat, start_minute, end_minute, weekdays)
+
+    def get_user_rule(self, user_id):
+        return get_user_rule(user_id)
+
+    def hold_seat(self, user_id, restaurant, seat):
+        return hold_seat(user_id, restaurant, seat)
+
+    def release_hold(self, user_id):
+        return release_hold(user_id)
+
+    def cancel_recurring_rule(self, user_id):
+        return cancel_recurring_rule(user_id)
+
+    def leave_waitlist(self, user_id):
+        return leave_waitlist(user_id)
+
+    def data_version(self):
+        """다른 연결이 커밋할 때마다 바뀌는 값 (변경 감시용)"""
+        return db.execute("PRAGMA data_version").fetchone()[0]
+
+    # 로그인/회원가입/개인정보 화면용 계정과 인증서 이미지 (비밀번호/보안 답변은 돌려주지 않음)
+    def check_login(self, user_id, password):
+        return check_login(user_id, password)
+
+    def user_exists(self, user_id):
+        return user_exists(user_id)
+
+    def get_security_question(self, user_id):
+        return get_security_question(user_id)
+
+    def check_security_answer(self, user_id, answer):
+        return check_security_answer(user_id, answer)
+
+    def reset_password(self, user_id, answer, new_password):
+        return reset_password(user_id, answer, new_password)
+
+    def create_user(self, user_id, password, question, answer, cert_path=None, cert_hash=None):
+        return create_user(user_id, password, question, answer, cert_path, cert_hash)
+
+    def update_profile(self, user_id, password=None, cert_path=None, cert_hash=None):
+        return update_profile(user_id, password, cert_path, cert_hash)
+
+    def get_user_profile(self, user_id):
+        return get_user_profile(user_id)
+
+    def load_cert_image(self, cert_hash):
+        return load_cert_image(cert_hash)
+
+    def store_cert(self, path, progress=None):
+        return store_cert_file(path, progress)
+
+_backend = None
+
+def reservation_backend():
+    """
+    - AppSettings.service_url이 있으면 예약 서비스 클라이언트, 없으면 LocalBackend를 반환합니다.
+    - 여러 PC의 키오스크가 예약을 공유할 때는 reservation_service.py를 띄우고 주소를 설정합니다.
+      이때 키오스크는 DB 파일과 인증서 저장소 없이 사용자/인증서 조회도 서비스로 처리합니다.
+      계정 변경과 첨부 업로드에는 AppSettings.service_token(서비스와 같은 공유 비밀)이 필요합니다.
+    - 서비스 클라이언트는 연결할 수 없으면 ServiceError를 올립니다. 화면에서 잡아 안내합니다.
+    """
+    global _backend
+    url = AppSettings.service_url
+    token = AppSettings.service_token
+    if (_backend is None or getattr(_backend, "url", None) != url
+            or getattr(_backend, "token", None) != token):
+        if url:
+            from reservation_service import ServiceClient  # 서비스가 이 모듈을 가져오므로 지연 import
+            _backend = ServiceClient(url, token=token)
+        else:
+            _backend = LocalBackend()
+    return _backend
+
+# ─── GUI용 변경 감시 ─────────────────────────────────────────────────────────────────
+class ReservationWatcher(QObject):
+    """
+    - 예약 변경을 GUI 스레드의 changed(restaurant) 시그널로 전달합니다. ("" = 식당 모름/전체)
+    - 이 프로세스의 변경: pub/sub으로 즉시 전달 (다른 스레드에서 와도 큐로 GUI 스레드에 전달)
+    - 다른 프로세스/연결의 변경: PRAGMA data_version을 짧은 간격으로 확인해 값이 바뀔 때만 전달
+      (data_version 확인은 파일 헤더만 보므로 바뀐 것이 없으면 사실상 비용이 없음)
+    - 예약 서비스 모드에서는 서비스의 변경 번호(version)를 같은 방식으로 확인합니다.
+      서비스에 연결할 수 없으면 마지막 상태를 그대로 두고 확인 간격을 max_interval까지 두 배씩 늘립니다.
+    - acquire()한 대화상자가 하나라도 있을 때만 확인 타이머가 돕니다.
+    """
+    changed = pyqtSignal(str)
+
+    def __init__(self, interval=250, max_interval=8000, parent=None):
+        super().__init__(parent)
+        self._users = 0
+        self._version = None
+        self.interval = interval
+        self.max_interval = max_interval
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._poll)
+        subscribe(self._on_local_change)
+
+    def _data_version(self):
+        """현재 변경 번호. 서비스에 연결할 수 없으면 확인 간격을 늘리고 None을 반환합니다."""
+        try:
+            version = reservation_backend().data_version()
+        except ServiceError as e:
+            log.warning("예약 서비스 변경 확인 실패: %s", e)
+            self._timer.setInterval(min(self._timer.interval() * 2, self.max_interval))
+            return None
+        self._timer.setInterval(self.interval)
+        return version
+
+    def acquire(self):
+        self._users += 1
+        if self._users == 1:
+            self._timer.setInterval(self.interval)
+            self._version = self._data_version()
+            self._timer.start()
+
+    def release(self):
+        self._users = max(0, self._users - 1)
+        if self._users == 0:
+            self._timer.stop()
+
+    def _poll(self):
+        version = self._data_version()
+        if version is None:
+            return  # 연결 실패: 마지막 상태 유지
+        if version != self._version:
+            self._version = version
+            self.changed.emit("")
+
+    def _on_local_change(self, restaurant):
+        self.changed.emit(restaurant or "")
+
+_watcher = None
+
+def reservation_watcher():
+    """GUI 스레드에서 공유하는 ReservationWatcher (QApplication 생성 후 호출)"""
+    global _watcher
+    if _watcher is None:
+        _watcher = ReservationWatcher()
+    return _watcher
+
+def show_service_error(parent):
+    """예약 서비스가 재시작 중이거나 네트워크가 끊겼을 때 안내합니다. (키오스크는 계속 동작)"""
+    if AppSettings.tts_enabled:
+        speak("서버에 연결할 수 없습니다")
+    QMessageBox.warning(parent, "연결 오류", "서버에 연결할 수 없습니다.\n잠시 후 다시 시도하세요.")
 
 # ──────────────────────────────────────────────────────────────────────────────────
 class SeatReservationDialog(QDialog):
@@ -122,19 +1185,21 @@ class SeatReservationDialog(QDialog):
         self.setWindowTitle(f"{restaurant_name} 좌석 예약")
         self.restaurant_name = restaurant_name
         self.user_id = user_id
+        # 직접 DB 또는 예약 서비스 (AppSettings.service_url)
+        self.backend = reservation_backend()
         self.selected_seat = None
+        # 이 대화상자에서 대기 명단에 등록했는지 (자동 배정되면 안내)
+        self.waiting = False
         self.seat_buttons = {}
+        # 좌석별 마지막으로 그린 상태와 다시 칠한 횟수 (차등 갱신 계측용)
+        self.rendered_states = {}
+        self.restyle_stats = {"refreshes": 0, "restyles": 0, "last_restyles": 0}
+        # layouts/<식당>.json을 해석한 결과 (프로세스 안에서 캐시됨)
+        self.hall = load_layout(restaurant_name)
         self.initUI()
 
     def get_seat_layout(self):
-        if self.restaurant_name == "한빛식당":
-            return ["00010001"]
-        elif self.restaurant_name == "별빛식당":
-            return ["111111", "------", "000000"]
-        elif self.restaurant_name == "은하수식당":
-            return ["000 000", " 1   1 ", "000 000"]
-        else:
-            return ["0000", "0 10", "0000"]
+        return self.hall.cells
 
     def initUI(self):
         layout = QVBoxLayout()
@@ -144,33 +1209,106 @@ class SeatReservationDialog(QDialog):
         cancel_btn.clicked.connect(self.on_cancel_reservation)
         layout.addWidget(cancel_btn)
 
-        current_res = get_user_reservation(self.user_id)
-        if current_res:
-            restaurant, seat, start_time, end_time = current_res[2:6]
-            seat_info = f"현재 예약: {restaurant}, 좌석 {seat}, {start_time[11:16]} ~ {end_time[11:16]}"
-        else:
-            seat_info = "현재 예약 없음"
-        self.reservation_label = QLabel(seat_info)
+        # 배치도를 찾아보지 않고 출입구에서 가장 가까운 빈 좌석을 바로 예약
+        best_seat_btn = QPushButton("입구에서 가까운 좌석 예약")
+        best_seat_btn.clicked.connect(self.reserve_best_seat)
+        layout.addWidget(best_seat_btn)
+
+        # 빈자리가 없을 때 다시 누르며 기다리지 않도록 대기 명단 등록
+        waitlist_btn = QPushButton("빈자리 대기 등록")
+        waitlist_btn.clicked.connect(self.offer_waitlist)
+        layout.addWidget(waitlist_btn)
+
+        self.reservation_label = QLabel(
+            self.reservation_text(self.backend.get_user_reservation(self.user_id))
+        )
         layout.addWidget(self.reservation_label)
+        # 반복 예약 규칙이 있으면 따로 표시
+        self.rule_label = QLabel(self.rule_text(self.backend.get_user_rule(self.user_id)))
+        layout.addWidget(self.rule_label)
+
+        # 좌석이 많은 식당은 위젯 대신 장면 그래프 배치도(확대/이동 가능)로 그림
+        if len(self.hall.seats) > SEAT_MAP_THRESHOLD:
+            self.seat_map = SeatMapView(self.hall)
+            self.seat_map.seat_clicked.connect(self.try_reserve_seat)
+            layout.addWidget(self.seat_map)
+        else:
+            self.seat_map = None
+            layout.addWidget(self.build_seat_grid())
+
+        self.setLayout(layout)
+
+        # 주기적으로 다시 조회하지 않고, 변경 알림이 오거나 예약 시작/종료 시각이 될 때만 갱신
+        self.transition_timer = QTimer(self)
+        self.transition_timer.setSingleShot(True)
+        self.transition_timer.timeout.connect(self.refresh_seat_colors)
+        self.watcher = reservation_watcher()
+        self.watcher.acquire()
+        self.watcher.changed.connect(self.on_reservations_changed)
+        self.finished.connect(self.stop_watching)
+        self.refresh_seat_colors()
+
+    @staticmethod
+    def reservation_text(res):
+        if not res:
+            return "현재 예약 없음"
+        restaurant, seat, start_time, end_time = res[2:6]
+        return (
+            f"현재 예약: {restaurant}, 좌석 {seat}, "
+            f"{format_time(start_time, '%H:%M')} ~ {format_time(end_time, '%H:%M')}"
+        )
+
+    @staticmethod
+    def rule_text(rule):
+        if not rule:
+            return ""
+        _, restaurant, seat, weekdays, start_minute, end_minute = rule
+        return (
+            f"반복 예약: {describe_weekdays(weekdays)} "
+            f"{start_minute // 60:02d}:{start_minute % 60:02d} ~ {end_minute // 60:02d}:{end_minute % 60:02d}, "
+            f"{restaurant}, 좌석 {seat}"
+        )
+
+    def on_reservations_changed(self, restaurant):
+        if not restaurant or restaurant == self.restaurant_name:
+            self.refresh_seat_colors()
+
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.changed.disconnect(self.on_reservations_changed)
+            self.watcher.release()
+            self.watcher = None
+        self.transition_timer.stop()
+
+    def schedule_transition(self):
+        """다음 예약 시작/종료 시각에 한 번만 다시 칠하도록 타이머를 맞춥니다."""
+        next_change = self.backend.next_seat_state_change(self.restaurant_name)
+        if next_change is None:
+            self.transition_timer.stop()
+            return
+        delay_ms = (next_change - to_epoch(datetime.datetime.now())) * 1000 + 500
+        self.transition_timer.start(max(0, min(delay_ms, 24 * 60 * 60 * 1000)))
 
+    def build_seat_grid(self):
+        """좌석마다 버튼/라벨을 하나씩 만드는 기존 배치도 (작은 식당용)"""
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
         container = QWidget()
         grid = QGridLayout()
         container.setLayout(grid)
 
-        seat_layout = self.get_seat_layout()
-        for r, line in enumerate(seat_layout):
+        aisle_pixmap = QPixmap("empty.png").scaled(30, 30)
+        for r, line in enumerate(self.hall.cells):
             col = 0
             for c in line:
                 seat_name = f"{r}-{col}"
-                if c == "0":
+                if c == GENERAL_SEAT:
                     btn = QPushButton()
                     btn.setFixedSize(30, 30)
                     btn.setStyleSheet("background-color: #a0d6a0;")
                     btn.setEnabled(False)
                     grid.addWidget(btn, r, col)
-                elif c == "1":
+                elif c == ACCESSIBLE_SEAT:
                     btn = QPushButton()
                     btn.setFixedSize(30, 30)
                     btn.setIcon(QIcon("disable_seat.png"))
@@ -179,76 +1317,205 @@ class SeatReservationDialog(QDialog):
                     btn.clicked.connect(partial(self.try_reserve_seat, seat_name))
                     self.seat_buttons[seat_name] = btn
                     grid.addWidget(btn, r, col)
-                elif c == "-":
+                elif c == AISLE:
                     lbl = QLabel()
                     lbl.setFixedSize(30, 30)
-                    lbl.setPixmap(QPixmap("empty.png").scaled(30, 30))
+                    lbl.setPixmap(aisle_pixmap)
                     lbl.setStyleSheet("background-color: transparent;")
                     grid.addWidget(lbl, r, col)
-                elif c == "3":
+                elif c == PILLAR:
                     pillar = QLabel()
                     pillar.setFixedSize(30, 30)
                     pillar.setStyleSheet("background-color: black;")
                     grid.addWidget(pillar, r, col)
-                elif c == " ":
+                elif c == BLANK:
                     blank = QLabel()
                     blank.setFixedSize(30, 30)
                     blank.setStyleSheet("background-color: white; border: none;")
                     grid.addWidget(blank, r, col)
+                elif c == ENTRANCE:
+                    entrance = QLabel("입구")
+                    entrance.setFixedSize(30, 30)
+                    entrance.setAlignment(Qt.AlignCenter)
+                    entrance.setStyleSheet("background-color: #ffe082; font-size: 9px;")
+                    grid.addWidget(entrance, r, col)
                 col += 1
 
         scroll.setWidget(container)
-        layout.addWidget(scroll)
-
-        self.setLayout(layout)
+        return scroll
 
-        self.refresh_timer = QTimer(self)
-        self.refresh_timer.timeout.connect(self.refresh_seat_colors)
-        self.refresh_timer.start(60000)
-        self.refresh_seat_colors()
-
-    def seat_button_color(self, seat_name):
-        reservation = get_seat_reservation(self.restaurant_name, seat_name)
-        now = datetime.datetime.now()
-        if reservation:
-            start_time = datetime.datetime.fromisoformat(reservation[4])
-            end_time = datetime.datetime.fromisoformat(reservation[5])
-            if start_time <= now < end_time:
-                return "background-color: red;"
-            elif now < start_time:
-                return "background-color: gray;"
-            else:
-                return "background-color: green;"
-        else:
-            return "background-color: green;"
+    SEAT_STYLES = {
+        SEAT_IN_USE: "background-color: red;",
+        SEAT_UPCOMING: "background-color: gray;",
+        SEAT_HELD: "background-color: orange;",
+        SEAT_FREE: "background-color: green;",
+    }
 
-    def update_seat_color(self, seat_name):
+    def update_seat_color(self, seat_name, state):
+        """
+        - 마지막으로 그린 상태와 같으면 아무것도 하지 않습니다. (스타일시트 재적용은 비쌈)
+        - 실제로 다시 칠했으면 True를 반환합니다.
+        """
+        if self.rendered_states.get(seat_name) == state:
+            return False
+        self.rendered_states[seat_name] = state
+        # 시작 전 예약만 있는 좌석은 다른 시간대로 예약할 수 있음 (다른 사람이 고르는 중이면 불가)
+        enabled = state not in (SEAT_IN_USE, SEAT_HELD)
+        if self.seat_map is not None:
+            self.seat_map.set_seat_state(seat_name, state, enabled)
+            return True
         btn = self.seat_buttons[seat_name]
-        btn.setStyleSheet(self.seat_button_color(seat_name))
-        if is_seat_reserved(self.restaurant_name, seat_name):
-            btn.setEnabled(False)
-        else:
-            btn.setEnabled(True)
+        btn.setStyleSheet(self.SEAT_STYLES[state])
+        btn.setEnabled(enabled)
+        return True
 
     def refresh_seat_colors(self):
-        for seat_name in self.seat_buttons:
-            self.update_seat_color(seat_name)
+        # 변경 알림과 시각 타이머에서도 불리므로 서비스 연결 실패는 여기서 잡음:
+        # 마지막으로 그린 색을 그대로 두고 잠시 뒤 다시 시도 (창마다 안내 창을 띄우지 않음)
+        try:
+            self.repaint_seat_states()
+        except ServiceError as e:
+            log.warning("좌석 상태 갱신 실패: %s", e)
+            self.transition_timer.start(SERVICE_RETRY_MS)
+
+    def repaint_seat_states(self):
+        # 다른 키오스크의 변경을 반영하도록 시간 구간 인덱스도 다음 조회 때 다시 읽음
+        self.backend.invalidate(self.restaurant_name)
+        # 좌석 수와 관계없이 쿼리 한 번으로 전체 상태를 가져오고, 바뀐 좌석만 다시 칠함
+        # 내가 잡아 둔 좌석은 다른 사람이 잡은 좌석(주황, 선택 불가)으로 칠하지 않음
+        states = apply_holds(*self.backend.get_seat_board(self.restaurant_name), viewer=self.user_id)
+        restyled = 0
+        for seat_name in self.hall.accessible_seats:
+            if self.update_seat_color(seat_name, states.get(seat_name, SEAT_FREE)):
+                restyled += 1
+        # 갱신 한 번에 다시 칠한 좌석 수 (변경이 없으면 0이어야 함)
+        self.restyle_stats["refreshes"] += 1
+        self.restyle_stats["restyles"] += restyled
+        self.restyle_stats["last_restyles"] = restyled
+        self.schedule_transition()
+        if self.waiting:
+            self.check_waitlist_promotion()
+
+    def check_waitlist_promotion(self):
+        """대기 중에 다른 사람의 취소로 좌석이 배정되었으면 안내합니다."""
+        res = self.backend.get_user_reservation(self.user_id)
+        if not res:
+            return
+        self.waiting = False
+        self.reservation_label.setText(self.reservation_text(res))
+        message = f"대기하던 좌석이 배정되었습니다. 좌석 {res[3]}, {format_time(res[4], '%H:%M')}"
+        if AppSettings.tts_enabled:
+            speak(message)
+        QMessageBox.information(self, "대기 좌석 배정", message)
 
     def try_reserve_seat(self, seat_name):
-        if has_existing_reservation(self.user_id):
+        try:
+            if self.backend.has_existing_reservation(self.user_id):
+                if AppSettings.tts_enabled:
+                    speak("예약 불가: 이미 예약된 좌석이 있습니다.")
+                QMessageBox.warning(self, "예약 불가", "이미 예약된 좌석이 있습니다.")
+                return
+            # 메모리 인덱스로 오늘 남은 빈 시간이 있는지 확인 (DB 조회 없음)
+            now = datetime.datetime.now()
+            first_free = self.next_free_start(seat_name, now)
+            if first_free.date() != now.date():
+                if self.restaurant_full():
+                    self.offer_waitlist()
+                    return
+                if AppSettings.tts_enabled:
+                    speak("예약 불가: 오늘은 예약 가능한 시간이 없습니다.")
+                QMessageBox.warning(self, "예약 불가", "이미 예약된 좌석입니다.")
+                self.refresh_seat_colors()
+                return
+
+            # 시간을 고르는 동안 다른 키오스크에서 같은 좌석을 예약하지 못하도록 잠깐 잡아 둠
+            if not self.backend.hold_seat(self.user_id, self.restaurant_name, seat_name):
+                if AppSettings.tts_enabled:
+                    speak("예약 불가: 다른 사용자가 선택 중인 좌석입니다.")
+                QMessageBox.warning(self, "예약 불가", "다른 사용자가 선택 중인 좌석입니다.")
+                self.refresh_seat_colors()
+                return
+            self.selected_seat = seat_name
+            try:
+                self.open_time_dialog(first_free)
+            finally:
+                # 예약에 성공했으면 이미 풀려 있음
+                self.backend.release_hold(self.user_id)
+        except ServiceError:
+            show_service_error(self)
+
+    def reserve_best_seat(self):
+        """지금 비어 있는 장애인 좌석 중 출입구에서 가장 가까운 좌석으로 예약을 진행합니다."""
+        try:
+            states = apply_holds(*self.backend.get_seat_board(self.restaurant_name), viewer=self.user_id)
+            best = self.hall.nearest_free_seats(states, k=1)
+            if not best:
+                if self.restaurant_full():
+                    self.offer_waitlist()
+                    return
+                if AppSettings.tts_enabled:
+                    speak("지금 비어 있는 좌석이 없습니다. 배치도에서 좌석을 선택하세요.")
+                QMessageBox.information(self, "좌석 추천", "지금 비어 있는 좌석이 없습니다.\n배치도에서 좌석을 선택하세요.")
+                return
+            seat_name = best[0]
             if AppSettings.tts_enabled:
-                speak("예약 불가: 이미 예약된 좌석이 있습니다.")
-            QMessageBox.warning(self, "예약 불가", "이미 예약된 좌석이 있습니다.")
-            return
-        if is_seat_reserved(self.restaurant_name, seat_name):
-            QMessageBox.warning(self, "예약 불가", "이미 예약된 좌석입니다.")
-            self.refresh_seat_colors()
-            return
+                speak(f"입구에서 {self.hall.entrance_distance[seat_name]}칸 떨어진 좌석 {seat_name}을 예약합니다.")
+            self.try_reserve_seat(seat_name)
+        except ServiceError:
+            show_service_error(self)
+
+    def restaurant_full(self):
+        """오늘 남은 시간에 예약할 수 있는 좌석이 하나도 없으면 True"""
+        availability = self.backend.get_day_availability(self.restaurant_name, self.hall.accessible_seats)
+        return len(availability.minutes) == 0
+
+    def offer_waitlist(self):
+        """모든 좌석이 찼을 때 다음 30분 시간대의 대기 명단 등록을 제안합니다."""
+        try:
+            if not self.restaurant_full():
+                if AppSettings.tts_enabled:
+                    speak("예약할 수 있는 좌석이 있습니다. 좌석을 선택하세요.")
+                QMessageBox.information(self, "대기 등록", "예약할 수 있는 좌석이 있습니다. 좌석을 선택하세요.")
+                return
+            if self.backend.has_existing_reservation(self.user_id):
+                if AppSettings.tts_enabled:
+                    speak("이미 예약된 좌석이 있습니다.")
+                QMessageBox.warning(self, "대기 등록", "이미 예약된 좌석이 있습니다.")
+                return
+
+            now = to_epoch(datetime.datetime.now())
+            slot_start = to_datetime(slot_of(now) + SLOT_SECONDS)
+            slot_label = slot_start.strftime('%H:%M')
+            if AppSettings.tts_enabled:
+                speak(f"모든 좌석이 예약되었습니다. {slot_label} 시간대 대기 명단에 등록하시겠습니까?")
+            reply = QMessageBox.question(
+                self, "대기 등록",
+                f"모든 좌석이 예약되었습니다.\n{slot_label} 시간대 대기 명단에 등록하시겠습니까?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return
+            count = self.backend.join_waitlist(
+                self.user_id, self.restaurant_name, slot_start, slot_start + datetime.timedelta(minutes=30)
+            )
+            self.waiting = True
+            message = f"{slot_label} 시간대 대기 {count}번째로 등록되었습니다. 자리가 나면 자동으로 예약됩니다."
+            if AppSettings.tts_enabled:
+                speak(message)
+            QMessageBox.information(self, "대기 등록", message)
+        except ServiceError:
+            show_service_error(self)
 
-        self.selected_seat = seat_name
-        self.open_time_dialog()
+    def next_free_start(self, seat_name, after):
+        """after 이후 30분 동안 비어 있는 가장 빠른 시작 시간 (분 단위로 올림)"""
+        after = to_epoch(after.replace(second=0, microsecond=0)) + 60
+        duration = 30 * 60
+        start = self.backend.next_free(self.restaurant_name, seat_name, after, duration)
+        if start % 60:
+            start = self.backend.next_free(self.restaurant_name, seat_name, start - start % 60 + 60, duration)
+        return to_datetime(start)
 
-    def open_time_dialog(self):
+    def open_time_dialog(self, suggested_start=None):
         if AppSettings.tts_enabled:
             speak("예약 시간을 선택하세요")
 
@@ -256,109 +1523,335 @@ class SeatReservationDialog(QDialog):
         dialog.setWindowTitle("예약 시간 선택")
         layout = QVBoxLayout()
 
-        time_edit = QTimeEdit()
-        time_edit.setTime(QTime.currentTime())
-        time_edit.setDisplayFormat("HH:mm")
+        # 이 좌석이 비어 있는 시작 시간만 목록으로 제공 (괄호 안은 그 시간의 식당 전체 빈 좌석 수)
+        availability = self.backend.get_day_availability(self.restaurant_name, self.hall.accessible_seats)
+        slots = seat_slots(availability, self.selected_seat)
+        if len(slots) == 0:
+            if len(availability.minutes) == 0:
+                self.offer_waitlist()
+                return
+            if AppSettings.tts_enabled:
+                speak("예약 불가: 오늘은 예약 가능한 시간이 없습니다.")
+            QMessageBox.warning(self, "예약 불가", "오늘은 예약 가능한 시간이 없습니다.")
+            return
+        counts = dict(zip(availability.minutes.tolist(), availability.free_counts.tolist()))
+
+        time_combo = QComboBox()
+        for minute in slots.tolist():
+            time_combo.addItem(f"{minute // 60:02d}:{minute % 60:02d}  (빈 좌석 {counts[minute]}석)", minute)
+
+        def select_time(start):
+            # start 이후 첫 번째 가능한 시간을 선택
+            target = start.hour * 60 + start.minute
+            for i in range(time_combo.count()):
+                if time_combo.itemData(i) >= target:
+                    time_combo.setCurrentIndex(i)
+                    return
+
+        if suggested_start:
+            select_time(suggested_start)
         layout.addWidget(QLabel("예약 시작 시간을 선택하세요"))
-        layout.addWidget(time_edit)
+        layout.addWidget(time_combo)
+        # 체크하면 오늘 한 번이 아니라 평일마다 같은 좌석·시간으로 예약 (규칙 한 줄로 저장)
+        repeat_check = QCheckBox("평일마다 같은 좌석·시간으로 반복 예약")
+        layout.addWidget(repeat_check)
 
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         layout.addWidget(buttons)
         dialog.setLayout(layout)
 
         def confirm_time():
-            start_time = datetime.datetime.combine(datetime.date.today(), time_edit.time().toPyTime())
-            now = datetime.datetime.now()
-            if start_time <= now:
-                if AppSettings.tts_enabled:
-                    speak("현재 시간보다 이후를 선택하세요")
-                QMessageBox.warning(self, "오류", "현재 시간보다 이후를 선택하세요.")
-                return
+            try:
+                minute = time_combo.currentData()
+                start_time = datetime.datetime.combine(
+                    datetime.date.today(), datetime.time(minute // 60, minute % 60)
+                )
+                now = datetime.datetime.now()
+                if start_time <= now:
+                    if AppSettings.tts_enabled:
+                        speak("현재 시간보다 이후를 선택하세요")
+                    QMessageBox.warning(self, "오류", "현재 시간보다 이후를 선택하세요.")
+                    return
+
+                end_time = start_time + datetime.timedelta(minutes=30)
+                # DB에 가기 전에 메모리 인덱스로 겹침을 확인하고, 겹치면 가장 빠른 빈 시간을 제안
+                if self.backend.find_overlap(
+                        self.restaurant_name, self.selected_seat, to_epoch(start_time), to_epoch(end_time)):
+                    suggested = self.next_free_start(self.selected_seat, start_time - datetime.timedelta(minutes=1))
+                    select_time(suggested)
+                    if AppSettings.tts_enabled:
+                        speak(f"이미 예약된 시간입니다. {suggested.strftime('%H:%M')}부터 예약할 수 있습니다.")
+                    QMessageBox.warning(
+                        self, "예약 불가",
+                        f"이미 예약된 시간입니다.\n{suggested.strftime('%H:%M')}부터 예약할 수 있습니다."
+                    )
+                    return
 
-            if is_seat_reserved(self.restaurant_name, self.selected_seat):
+                if repeat_check.isChecked():
+                    result = self.backend.add_recurring_rule(
+                        self.user_id, self.restaurant_name, self.selected_seat, minute, minute + 30
+                    )
+                else:
+                    result = self.backend.reserve(
+                        self.user_id, self.restaurant_name, self.selected_seat, start_time, end_time
+                    )
+                if result.status is ReserveStatus.USER_HAS_RESERVATION:
+                    if AppSettings.tts_enabled:
+                        speak("예약 불가: 이미 예약된 좌석이 있습니다.")
+                    QMessageBox.warning(self, "예약 불가", "이미 예약된 좌석이 있습니다.")
+                    dialog.reject()
+                    return
+                if result.status is ReserveStatus.SEAT_HELD:
+                    if AppSettings.tts_enabled:
+                        speak("예약 불가: 선택 시간이 지나 다른 사용자가 좌석을 선택했습니다.")
+                    QMessageBox.warning(self, "예약 불가", "선택 시간이 지나 다른 사용자가 좌석을 선택했습니다.")
+                    dialog.reject()
+                    self.refresh_seat_colors()
+                    return
+                if result.status is ReserveStatus.SEAT_TAKEN:
+                    if AppSettings.tts_enabled:
+                        speak("예약 불가: 이미 예약된 좌석입니다.")
+                    QMessageBox.warning(self, "예약 불가", "이미 예약된 좌석입니다.")
+                    self.refresh_seat_colors()
+                    return
+
+                dialog.accept()
+                if repeat_check.isChecked():
+                    rule = self.backend.get_user_rule(self.user_id)
+                    message = f"평일마다 {start_time.strftime('%H:%M')}에 반복 예약되었습니다."
+                    if AppSettings.tts_enabled:
+                        speak(message)
+                    QMessageBox.information(self, "예약 완료", message)
+                    self.rule_label.setText(self.rule_text(rule))
+                    self.refresh_seat_colors()
+                    return
                 if AppSettings.tts_enabled:
-                    speak("예약 불가: 이미 예약된 좌석입니다.")
-                QMessageBox.warning(self, "예약 불가", "이미 예약된 좌석입니다.")
+                    speak(f"{start_time.strftime('%H:%M')}에 예약되었습니다.")
+                QMessageBox.information(self, "예약 완료", f"{start_time.strftime('%H:%M')}에 예약되었습니다.")
+                self.reservation_label.setText(
+                    f"현재 예약: {self.selected_seat}, {start_time.strftime('%H:%M')} ~ {end_time.strftime('%H:%M')}"
+                )
                 self.refresh_seat_colors()
-                return
-
-            end_time = start_time + datetime.timedelta(minutes=30)
-            save_reservation(self.user_id, self.restaurant_name, self.selected_seat, start_time, end_time)
-            dialog.accept()
-            if AppSettings.tts_enabled:
-                speak(f"{start_time.strftime('%H:%M')}에 예약되었습니다.")
-            QMessageBox.information(self, "예약 완료", f"{start_time.strftime('%H:%M')}에 예약되었습니다.")
-            self.reservation_label.setText(
-                f"현재 예약: {self.selected_seat}, {start_time.strftime('%H:%M')} ~ {end_time.strftime('%H:%M')}"
-            )
-            self.refresh_seat_colors()
+            except ServiceError:
+                show_service_error(self)
 
         buttons.accepted.connect(confirm_time)
         buttons.rejected.connect(dialog.reject)
         dialog.exec_()
 
     def on_cancel_reservation(self):
-        res = get_user_reservation(self.user_id)
-        if not res:
+        try:
+            res = self.backend.get_user_reservation(self.user_id)
+            if not res and self.backend.leave_waitlist(self.user_id):
+                self.waiting = False
+                if AppSettings.tts_enabled:
+                    speak("대기 등록이 취소되었습니다.")
+                QMessageBox.information(self, "대기 취소", "대기 등록이 취소되었습니다.")
+                return
+            if not res and self.backend.get_user_rule(self.user_id):
+                self.cancel_recurring_rule()
+                return
+            if not res:
+                if AppSettings.tts_enabled:
+                    speak("취소할 예약이 없습니다.")
+                QMessageBox.information(self, "예약 없음", "취소할 예약이 없습니다.")
+                return
             if AppSettings.tts_enabled:
-                speak("취소할 예약이 없습니다.")
-            QMessageBox.information(self, "예약 없음", "취소할 예약이 없습니다.")
-            return
-        if AppSettings.tts_enabled:
-            speak("예약을 취소하시겠습니까?")
-        reply = QMessageBox.question(self, "예약 취소", "예약을 취소하시겠습니까?", QMessageBox.Yes | QMessageBox.No)
-        if reply == QMessageBox.Yes:
-            cancel_reservation(self.user_id)
+                speak("예약을 취소하시겠습니까?")
+            reply = QMessageBox.question(self, "예약 취소", "예약을 취소하시겠습니까?", QMessageBox.Yes | QMessageBox.No)
+            if reply == QMessageBox.Yes:
+                promotions = self.backend.cancel_reservation(self.user_id)
+                if AppSettings.tts_enabled:
+                    speak("취소 완료: 예약이 취소되었습니다.")
+                QMessageBox.information(self, "취소 완료", "예약이 취소되었습니다.")
+                for promotion in promotions:
+                    # 비게 된 좌석이 대기자에게 자동 배정됨
+                    # 다른 사용자의 아이디는 화면/음성으로 알리지 않음
+                    message = (
+                        f"좌석 {promotion.seat} ({format_time(promotion.start_time, '%H:%M')})이 "
+                        f"대기 중이던 분에게 배정되었습니다."
+                    )
+                    if AppSettings.tts_enabled:
+                        speak(message)
+                    QMessageBox.information(self, "대기 좌석 배정", message)
+                self.reservation_label.setText("현재 예약 없음")
+                self.refresh_seat_colors()
+        except ServiceError:
+            show_service_error(self)
+
+    def cancel_recurring_rule(self):
+        """일회성 예약이 없고 반복 예약만 있을 때 규칙 전체를 해지합니다."""
+        try:
             if AppSettings.tts_enabled:
-                speak("취소 완료: 예약이 취소되었습니다.")
-            QMessageBox.information(self, "취소 완료", "예약이 취소되었습니다.")
-            self.reservation_label.setText("현재 예약 없음")
+                speak("반복 예약을 해지하시겠습니까?")
+            reply = QMessageBox.question(
+                self, "반복 예약 해지", "반복 예약을 해지하시겠습니까?", QMessageBox.Yes | QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return
+            self.backend.cancel_recurring_rule(self.user_id)
+            if AppSettings.tts_enabled:
+                speak("반복 예약이 해지되었습니다.")
+            QMessageBox.information(self, "해지 완료", "반복 예약이 해지되었습니다.")
+            self.rule_label.setText("")
             self.refresh_seat_colors()
+        except ServiceError:
+            show_service_error(self)
 
 # ──────────────────────────────────────────────────────────────────────────────────
 def reserve_seat(parent, restaurant_name, user_id):
-    init_db()  # DB 초기화
-    dialog = SeatReservationDialog(parent, restaurant_name, user_id)
+    if not AppSettings.service_url:
+        init_db()  # 이미 마이그레이션된 경우 바로 반환 (서비스 모드에서는 서비스가 담당)
+    try:
+        dialog = SeatReservationDialog(parent, restaurant_name, user_id)
+    except ServiceError:
+        show_service_error(parent)
+        return
     dialog.exec_()
 
-def save_user(user_id, password, question, answer, cert_path=None):
+def save_user(user_id, password, question, answer, cert_path=None, cert_hash=None):
     """
-    - cert_path가 주어지면 파일을 바이너리 모드로 읽어 cert_blob 칼럼에 저장합니다.
-    - cert_path는 그대로 TEXT 칼럼에도 저장합니다.
+    - cert_path가 새로 첨부한 파일이면 인증서 저장소(cert_store)에 넣고 해시를 cert_hash 칼럼에 저장합니다.
+      같은 내용의 이미지가 이미 있으면 다시 쓰지 않습니다.
+    - 관리자 표에 쓸 썸네일도 이때 한 번 만들어 원본 옆에 저장합니다.
+    - cert_hash를 주면(기존 이미지 또는 upload_pipeline으로 이미 저장한 이미지) 파일을 읽지 않고 그대로 씁니다.
+    - cert_path 칼럼에는 화면 표시용 파일 이름만 저장합니다.
     """
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-
-    # cert_blob 읽기
-    cert_blob = None
-    if cert_path and os.path.isfile(cert_path):
-        try:
-            with open(cert_path, "rb") as f:
-                cert_blob = f.read()
-        except Exception:
-            cert_blob = None
-
+    if cert_hash is None and cert_path and os.path.isfile(cert_path):
+        cert_hash = store_cert_file(cert_path)
+        cert_path = os.path.basename(cert_path)
     # UPSERT(INSERT OR REPLACE)
-    c.execute("""
-        INSERT OR REPLACE INTO users
-            (user_id, password, security_question, security_answer, cert_path, cert_blob)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (user_id, password, question, answer, cert_path, cert_blob))
-
-    conn.commit()
-    conn.close()
+    with db.transaction() as c:
+        c.execute("""
+            INSERT OR REPLACE INTO users
+                (user_id, password, security_question, security_answer, cert_path, cert_hash)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, password, question, answer, cert_path, cert_hash))
 
 def get_user(user_id):
     """
-    - users 테이블에서 (user_id, password, question, answer, cert_path, cert_blob)을 반환합니다.
+    - users 테이블에서 (user_id, password, question, answer, cert_path, cert_hash)을 반환합니다.
+    - 이미지는 읽지 않습니다. 필요한 화면에서 load_cert_image(cert_hash)로 읽습니다.
     """
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("""
-        SELECT user_id, password, security_question, security_answer, cert_path, cert_blob
+    c = db.execute("""
+        SELECT user_id, password, security_question, security_answer, cert_path, cert_hash
         FROM users
         WHERE user_id = ?
     """, (user_id,))
-    user = c.fetchone()
-    conn.close()
-    return user
+    return c.fetchone()
+
+# ─── 화면별 좁은 사용자 조회 (필요한 칼럼만 읽음) ───────────────────────────────────
+# user_id가 기본 키라 행 하나만 찾으며, 이미지나 쓰지 않는 칼럼은 읽지 않습니다.
+# 예전 cert_blob이 남아 있는 행이라도 그 뒤쪽 오버플로 페이지까지 따라가지 않습니다.
+def get_user_credentials(user_id):
+    """로그인/가입 중복 확인용 (user_id, password) 또는 None"""
+    c = db.execute("SELECT user_id, password FROM users WHERE user_id = ?", (user_id,))
+    return c.fetchone()
+
+def get_security_qa(user_id):
+    """비밀번호 찾기용 (security_question, security_answer) 또는 None"""
+    c = db.execute(
+        "SELECT security_question, security_answer FROM users WHERE user_id = ?", (user_id,)
+    )
+    return c.fetchone()
+
+def get_user_profile(user_id):
+    """개인정보 화면 표시용 (user_id, cert_path, cert_hash) 또는 None"""
+    c = db.execute("SELECT user_id, cert_path, cert_hash FROM users WHERE user_id = ?", (user_id,))
+    return c.fetchone()
+
+# ─── 화면용 계정 확인/변경 (비밀번호와 보안 답변은 이 함수 밖으로 내보내지 않음) ───────────
+# 예약 서비스 모드에서도 키오스크는 결과(True/False)만 받습니다.
+def _same_secret(stored, given):
+    # 비교 시간으로 앞부분이 맞았는지 알 수 없게 (한글도 비교되도록 bytes로)
+    return stored is not None and given is not None and hmac.compare_digest(
+        stored.encode("utf-8"), given.encode("utf-8"))
+
+def check_login(user_id, password):
+    """학번과 비밀번호가 맞으면 True"""
+    row = get_user_credentials(user_id)
+    return row is not None and _same_secret(row[1], password)
+
+def user_exists(user_id):
+    c = db.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,))
+    return c.fetchone() is not None
+
+def get_security_question(user_id):
+    """비밀번호 찾기 화면에 띄울 질문 (답은 돌려주지 않음). 없는 학번이면 None."""
+    row = get_security_qa(user_id)
+    return row[0] if row else None
+
+def check_security_answer(user_id, answer):
+    row = get_security_qa(user_id)
+    return row is not None and _same_secret(row[1], answer)
+
+def reset_password(user_id, answer, new_password):
+    """보안 답변이 맞으면 비밀번호를 바꾸고 True. (답변 확인과 변경을 한 트랜잭션에서)"""
+    with db.transaction(immediate=True) as c:
+        row = c.execute("SELECT security_answer FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None or not _same_secret(row[0], answer):
+            return False
+        c.execute("UPDATE users SET password = ? WHERE user_id = ?", (new_password, user_id))
+    return True
+
+def create_user(user_id, password, question, answer, cert_path=None, cert_hash=None):
+    """
+    - 새 계정을 저장하고 True를 반환합니다. 이미 있는 학번이면 덮어쓰지 않고 False.
+    - 첨부 이미지는 store_cert_file(또는 예약 서비스의 업로드)로 먼저 저장하고 해시만 받습니다.
+    """
+    with db.transaction(immediate=True) as c:
+        c.execute("""
+            INSERT OR IGNORE INTO users
+                (user_id, password, security_question, security_answer, cert_path, cert_hash)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, password, question, answer, cert_path, cert_hash))
+        return c.rowcount == 1
+
+def update_profile(user_id, password=None, cert_path=None, cert_hash=None):
+    """
+    - 개인정보 화면의 변경을 저장합니다. None인 항목은 그대로 둡니다. (cert_path는 cert_hash와 함께 바뀜)
+    - 보안 질문/답변은 바꾸지 않습니다. 학번이 없으면 False.
+    """
+    with db.transaction(immediate=True) as c:
+        c.execute("""
+            UPDATE users
+            SET password = COALESCE(?, password),
+                cert_path = CASE WHEN ? IS NULL THEN cert_path ELSE ? END,
+                cert_hash = COALESCE(?, cert_hash)
+            WHERE user_id = ?
+        """, (password or None, cert_hash, cert_path, cert_hash, user_id))
+        return c.rowcount == 1
+
+def load_cert_image(cert_hash):
+    """인증서 이미지 bytes (없으면 None)"""
+    return cert_store.get(cert_hash)
+
+def store_cert_file(path, progress=None):
+    """
+    - 첨부 이미지를 인증서 저장소에 넣고 관리자 표용 썸네일을 만든 뒤 해시를 반환합니다.
+    - 저장하기 전에 썸네일 크기로 디코딩해 보고, 이미지로 읽을 수 없으면 저장하지 않고 None.
+      (저장소에 아무도 가리키지 않는 파일이 남지 않음)
+    - progress는 BlobStore.put_file과 같습니다.
+    """
+    image = scaled_image(path, THUMB_SIZE)
+    if image is None:
+        return None
+    cert_hash = cert_store.put_file(path, progress=progress)
+    save_thumbnail(cert_store, cert_hash, image)  # 실패해도 관리자 화면이 처음 볼 때 다시 만듦
+    return cert_hash
+
+def store_cert_upload(writer):
+    """
+    - store_cert_file과 같지만 예약 서비스가 조각으로 받은 첨부 파일(BlobStore.open_writer())을 받습니다.
+    - 이미지가 아니면 임시 파일을 지우고 None.
+    """
+    try:
+        writer.flush()
+        image = scaled_image(writer.path, THUMB_SIZE)
+        if image is None:
+            return None
+        cert_hash = writer.commit()
+        save_thumbnail(cert_store, cert_hash, image)
+        return cert_hash
+    finally:
+        writer.abort()
@@ -6,6 +6,7 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 from datetime import datetime
 from PyQt5.QtGui import QFont
+from db_worker import run_async
 
 DB_FILE = "review.db"
 
@@ -22,6 +23,8 @@ def init_database():
             timestamp TEXT NOT NULL
         )
     """)
+    # 최신순 목록(관리자 화면 페이지 나누기)이 정렬 없이 인덱스를 따라 읽도록
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_timestamp ON reviews (timestamp, id)")
     conn.commit()
     conn.close()
 
@@ -83,6 +86,7 @@ class ReviewDialog(QDialog):
         self.restaurant_name = restaurant_name
         self.user_id = user_id
         self.current_edit_id = None
+        self.load_task = None
         self.init_ui()
 
     def init_ui(self):
@@ -175,8 +179,20 @@ class ReviewDialog(QDialog):
             star.setText("★" if i < self.rating_value else "☆")
 
     def load_reviews(self):
+        # 조회는 작업 스레드에서, 목록 채우기는 결과가 도착하면 (창이 닫히면 취소)
+        if self.load_task is not None:
+            self.load_task.cancel()
+        self.load_task = run_async(get_all_reviews, on_result=self.show_reviews,
+                                   on_error=self.show_load_error, owner=self)
+
+    def show_load_error(self, error):
+        self.load_task = None
+        QMessageBox.warning(self, "불러오기 오류", f"후기 목록을 불러오지 못했습니다.\n{error}")
+
+    def show_reviews(self, reviews):
+        self.load_task = None
         self.review_list.clear()
-        self.reviews = get_all_reviews()
+        self.reviews = reviews
         for review_id, writer_id, text, rating, timestamp in self.reviews:
             stars = "★" * rating + "☆" * (5 - rating)
             display_text = f"[{timestamp}] ({writer_id}) {stars}\n{text}"
@@ -0,0 +1,147 @@
+# seat_layout.py
+import json
+import os
+from collections import deque, namedtuple
+from functools import lru_cache
+
+LAYOUT_DIR = os.path.join(os.path.dirname(__file__), "layouts")
+
+# 배치도 문자
+ACCESSIBLE_SEAT = "1"   # 장애인 전용 좌석 (예약 가능)
+GENERAL_SEAT = "0"      # 일반 좌석 (표시만)
+AISLE = "-"             # 통로
+PILLAR = "3"            # 기둥
+BLANK = " "             # 빈 공간
+ENTRANCE = "E"          # 출입구
+
+# 통로/빈 공간/출입구는 지나갈 수 있고, 좌석과 기둥은 지나갈 수 없음
+WALKABLE = {AISLE, BLANK, ENTRANCE}
+
+# id: "행-열" (예약 DB의 seat 값과 같음), attributes: 배치도 파일의 seat_attributes 항목
+Seat = namedtuple("Seat", "id row col accessible attributes")
+
+
+class CompiledLayout:
+    """
+    - 배치도 파일을 한 번 해석해 둔 결과입니다. 대화상자마다 다시 파싱하지 않습니다.
+    - seats: 좌석 id → Seat (O(1) 조회)
+    - neighbors: 좌석 id → 상하좌우로 붙어 있는 좌석 id 튜플
+    - cells: 원본 격자 문자열 목록 (그리기용)
+    - entrance_distance: 좌석 id → 출입구에서 걸어서 가는 칸 수 (갈 수 없으면 없음)
+    - accessible_by_distance: 장애인 좌석 id를 출입구에서 가까운 순으로 정렬한 목록
+    """
+
+    def __init__(self, name, grid, entrances=(), seat_attributes=None):
+        seat_attributes = seat_attributes or {}
+        self.name = name
+        self.cells = list(grid)
+        self.rows = len(self.cells)
+        self.cols = max((len(line) for line in self.cells), default=0)
+        self.entrances = [tuple(pos) for pos in entrances]
+        self.pillars = set()
+        self.aisles = set()
+        self.seats = {}
+        self._positions = {}
+
+        for r, line in enumerate(self.cells):
+            for c, ch in enumerate(line):
+                if ch in (ACCESSIBLE_SEAT, GENERAL_SEAT):
+                    seat_id = f"{r}-{c}"
+                    seat = Seat(seat_id, r, c, ch == ACCESSIBLE_SEAT, seat_attributes.get(seat_id, {}))
+                    self.seats[seat_id] = seat
+                    self._positions[(r, c)] = seat
+                elif ch == PILLAR:
+                    self.pillars.add((r, c))
+                elif ch == AISLE:
+                    self.aisles.add((r, c))
+                elif ch == ENTRANCE:
+                    self.entrances.append((r, c))
+
+        self.accessible_seats = [s.id for s in self.seats.values() if s.accessible]
+        self.neighbors = {
+            seat.id: tuple(
+                self._positions[(seat.row + dr, seat.col + dc)].id
+                for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                if (seat.row + dr, seat.col + dc) in self._positions
+            )
+            for seat in self.seats.values()
+        }
+        self.entrance_distance = self._measure_entrance_distances()
+        self.accessible_by_distance = sorted(
+            (seat_id for seat_id in self.accessible_seats if seat_id in self.entrance_distance),
+            key=lambda seat_id: (self.entrance_distance[seat_id], self.seats[seat_id].row, self.seats[seat_id].col)
+        )
+
+    def _measure_entrance_distances(self):
+        """
+        - 출입구들에서 동시에 너비 우선 탐색(BFS)을 해 걸어갈 수 있는 칸까지의 거리를 구합니다.
+        - 좌석과 기둥은 지나갈 수 없고, 좌석까지의 거리는 붙어 있는 통로 칸 거리 + 1입니다.
+        - 출입구가 격자 바깥 테두리에 있을 수 있으므로 격자 둘레 한 칸까지는 걸을 수 있다고 봅니다.
+        """
+        walk = {}
+        queue = deque()
+        for pos in self.entrances:
+            if pos not in walk:
+                walk[pos] = 0
+                queue.append(pos)
+        distance = {}
+        while queue:
+            r, c = queue.popleft()
+            steps = walk[(r, c)]
+            for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                pos = (r + dr, c + dc)
+                if not (-1 <= pos[0] <= self.rows and -1 <= pos[1] <= self.cols):
+                    continue
+                seat = self._positions.get(pos)
+                if seat is not None:
+                    if seat.id not in distance:
+                        distance[seat.id] = steps + 1
+                elif pos not in walk and self.cell(*pos) in WALKABLE:
+                    walk[pos] = steps + 1
+                    queue.append(pos)
+        return distance
+
+    def nearest_free_seats(self, taken, k=3):
+        """
+        - taken(예약/사용 중인 좌석 id 모음)에 없는 장애인 좌석을 출입구에서 가까운 순으로 최대 k개 반환합니다.
+        - 거리는 미리 정렬해 두었으므로 앞에서부터 찬 좌석만 건너뛰면 됩니다.
+        """
+        free = []
+        for seat_id in self.accessible_by_distance:
+            if seat_id not in taken:
+                free.append(seat_id)
+                if len(free) == k:
+                    break
+        return free
+
+    def cell(self, row, col):
+        """격자 밖이면 BLANK를 반환합니다."""
+        if 0 <= row < self.rows and 0 <= col < len(self.cells[row]):
+            return self.cells[row][col]
+        return BLANK
+
+    def seat_at(self, row, col):
+        return self._positions.get((row, col))
+
+
+def layout_path(restaurant):
+    path = os.path.join(LAYOUT_DIR, f"{restaurant}.json")
+    if not os.path.isfile(path):
+        path = os.path.join(LAYOUT_DIR, "default.json")
+    return path
+
+
+@lru_cache(maxsize=None)
+def load_layout(restaurant):
+    """
+    - layouts/<식당 이름>.json (없으면 default.json)을 읽어 CompiledLayout으로 만듭니다.
+    - 결과는 프로세스 안에서 캐시되어 다음 대화상자부터는 파일을 읽지 않습니다.
+    """
+    with open(layout_path(restaurant), encoding="utf-8") as f:
+        data = json.load(f)
+    return CompiledLayout(
+        data.get("name", restaurant),
+        data["grid"],
+        data.get("entrances", []),
+        data.get("seat_attributes", {}),
+    )
@@ -0,0 +1,148 @@
+# seat_map_view.py
+from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem, QStyleOptionGraphicsItem
+from PyQt5.QtGui import QColor, QPainter, QPen, QBrush, QFont
+from PyQt5.QtCore import Qt, QRectF, pyqtSignal
+
+from seat_layout import PILLAR, AISLE, ENTRANCE
+
+CELL = 30  # 격자 한 칸 크기 (버튼 배치도와 같음)
+
+STATE_COLORS = {
+    "free": QColor("green"),
+    "upcoming": QColor("gray"),
+    "held": QColor("orange"),
+    "in_use": QColor("red"),
+}
+GENERAL_SEAT_COLOR = QColor("#a0d6a0")
+PILLAR_COLOR = QColor("black")
+AISLE_COLOR = QColor("#eeeeee")
+ENTRANCE_COLOR = QColor("#ffe082")
+
+
+class SeatItem(QGraphicsItem):
+    """
+    - 좌석 하나를 그리는 가벼운 아이템입니다. (위젯/스타일시트 없음)
+    - 확대 비율(level of detail)에 따라 그리는 양을 줄입니다.
+      멀리서는 색 사각형만, 가까이에서는 테두리와 좌석 번호까지 그립니다.
+    """
+
+    def __init__(self, seat):
+        super().__init__()
+        self.seat = seat
+        self.state = "free" if seat.accessible else None
+        self.enabled = seat.accessible
+        self.setPos(seat.col * CELL, seat.row * CELL)
+        self.setAcceptedMouseButtons(Qt.NoButton)  # 클릭 판정은 뷰에서 처리 (끌기 이동과 구분)
+
+    def boundingRect(self):
+        return QRectF(0, 0, CELL, CELL)
+
+    def set_state(self, state, enabled):
+        if state == self.state and enabled == self.enabled:
+            return
+        self.state = state
+        self.enabled = enabled
+        self.update()  # 이 좌석 영역만 다시 그리도록 예약 (화면 밖이면 비용 없음)
+
+    def paint(self, painter, option, widget=None):
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        rect = QRectF(1, 1, CELL - 2, CELL - 2)
+        color = STATE_COLORS[self.state] if self.seat.accessible else GENERAL_SEAT_COLOR
+        if lod < 0.4:
+            painter.fillRect(rect, color)
+            return
+        painter.setPen(QPen(Qt.black if self.seat.accessible else Qt.NoPen))
+        painter.setBrush(QBrush(color))
+        painter.drawRoundedRect(rect, 4, 4)
+        if lod >= 1.5 and self.seat.accessible:
+            painter.setPen(Qt.white)
+            painter.setFont(QFont("Arial", 6))
+            painter.drawText(rect, Qt.AlignCenter, "♿\n" + self.seat.id)
+
+
+class SeatMapView(QGraphicsView):
+    """
+    - 큰 식당용 좌석 배치도입니다. 좌석마다 위젯을 만들지 않고 QGraphicsScene 아이템으로 그립니다.
+    - 장면의 BSP 색인 덕분에 그리기는 화면에 보이는 좌석만, 갱신은 바뀐 좌석만 처리합니다.
+    - 휠/+,- 키로 확대·축소, 끌어서 이동, 클릭한 예약 가능 좌석은 seat_clicked(id)로 알립니다.
+    """
+    seat_clicked = pyqtSignal(str)
+
+    MIN_ZOOM = 0.1
+    MAX_ZOOM = 6.0
+
+    def __init__(self, hall, parent=None):
+        super().__init__(parent)
+        self.hall = hall
+        self.zoom = 1.0
+        self._press_pos = None
+
+        scene = QGraphicsScene(self)
+        scene.setSceneRect(0, 0, hall.cols * CELL, hall.rows * CELL)
+        self.items_by_seat = {}
+        for seat in hall.seats.values():
+            item = SeatItem(seat)
+            scene.addItem(item)
+            self.items_by_seat[seat.id] = item
+        self.setScene(scene)
+
+        self.setRenderHint(QPainter.Antialiasing, False)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
+        self.setOptimizationFlag(QGraphicsView.DontSavePainterState)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setBackgroundBrush(Qt.white)
+
+    # ─── 상태 갱신 ────────────────────────────────────────────────────────────
+    def set_seat_state(self, seat_id, state, enabled):
+        self.items_by_seat[seat_id].set_state(state, enabled)
+
+    # ─── 배경(기둥/통로/입구): 보이는 영역의 칸만 그림 ────────────────────────────
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        first_row = max(0, int(rect.top()) // CELL)
+        last_row = min(self.hall.rows - 1, int(rect.bottom()) // CELL)
+        first_col = max(0, int(rect.left()) // CELL)
+        last_col = min(self.hall.cols - 1, int(rect.right()) // CELL)
+        for r in range(first_row, last_row + 1):
+            line = self.hall.cells[r]
+            for c in range(first_col, min(last_col, len(line) - 1) + 1):
+                ch = line[c]
+                if ch == PILLAR:
+                    painter.fillRect(c * CELL, r * CELL, CELL, CELL, PILLAR_COLOR)
+                elif ch == AISLE:
+                    painter.fillRect(c * CELL, r * CELL, CELL, CELL, AISLE_COLOR)
+                elif ch == ENTRANCE:
+                    painter.fillRect(c * CELL, r * CELL, CELL, CELL, ENTRANCE_COLOR)
+
+    # ─── 확대/축소 ──────────────────────────────────────────────────────────────
+    def set_zoom(self, zoom):
+        zoom = max(self.MIN_ZOOM, min(self.MAX_ZOOM, zoom))
+        self.scale(zoom / self.zoom, zoom / self.zoom)
+        self.zoom = zoom
+
+    def wheelEvent(self, event):
+        factor = 1.25 if event.angleDelta().y() > 0 else 0.8
+        self.set_zoom(self.zoom * factor)
+
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key_Plus, Qt.Key_Equal):
+            self.set_zoom(self.zoom * 1.25)
+        elif event.key() == Qt.Key_Minus:
+            self.set_zoom(self.zoom * 0.8)
+        else:
+            super().keyPressEvent(event)
+
+    # ─── 클릭 판정 (끌기와 구분) ──────────────────────────────────────────────────
+    def mousePressEvent(self, event):
+        self._press_pos = event.pos()
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        if self._press_pos is None or (event.pos() - self._press_pos).manhattanLength() > 4:
+            return
+        self._press_pos = None
+        item = self.itemAt(event.pos())
+        if isinstance(item, SeatItem) and item.seat.accessible and item.enabled:
+            self.seat_clicked.emit(item.seat.id)
@@ -1,3 +1,10 @@
 # settings.py
+import os
+
+
 class AppSettings:
     tts_enabled = True
+    # 예약 서비스 주소 (예: "tcp://192.168.0.10:8765"). 비어 있으면 reservations.db를 직접 사용
+    service_url = os.environ.get("RESERVATION_SERVICE_URL") or None
+    # 예약 서비스의 공유 비밀 (서비스의 --token과 같은 값). 회원가입/개인정보 변경/첨부 업로드에 필요
+    service_token = os.environ.get("RESERVATION_SERVICE_TOKEN") or None
@@ -0,0 +1,114 @@
+# thumbnails.py
+import os
+import tempfile
+
+from PyQt5.QtGui import QImage, QPixmap, QPixmapCache, QColor
+from PyQt5.QtCore import Qt
+
+THUMB_SIZE = 80        # 관리자 사용자 표의 썸네일 크기
+PREVIEW_SIZE = 220     # 관리자 화면 오른쪽 확대 미리보기 크기
+PIXMAP_CACHE_KB = 16 * 1024  # QPixmapCache 상한 (80×80 썸네일 기준 수천 장)
+
+QPixmapCache.setCacheLimit(PIXMAP_CACHE_KB)
+
+
+def thumbnail_path(store, digest):
+    """원본 옆에 저장하는 썸네일 파일 경로 (<해시>.thumb.png)"""
+    return store.path(digest) + ".thumb.png"
+
+
+def scaled_image(data_or_path, size):
+    """
+    - 이미지(bytes 또는 경로)를 size×size 안에 맞게 줄인 QImage를 반환합니다. 읽을 수 없으면 None.
+    - QImage만 쓰므로 작업 스레드에서 호출해도 됩니다.
+    """
+    image = QImage()
+    if isinstance(data_or_path, bytes):
+        image.loadFromData(data_or_path)
+    else:
+        image.load(data_or_path)
+    if image.isNull():
+        return None
+    return image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+
+def make_thumbnail(store, digest):
+    """
+    - 저장소의 원본으로 썸네일 파일을 만듭니다. (예전 업로드를 관리자 화면에서 처음 볼 때)
+    - 이미 있으면 다시 만들지 않습니다. 만든(또는 있던) 경로를 반환하고, 이미지가 아니면 None.
+    """
+    path = thumbnail_path(store, digest)
+    if os.path.isfile(path):
+        return path
+    image = scaled_image(store.path(digest), THUMB_SIZE)
+    if image is None:
+        return None
+    return save_thumbnail(store, digest, image)
+
+
+def save_thumbnail(store, digest, image):
+    """
+    - 이미 THUMB_SIZE로 줄인 QImage를 썸네일 파일로 저장하고 경로를 반환합니다. 실패하면 None.
+    - 업로드 작업과 관리자 화면이 같은 해시를 동시에 만들 수 있으므로 임시 파일 이름은 호출마다 따로 받습니다.
+    """
+    path = thumbnail_path(store, digest)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    if not image.save(tmp_path, "PNG"):
+        os.remove(tmp_path)
+        return None
+    os.replace(tmp_path, path)
+    return path
+
+
+def _placeholder():
+    """썸네일이 없거나 만드는 중일 때 보여 줄 회색 칸 (모든 해시가 같은 QPixmap을 씀)"""
+    pixmap = QPixmapCache.find("cert-thumb-placeholder")
+    if pixmap is None or pixmap.isNull():
+        pixmap = QPixmap(THUMB_SIZE, THUMB_SIZE)
+        pixmap.fill(QColor("#dddddd"))
+        QPixmapCache.insert("cert-thumb-placeholder", pixmap)
+    return pixmap
+
+
+def thumbnail_pixmap(store, digest, on_missing=None):
+    """
+    - 썸네일 QPixmap을 QPixmapCache에서 찾고, 없으면 썸네일 파일(작은 PNG)만 읽어 넣습니다.
+    - 썸네일 파일이 없으면 원본을 여기서 디코딩하지 않습니다. 회색 칸을 그 해시의 캐시에 넣어
+      다시 그릴 때마다 파일을 찾지 않게 하고, on_missing(digest)로 작업 스레드에서 만들도록 알립니다.
+      (만들어지면 forget_thumbnail()로 캐시를 비우고 다시 그림, 이미지가 아니면 회색 칸이 그대로 남음)
+    - GUI 스레드에서만 호출합니다. 이미지가 없으면 None.
+    """
+    if not digest:
+        return None
+    key = "cert-thumb:" + digest
+    pixmap = QPixmapCache.find(key)
+    if pixmap is not None and not pixmap.isNull():
+        return pixmap
+    path = thumbnail_path(store, digest)
+    if os.path.isfile(path):
+        pixmap = QPixmap(path)
+    if pixmap is None or pixmap.isNull():
+        pixmap = _placeholder()
+        if on_missing is not None and store.exists(digest):
+            on_missing(digest)
+    QPixmapCache.insert(key, pixmap)
+    return pixmap
+
+
+def forget_thumbnail(digest):
+    """작업 스레드에서 썸네일 파일을 만든 뒤, 캐시에 넣어 둔 회색 칸을 버립니다. (GUI 스레드)"""
+    QPixmapCache.remove("cert-thumb:" + digest)
+
+
+def cached_preview(digest):
+    """확대 미리보기 QPixmap이 캐시에 있으면 반환합니다. (GUI 스레드)"""
+    pixmap = QPixmapCache.find("cert-preview:" + digest) if digest else None
+    return pixmap if pixmap is not None and not pixmap.isNull() else None
+
+
+def cache_preview(digest, image):
+    """작업 스레드에서 줄여 온 QImage를 QPixmap으로 바꿔 캐시에 넣고 반환합니다. (GUI 스레드)"""
+    pixmap = QPixmap.fromImage(image)
+    QPixmapCache.insert("cert-preview:" + digest, pixmap)
+    return pixmap
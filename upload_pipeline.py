@@ -0,0 +1,105 @@
+# upload_pipeline.py
+import os
+import tempfile
+from collections import namedtuple
+
+from PyQt5.QtGui import QImageReader, QImageIOHandler
+from PyQt5.QtCore import Qt
+
+MAX_UPLOAD_BYTES = 30 * 1024 * 1024  # 이보다 큰 파일은 받지 않음
+MAX_DIMENSION = 2048                 # 긴 변이 이보다 큰 사진은 이 크기로 줄여 저장
+
+# 파일 앞부분(매직 넘버)으로 형식을 확인 (확장자는 믿지 않음)
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+)
+
+# cert_hash: 저장소 해시, file_name: 화면 표시용 원본 파일 이름, resized: 줄여서 저장했는지
+UploadResult = namedtuple("UploadResult", "cert_hash file_name resized")
+
+
+class UploadError(Exception):
+    """첨부 파일을 받을 수 없을 때 (사용자에게 보여 줄 메시지)"""
+
+
+def sniff_format(path):
+    with open(path, "rb") as f:
+        head = f.read(16)
+    for signature, fmt in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return fmt
+    return None
+
+
+def _normalized_copy(path, fmt, tmp_dir):
+    """
+    - 다시 저장해야 하는 사진이면 (임시 파일 경로, 줄였는지)를, 원본 그대로 저장해도 되면 (None, False)를 반환합니다.
+    - 다시 저장하는 경우: 긴 변이 MAX_DIMENSION을 넘거나, 회전 정보(EXIF Orientation)가 있는 휴대폰 사진
+      (회전 정보는 크기와 관계없이 반영해야 저장본과 썸네일이 똑바로 보임)
+    - QImageReader.setScaledSize로 읽으면서 줄이므로 원본 크기의 이미지를 메모리에 만들지 않습니다. (JPEG)
+    - 움직이는 GIF는 그대로 둡니다.
+    """
+    if fmt == "gif":
+        return None, False
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if not size.isValid():
+        raise UploadError("이미지를 읽을 수 없습니다.")
+    resize = max(size.width(), size.height()) > MAX_DIMENSION
+    rotated = reader.transformation() != QImageIOHandler.TransformationNone
+    if not resize and not rotated:
+        return None, False
+    if resize:
+        reader.setScaledSize(size.scaled(MAX_DIMENSION, MAX_DIMENSION, Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        raise UploadError(f"이미지를 읽을 수 없습니다: {reader.errorString()}")
+    out_fmt = "JPEG" if fmt == "jpeg" else "PNG"
+    out_path = os.path.join(tmp_dir, "normalized." + out_fmt.lower())
+    if not image.save(out_path, out_fmt, 90 if out_fmt == "JPEG" else -1):
+        raise UploadError("줄인 이미지를 저장하지 못했습니다.")
+    return out_path, resize
+
+
+def process_upload(path, store_file, progress=None):
+    """
+    - 첨부 이미지 하나를 검사 → (필요하면) 축소/회전 → 조각 단위로 해시하며 저장 → 썸네일 생성 순으로 처리합니다.
+    - 저장과 썸네일은 store_file(경로, progress)가 맡고 해시(이미지가 아니면 None)를 반환합니다.
+      (reservation_backend().store_cert: 이 PC의 저장소 또는 예약 서비스)
+    - 작업 스레드에서 실행합니다. (db_worker.run_async(..., on_progress=...))
+    - progress(done, 100)으로 전체 진행률(%)을 알립니다.
+    - 받을 수 없는 파일이면 UploadError를 올립니다. UploadResult를 반환합니다.
+    """
+    def report(percent):
+        if progress is not None:
+            progress(percent, 100)
+
+    report(0)
+    try:
+        size = os.path.getsize(path)
+    except OSError as e:
+        raise UploadError(f"파일을 열 수 없습니다: {e}") from e
+    if size > MAX_UPLOAD_BYTES:
+        raise UploadError(f"파일이 너무 큽니다. ({MAX_UPLOAD_BYTES // (1024 * 1024)}MB 이하만 가능)")
+    fmt = sniff_format(path)
+    if fmt is None:
+        raise UploadError("PNG, JPEG, GIF, BMP 이미지만 첨부할 수 있습니다.")
+    report(5)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        normalized_path, resized = _normalized_copy(path, fmt, tmp_dir)
+        report(30)
+        source = normalized_path or path
+        # 저장 단계 진행률은 30% ~ 90%
+        cert_hash = store_file(
+            source, progress=lambda done, total: report(30 + 60 * done // max(total, 1))
+        )
+    if cert_hash is None:
+        raise UploadError("이미지를 읽을 수 없습니다.")
+    report(100)
+    return UploadResult(cert_hash, os.path.basename(path), resized)
@@ -0,0 +1,14 @@
+# waitlist.py
+# 빈자리 대기 명단의 시간대/우선순위 정의입니다.
+# 명단 자체는 DB의 waitlist 테이블에 있습니다. (reservation_utils.join_waitlist / leave_waitlist)
+# (restaurant, slot, priority, id) 인덱스 순서가 곧 배정 순서이므로 따로 힙을 두지 않습니다.
+
+SLOT_SECONDS = 30 * 60  # 대기열 단위 시간대 (30분)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+
+def slot_of(start):
+    """epoch 초 → 그 시각이 속한 30분 시간대의 시작 (대기열 키)"""
+    return start - start % SLOT_SECONDS
@@ -2,26 +2,100 @@
 
 import sys
 import sqlite3
-from io import BytesIO
+from functools import partial
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QTabWidget, QPushButton, QTableWidget, QTableWidgetItem,
-    QLabel, QLineEdit, QMessageBox, QHeaderView
+    QTabWidget, QPushButton, QTableView, QAbstractItemView,
+    QLabel, QLineEdit, QMessageBox, QHeaderView, QCheckBox
 )
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt
+import reservation_utils
+from reservation_utils import format_time, HISTORY_VIEW, load_cert_image, cert_store
+from thumbnails import (
+    make_thumbnail, thumbnail_pixmap, forget_thumbnail, scaled_image, cached_preview, cache_preview,
+    PREVIEW_SIZE
+)
+from db_worker import run_async
+from paged_table import KeysetTableModel
+from review import init_database as init_review_db
 
-# 기존 예약 DB 경로
-RESERVATION_DB_PATH = "reservations.db"
+# 예약 DB는 reservation_utils.db(스레드별 연결, 마이그레이션 적용)를 함께 씀
 # 리뷰 DB 경로
 REVIEW_DB_PATH = "review.db"
 
+
+# ─── 조회 함수 (작업 스레드에서 실행, 위젯에 손대지 않음) ─────────────────────────
+# 모두 키셋 페이지 나누기: after(이전 페이지 마지막 행의 정렬 키) 다음부터 limit개만 읽음
+# OFFSET과 달리 뒤쪽 페이지도 인덱스에서 바로 찾아가므로 표 크기와 관계없이 페이지당 시간이 같음
+def fetch_users_page(keyword, after, limit):
+    cursor = reservation_utils.db.execute("""
+        SELECT user_id, password, security_question, security_answer, cert_hash
+        FROM users
+        WHERE user_id LIKE ? AND user_id > ?
+        ORDER BY user_id
+        LIMIT ?
+    """, (f"%{keyword}%", after if after is not None else "", limit))
+    rows = cursor.fetchall()
+    # 썸네일이 없는 예전 업로드만 여기서(작업 스레드) 한 번 만들어 둠 → 표는 작은 썸네일 파일만 읽음
+    for row in rows:
+        if cert_store.exists(row[4]):
+            make_thumbnail(cert_store, row[4])
+    return rows
+
+
+def fetch_cert_preview(cert_hash):
+    """원본을 읽어 확대 미리보기 크기로 줄인 QImage를 (해시, 이미지)로 반환합니다. (작업 스레드)"""
+    data = load_cert_image(cert_hash)
+    return cert_hash, scaled_image(data, PREVIEW_SIZE) if data else None
+
+
+def fetch_reservations_page(source, keyword, after, limit):
+    cursor = reservation_utils.db.execute(f"""
+        SELECT id, user_id, restaurant, seat, start_time, end_time
+        FROM {source}
+        WHERE user_id LIKE ? AND id > ?
+        ORDER BY id
+        LIMIT ?
+    """, (f"%{keyword}%", after if after is not None else 0, limit))
+    return cursor.fetchall()
+
+
+def fetch_reviews_page(keyword, after, limit):
+    # 최신순: (timestamp, id) 인덱스를 거꾸로 따라 읽음 (같은 시각의 리뷰는 id로 구분)
+    conn = sqlite3.connect(REVIEW_DB_PATH)
+    cursor = conn.cursor()
+    if after is None:
+        cursor.execute("""
+            SELECT id, user_id, review, rating, timestamp
+            FROM reviews
+            WHERE user_id LIKE ?
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        """, (f"%{keyword}%", limit))
+    else:
+        cursor.execute("""
+            SELECT id, user_id, review, rating, timestamp
+            FROM reviews
+            WHERE user_id LIKE ? AND (timestamp, id) < (?, ?)
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        """, (f"%{keyword}%", after[0], after[1], limit))
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+
 class AdminApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("관리자 프로그램 (PyQt5)")
         self.setGeometry(100, 100, 1200, 700)
 
+        self.tasks = {}  # 이름 → 진행 중인 조회 작업 (미리보기, 썸네일 만들기)
+        reservation_utils.init_db()  # 예약 DB 마이그레이션 (처음 여는 DB에서도 탭이 동작하도록)
+        init_review_db()  # 리뷰 테이블과 최신순 인덱스가 없으면 만듦
+
         self.tabs = QTabWidget()
         self.user_tab = QWidget()
         self.reservation_tab = QWidget()
@@ -37,6 +111,40 @@ class AdminApp(QMainWindow):
 
         self.setCentralWidget(self.tabs)
 
+    # ─── 비동기 조회 ────────────────────────────────────────────────────────────
+    def load_async(self, name, fn, *args, on_result):
+        """
+        - fn(*args)를 작업 스레드에서 실행하고 결과를 on_result로 표에 채웁니다.
+        - 같은 이름(name)의 이전 조회가 아직 진행 중이면 취소해 늦게 온 결과가 덮어쓰지 않게 합니다.
+        """
+        previous = self.tasks.get(name)
+        if previous is not None:
+            previous.cancel()
+        self.tasks[name] = run_async(fn, *args, on_result=on_result,
+                                     on_error=self.show_load_error, owner=self)
+
+    def show_load_error(self, error):
+        QMessageBox.warning(self, "오류", f"데이터를 불러오지 못했습니다.\n{error}")
+
+    def closeEvent(self, event):
+        for task in self.tasks.values():
+            task.cancel()
+        super().closeEvent(event)
+
+    def make_table(self, model):
+        """모델을 보여 주는 표. 행 단위 선택, 스크롤이 끝에 닿으면 모델이 다음 페이지를 읽음"""
+        view = QTableView()
+        view.setModel(model)
+        view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        view.setSelectionMode(QAbstractItemView.SingleSelection)
+        view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        return view
+
+    def selected_row(self, view):
+        """선택된 행의 DB 튜플 (없으면 None)"""
+        index = view.currentIndex()
+        return view.model().row_at(index.row()) if index.isValid() else None
+
     # ──────────────────────────────────────────────────────────────────────────
     def init_user_tab(self):
         layout = QHBoxLayout()
@@ -59,16 +167,22 @@ class AdminApp(QMainWindow):
         search_layout.addWidget(btn_reload)
         search_layout.addWidget(btn_delete)
 
-        self.user_table = QTableWidget()
         # 5열: User ID, Password, Question, Answer, 이미지 미리보기
-        self.user_table.setColumnCount(5)
-        self.user_table.setHorizontalHeaderLabels([
-            "User ID", "Password", "Security Question", "Answer", "이미지 미리보기"
-        ])
-        # “이미지 미리보기” 열 너비 고정
+        self.user_model = KeysetTableModel(
+            ["User ID", "Password", "Security Question", "Answer", "이미지 미리보기"],
+            key_of=lambda row: row[0],
+            display=self.user_cell_text,
+            decoration=self.user_cell_thumbnail,
+            on_error=self.show_load_error,
+            parent=self,
+        )
+        self.user_table = self.make_table(self.user_model)
+        # “이미지 미리보기” 열 너비 고정, 썸네일(80×80)이 들어가도록 행 높이 고정
         self.user_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.Fixed)
         self.user_table.setColumnWidth(4, 100)
-        self.user_table.cellClicked.connect(self.on_user_table_click)
+        self.user_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.user_table.verticalHeader().setDefaultSectionSize(84)
+        self.user_table.clicked.connect(self.on_user_table_click)
 
         left_layout.addLayout(search_layout)
         left_layout.addWidget(self.user_table)
@@ -91,110 +205,75 @@ class AdminApp(QMainWindow):
 
     def load_users(self):
         """
-        - users 테이블에서 cert_blob까지 함께 읽어와 테이블에 표시합니다.
-        - cert_blob이 있으면 썸네일로, 없으면 “없음”을 표시합니다.
+        - users 테이블을 user_id 순으로 페이지 단위로 읽어 표시합니다. (cert_hash까지, 이미지는 읽지 않음)
+        - 인증서 이미지가 있으면 썸네일로, 없으면 “없음”을 표시합니다.
+        - 조회는 작업 스레드에서 하고, 표는 스크롤할 때 다음 페이지를 이어 붙입니다.
         """
-        conn = sqlite3.connect(RESERVATION_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT user_id, password, security_question, security_answer, cert_blob
-            FROM users
-        """)
-        rows = cursor.fetchall()
-        conn.close()
-
-        self.user_table.setRowCount(len(rows))
-        for i, (uid, pw, q, a, blob) in enumerate(rows):
-            self.user_table.setItem(i, 0, QTableWidgetItem(uid))
-            self.user_table.setItem(i, 1, QTableWidgetItem(pw))
-            self.user_table.setItem(i, 2, QTableWidgetItem(q))
-            self.user_table.setItem(i, 3, QTableWidgetItem(a))
-
-            if blob:
-                pixmap = QPixmap()
-                pixmap.loadFromData(blob)
-                thumb = pixmap.scaled(80, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                thumb_label = QLabel()
-                thumb_label.setPixmap(thumb)
-                thumb_label.setAlignment(Qt.AlignCenter)
-                self.user_table.setCellWidget(i, 4, thumb_label)
-            else:
-                no_label = QLabel("없음")
-                no_label.setAlignment(Qt.AlignCenter)
-                self.user_table.setCellWidget(i, 4, no_label)
+        self.user_model.reset(partial(fetch_users_page, ""))
 
     def search_users(self):
         keyword = self.search_input.text().strip()
-        if not keyword:
-            self.load_users()
-            return
-
-        conn = sqlite3.connect(RESERVATION_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT user_id, password, security_question, security_answer, cert_blob
-            FROM users
-            WHERE user_id LIKE ?
-        """, (f"%{keyword}%",))
-        rows = cursor.fetchall()
-        conn.close()
-
-        self.user_table.setRowCount(len(rows))
-        for i, (uid, pw, q, a, blob) in enumerate(rows):
-            self.user_table.setItem(i, 0, QTableWidgetItem(uid))
-            self.user_table.setItem(i, 1, QTableWidgetItem(pw))
-            self.user_table.setItem(i, 2, QTableWidgetItem(q))
-            self.user_table.setItem(i, 3, QTableWidgetItem(a))
-            if blob:
-                pixmap = QPixmap()
-                pixmap.loadFromData(blob)
-                thumb = pixmap.scaled(80, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                thumb_label = QLabel()
-                thumb_label.setPixmap(thumb)
-                thumb_label.setAlignment(Qt.AlignCenter)
-                self.user_table.setCellWidget(i, 4, thumb_label)
-            else:
-                no_label = QLabel("없음")
-                no_label.setAlignment(Qt.AlignCenter)
-                self.user_table.setCellWidget(i, 4, no_label)
+        self.user_model.reset(partial(fetch_users_page, keyword))
+
+    @staticmethod
+    def user_cell_text(row, column):
+        if column < 4:
+            return row[column]
+        return None if row[4] else "없음"
+
+    def user_cell_thumbnail(self, row, column):
+        # 화면에 보이는 행만 호출됨 → 원본은 디코딩하지 않고 미리 만든 썸네일을 QPixmapCache에서 꺼냄
+        # 썸네일 파일이 없으면 회색 칸을 보여 주고 작업 스레드에서 만듦
+        if column == 4:
+            return thumbnail_pixmap(cert_store, row[4], on_missing=self.make_thumbnail_async)
+        return None
+
+    def make_thumbnail_async(self, cert_hash):
+        self.load_async("thumb:" + cert_hash, make_thumbnail, cert_store, cert_hash,
+                        on_result=partial(self.thumbnail_made, cert_hash))
+
+    def thumbnail_made(self, cert_hash, path):
+        self.tasks.pop("thumb:" + cert_hash, None)
+        if path is not None:  # 이미지가 아니면 회색 칸을 캐시에 그대로 둠 (다시 디코딩하지 않음)
+            forget_thumbnail(cert_hash)
+            self.user_model.column_changed(4)
 
     def delete_user(self):
-        selected = self.user_table.currentRow()
-        if selected == -1:
+        selected = self.selected_row(self.user_table)
+        if selected is None:
             QMessageBox.warning(self, "경고", "삭제할 사용자를 선택하세요.")
             return
-        user_id = self.user_table.item(selected, 0).text()
+        user_id = selected[0]
         confirm = QMessageBox.question(
             self, "확인", f"정말로 '{user_id}' 사용자를 삭제하시겠습니까?",
             QMessageBox.Yes | QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            conn = sqlite3.connect(RESERVATION_DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM users WHERE user_id=?", (user_id,))
-            conn.commit()
-            conn.close()
+            with reservation_utils.db.transaction(immediate=True) as c:
+                c.execute("DELETE FROM users WHERE user_id=?", (user_id,))
             self.load_users()
             self.preview_label.setText("이미지 선택 시\n여기에 표시됩니다")
             self.preview_label.setPixmap(QPixmap())
 
-    def on_user_table_click(self, row, column):
+    def on_user_table_click(self, index):
         """
-        - 테이블의 특정 행(row) 클릭 시, 해당 user_id의 cert_blob을 DB에서 다시 가져와 우측에 확대 표시합니다.
+        - 테이블의 특정 행(row) 클릭 시, 해당 사용자의 인증서 이미지를 우측에 확대 표시합니다.
+        - 한 번 본 이미지는 QPixmapCache에서 바로 꺼내고, 처음이면 작업 스레드에서 원본을 읽어 줄입니다.
         """
-        user_id = self.user_table.item(row, 0).text()
-        conn = sqlite3.connect(RESERVATION_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT cert_blob FROM users WHERE user_id = ?", (user_id,))
-        record = cursor.fetchone()
-        conn.close()
-
-        if record and record[0]:
-            blob = record[0]
-            pixmap = QPixmap()
-            pixmap.loadFromData(blob)
-            scaled_pix = pixmap.scaled(220, 220, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.preview_label.setPixmap(scaled_pix)
+        cert_hash = self.user_model.row_at(index.row())[4]
+        cached = cached_preview(cert_hash)
+        if cached is not None:
+            self.preview_label.setPixmap(cached)
+            return
+        if not cert_hash:
+            self.show_preview((None, None))
+            return
+        self.load_async("preview", fetch_cert_preview, cert_hash, on_result=self.show_preview)
+
+    def show_preview(self, result):
+        cert_hash, image = result
+        if image is not None:
+            self.preview_label.setPixmap(cache_preview(cert_hash, image))
         else:
             self.preview_label.setText("이미지 없음")
             self.preview_label.setPixmap(QPixmap())
@@ -202,7 +281,14 @@ class AdminApp(QMainWindow):
     # ──────────────────────────────────────────────────────────────────────────
     def init_reservation_tab(self):
         layout = QVBoxLayout()
-        self.res_table = QTableWidget()
+        self.res_model = KeysetTableModel(
+            ["ID", "User ID", "Restaurant", "Seat", "Start Time", "End Time"],
+            key_of=lambda row: row[0],
+            display=self.reservation_cell_text,
+            on_error=self.show_load_error,
+            parent=self,
+        )
+        self.res_table = self.make_table(self.res_model)
         layout.addWidget(self.res_table)
 
         btn_layout = QHBoxLayout()
@@ -214,7 +300,11 @@ class AdminApp(QMainWindow):
         btn_res_reload.clicked.connect(self.load_reservations)
         btn_res_delete = QPushButton("선택 예약 삭제")
         btn_res_delete.clicked.connect(self.delete_reservation)
+        # 체크 시 월별 보관 테이블의 지난 예약까지 함께 조회 (통합 뷰)
+        self.res_history_check = QCheckBox("지난 예약 포함")
+        self.res_history_check.stateChanged.connect(self.search_reservations)
 
+        btn_layout.addWidget(self.res_history_check)
         btn_layout.addWidget(self.res_search_input)
         btn_layout.addWidget(btn_res_search)
         btn_layout.addWidget(btn_res_reload)
@@ -224,68 +314,53 @@ class AdminApp(QMainWindow):
         self.reservation_tab.setLayout(layout)
         self.load_reservations()
 
+    def reservation_source(self):
+        return HISTORY_VIEW if self.res_history_check.isChecked() else "reservations"
+
     def load_reservations(self):
-        conn = sqlite3.connect(RESERVATION_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, user_id, restaurant, seat, start_time, end_time
-            FROM reservations
-        """)
-        rows = cursor.fetchall()
-        conn.close()
-
-        self.res_table.setRowCount(len(rows))
-        self.res_table.setColumnCount(6)
-        self.res_table.setHorizontalHeaderLabels(
-            ["ID", "User ID", "Restaurant", "Seat", "Start Time", "End Time"]
-        )
-        for i, row in enumerate(rows):
-            for j, val in enumerate(row):
-                self.res_table.setItem(i, j, QTableWidgetItem(str(val)))
+        self.res_model.reset(partial(fetch_reservations_page, self.reservation_source(), ""))
 
     def search_reservations(self):
         keyword = self.res_search_input.text().strip()
-        if not keyword:
-            self.load_reservations()
-            return
+        self.res_model.reset(partial(fetch_reservations_page, self.reservation_source(), keyword))
 
-        conn = sqlite3.connect(RESERVATION_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, user_id, restaurant, seat, start_time, end_time
-            FROM reservations
-            WHERE user_id LIKE ?
-        """, (f"%{keyword}%",))
-        rows = cursor.fetchall()
-        conn.close()
-
-        self.res_table.setRowCount(len(rows))
-        for i, row in enumerate(rows):
-            for j, val in enumerate(row):
-                self.res_table.setItem(i, j, QTableWidgetItem(str(val)))
+    @staticmethod
+    def reservation_cell_text(row, column):
+        # start_time, end_time은 epoch 초(예전 DB는 ISO 문자열)로 저장되어 있어 읽기 좋게 변환
+        if column >= 4:
+            return format_time(row[column])
+        return str(row[column])
 
     def delete_reservation(self):
-        selected = self.res_table.currentRow()
-        if selected == -1:
+        selected = self.selected_row(self.res_table)
+        if selected is None:
             QMessageBox.warning(self, "경고", "삭제할 예약을 선택하세요.")
             return
-        res_id = self.res_table.item(selected, 0).text()
+        res_id = selected[0]
         confirm = QMessageBox.question(
             self, "확인", f"정말로 예약 {res_id}를 삭제하시겠습니까?",
             QMessageBox.Yes | QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            conn = sqlite3.connect(RESERVATION_DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM reservations WHERE id=?", (res_id,))
-            conn.commit()
-            conn.close()
-            self.load_reservations()
+            with reservation_utils.db.transaction(immediate=True) as c:
+                deleted = c.execute("DELETE FROM reservations WHERE id=?", (res_id,)).rowcount
+            if not deleted:
+                # 통합 뷰에서 고른 지난 예약은 보관 기록이므로 삭제하지 않음
+                QMessageBox.warning(self, "경고", "지난 예약 기록은 삭제할 수 없습니다.")
+                return
+            self.search_reservations()
 
     # ──────────────────────────────────────────────────────────────────────────
     def init_review_tab(self):
         layout = QVBoxLayout()
-        self.review_table = QTableWidget()
+        self.review_model = KeysetTableModel(
+            ["ID", "User ID", "Review Text", "Rating", "Timestamp"],
+            key_of=lambda row: (row[4], row[0]),
+            display=lambda row, column: str(row[column]),
+            on_error=self.show_load_error,
+            parent=self,
+        )
+        self.review_table = self.make_table(self.review_model)
         layout.addWidget(self.review_table)
 
         btn_layout = QHBoxLayout()
@@ -308,53 +383,18 @@ class AdminApp(QMainWindow):
         self.load_reviews()
 
     def load_reviews(self):
-        conn = sqlite3.connect(REVIEW_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, user_id, review, rating, timestamp
-            FROM reviews
-            ORDER BY timestamp DESC
-        """)
-        rows = cursor.fetchall()
-        conn.close()
-
-        self.review_table.setRowCount(len(rows))
-        self.review_table.setColumnCount(5)
-        self.review_table.setHorizontalHeaderLabels(
-            ["ID", "User ID", "Review Text", "Rating", "Timestamp"]
-        )
-        for i, row in enumerate(rows):
-            for j, val in enumerate(row):
-                self.review_table.setItem(i, j, QTableWidgetItem(str(val)))
+        self.review_model.reset(partial(fetch_reviews_page, ""))
 
     def search_reviews(self):
         keyword = self.review_search_input.text().strip()
-        if not keyword:
-            self.load_reviews()
-            return
-
-        conn = sqlite3.connect(REVIEW_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, user_id, review, rating, timestamp
-            FROM reviews
-            WHERE user_id LIKE ?
-            ORDER BY timestamp DESC
-        """, (f"%{keyword}%",))
-        rows = cursor.fetchall()
-        conn.close()
-
-        self.review_table.setRowCount(len(rows))
-        for i, row in enumerate(rows):
-            for j, val in enumerate(row):
-                self.review_table.setItem(i, j, QTableWidgetItem(str(val)))
+        self.review_model.reset(partial(fetch_reviews_page, keyword))
 
     def delete_review(self):
-        selected = self.review_table.currentRow()
-        if selected == -1:
+        selected = self.selected_row(self.review_table)
+        if selected is None:
             QMessageBox.warning(self, "경고", "삭제할 리뷰를 선택하세요.")
             return
-        review_id = self.review_table.item(selected, 0).text()
+        review_id = selected[0]
         confirm = QMessageBox.question(
             self, "확인", f"정말로 리뷰 {review_id}를 삭제하시겠습니까?",
             QMessageBox.Yes | QMessageBox.No